@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Local Task Assignment Solver
+Deterministic replacement for the second LLM round-trip: assigns analyzed tasks to
+members using the rules that PROMPT_ASSIGN in model.py states in prose.
+"""
+
+from ai_embeddings import embeddings_enabled, similarity as embedding_similarity
+from ai_scoring import normalize_member, normalize_task, SuitabilityMatrix
+
+# Rule 2: head count (min, max) per task type; preferred levels live in ai_scoring
+TASK_TYPE_HEADCOUNT = {'Low': (1, 2), 'Medium': (2, 3), 'High': (2, 4), 'Urgent': (1, 2)}
+TASK_TYPE_ORDER = {'Urgent': 0, 'High': 1, 'Medium': 2, 'Low': 3}
+
+# Rule 5: nobody gets more than 40% of the project's total workload
+MAX_WORKLOAD_SHARE = 0.4
+
+WEIGHT_LOAD = 2.0
+WEIGHT_ROTATION = 1.5
+WEIGHT_RELIABILITY = 0.5
+
+INFEASIBLE = float('inf')
+
+def hungarian(cost):
+    """Minimum-cost assignment of every row to a distinct column (rows <= columns).
+
+    Returns the column chosen for each row. Infeasible cells must hold a large
+    finite cost; callers check the chosen cells against their own cost matrix.
+    """
+    n = len(cost)
+    m = len(cost[0]) if n else 0
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [INFEASIBLE] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = INFEASIBLE
+            j1 = 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+class LocalAssigner:
+    """Assign tasks to members with round-based min-cost bipartite matching.
+
+    Every task needs the minimum head count for its type. Each round matches the
+    open task slots against members (at most one slot per member per round) using
+    costs computed from the current loads, so the workload balance, the 40% cap
+    and the Urgent/High rotation all see the decisions of previous rounds.
+
+    With a `balance` (ai_pipeline.WorkloadBalance) the tasks are one batch of a
+    larger project: loads start from, and are written back to, the balance, and
+    the cap is taken against its estimate of the project total. `teams` holds the
+    member indexes already on each task (booked in the balance); the solver only
+    tops those teams up to their minimum head count. `history` ({name key: [task
+    texts]}, ai_embeddings.stored_history) adds each member's past tasks to their
+    profile for the embedding similarity.
+    """
+
+    def __init__(self, tasks, members, balance=None, teams=None, history=None):
+        self.tasks = [normalize_task(t, i) for i, t in enumerate(tasks)]
+        self.members = [normalize_member(m, i) for i, m in enumerate(members)]
+        if balance is not None:
+            balance.add_tasks(tasks)
+            self.total_units = balance.total_units()
+            self.cap_units = balance.cap_units()
+        else:
+            self.total_units = sum(t['units'] for t in self.tasks) or 1.0
+            # Below three members the 40% cap cannot be met; fall back to an even split
+            share = max(MAX_WORKLOAD_SHARE, 1.0 / max(len(self.members), 1))
+            self.cap_units = share * self.total_units
+        total_capacity = sum(m['capacity'] for m in self.members) or 1.0
+        self.target_units = [self.total_units * m['capacity'] / total_capacity for m in self.members]
+        similarity = None
+        if embeddings_enabled():
+            # Tasks and members are matched by meaning as well as by shared skill words
+            similarity = embedding_similarity(tasks, members, history)
+        # Skill and seniority fit don't change between rounds, so score them once
+        self.static_cost = (-SuitabilityMatrix(self.tasks, self.members, similarity=similarity).scores).tolist()
+        self.load = balance.load if balance is not None else [0.0] * len(self.members)
+        self.hard_count = balance.hard_count if balance is not None else [0] * len(self.members)
+        self.assigned = [list(team) for team in teams] if teams else [[] for _ in self.tasks]
+
+    def headcount(self, task):
+        low, _ = TASK_TYPE_HEADCOUNT[task['type']]
+        return min(low, len(self.members))
+
+    def cost(self, task, member, share):
+        """Cost of adding member to task, or INFEASIBLE"""
+        m = member['index']
+        if m in self.assigned[task['index']]:
+            return INFEASIBLE
+        projected = self.load[m] + share
+        if projected > self.cap_units + 1e-9:
+            return INFEASIBLE
+        cost = self.static_cost[task['index']][m]
+        cost += WEIGHT_LOAD * projected / self.target_units[m]
+        if task['type'] in ('Urgent', 'High'):
+            cost += WEIGHT_ROTATION * self.hard_count[m]
+            cost += WEIGHT_RELIABILITY * min(member['deadline_misses'], 5) / 5
+        return cost
+
+    def solve(self):
+        """Return the assigned member indexes for every task, in task order"""
+        if not self.members:
+            return self.assigned
+        order = sorted(self.tasks, key=lambda t: (TASK_TYPE_ORDER[t['type']], -t['units'], t['index']))
+        # Tasks that cannot take more people without breaking the cap keep a smaller team
+        closed = set()
+        while True:
+            slots = [t for t in order
+                     if t['index'] not in closed and len(self.assigned[t['index']]) < self.headcount(t)]
+            if not slots:
+                break
+            slots = slots[:len(self.members)]
+            shares = [t['units'] / self.headcount(t) for t in slots]
+            matrix = [[self.cost(t, m, share) for m in self.members] for t, share in zip(slots, shares)]
+            finite = [[c if c != INFEASIBLE else 1e9 for c in row] for row in matrix]
+            for row, col in enumerate(hungarian(finite)):
+                task = slots[row]
+                team = self.assigned[task['index']]
+                if matrix[row][col] == INFEASIBLE:
+                    if team:
+                        closed.add(task['index'])
+                        continue
+                    # Relax the cap rather than leave the task unassigned
+                    col = min(range(len(self.members)), key=lambda m: (self.load[m], m))
+                team.append(col)
+                self.load[col] += shares[row]
+                if task['type'] in ('Urgent', 'High'):
+                    self.hard_count[col] += 1
+        return self.assigned
+
+def assign_tasks(task_analysis, user_data, balance=None, history=None):
+    """Assign analyzed tasks to members locally.
+
+    Returns (user_task_mapping, task_assignment) in the same shape run_ai_analysis
+    builds from the LLM assignment response. `balance` carries the loads of earlier
+    batches of the same project and `history` the members' past tasks (see LocalAssigner).
+    """
+    solver = LocalAssigner(task_analysis, user_data, balance, history=history)
+    user_task_mapping = []
+    task_assignment = []
+    for task, members in zip(solver.tasks, solver.solve()):
+        for m in members:
+            member = solver.members[m]
+            user_task_mapping.append({"taskId": task['taskId'], "MemberName": member['name']})
+            task_assignment.append({
+                "taskId": task['taskId'],
+                "userId": member['id'],
+                "userName": member['name'],
+                "assigned": True
+            })
+    return user_task_mapping, task_assignment
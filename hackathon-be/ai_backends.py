@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+LLM Backends
+Interchangeable text-generation backends behind the GenerativeModel interface
+(`generate_content(prompt, stream=False)`): Gemini, an offline deterministic stub
+that answers from the prompt's own content, and a replay of recorded responses.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from ai_cache import cache_key, options_key
+from ai_incremental import split_tasks
+from ai_markdown import first_data_table
+from ai_prompts import parse_compact_members, parse_compact_tasks
+from ai_scheduler import estimate_tokens
+from ai_stream import JsonArrayParser, chunk_text, parse_json_objects
+
+BACKENDS = ('gemini', 'stub', 'replay')
+GEMINI_MODEL = 'gemini-1.5-flash'
+
+# Characters per simulated stream chunk (Gemini sends a few dozen tokens per chunk)
+STREAM_CHUNK_CHARS = 120
+
+class BackendResponse:
+    """Minimal stand-in for a GenerateContentResponse"""
+
+    def __init__(self, text):
+        self.text = text
+
+def bind_default_client(genai, model):
+    """Give a GenerativeModel the client of the API key configured right now.
+
+    In google-generativeai 0.x a GenerativeModel takes no key or client; it fetches
+    the module's default client on its first call, under whichever key was
+    configured last. Setting its `_client` (not public API) while our key is current
+    is the only way to keep keys apart, so other SDK versions are refused rather
+    than silently sharing one key.
+    """
+    from google.generativeai import client as genai_client
+
+    if not genai.__version__.startswith('0.') or not hasattr(model, '_client'):
+        raise RuntimeError(f"google-generativeai {genai.__version__} is not supported; install 0.8.x")
+    model._client = genai_client.get_default_generative_client()
+
+class GeminiBackend:
+    """google.generativeai GenerativeModel bound to one API key"""
+
+    # genai.configure() mutates module-global state
+    _configure_lock = threading.Lock()
+
+    def __init__(self, api_key, model_name=GEMINI_MODEL):
+        import google.generativeai as genai
+
+        self.model_name = model_name
+        with self._configure_lock:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel(model_name)
+            bind_default_client(genai, self.model)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self.model.generate_content(prompt, stream=True, **kwargs)
+        return self.model.generate_content(prompt, **kwargs)
+
+class SimulatedLatency:
+    """Sleeps for latency +/- jitter (seconds, normally distributed) per response,
+    plus token_latency per output token, like a model decoding a longer answer.
+
+    Streamed responses spread the delay over their chunks, so the first object
+    arrives early just like with the real API.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=None, token_latency=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def delay(self, latency=None, text=''):
+        latency = self.latency if latency is None else latency
+        decode = self.token_latency * estimate_tokens(text) if self.token_latency and text else 0.0
+        if not latency and not self.jitter:
+            return decode
+        with self._rng_lock:
+            return max(0.0, self._rng.gauss(latency, self.jitter)) + decode
+
+    def respond(self, text, stream=False, latency=None):
+        delay = self.delay(latency, text)
+        if not stream:
+            time.sleep(delay)
+            return BackendResponse(text)
+        return self._stream(text, delay)
+
+    def _stream(self, text, delay):
+        chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or ['']
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield BackendResponse(chunk)
+
+# Skill keywords (lowercase, Vietnamese included) -> skills reported by the stub
+_SKILL_KEYWORDS = [
+    (('giao diện', 'ui/', 'ux', 'wireframe', 'mockup', 'figma', 'thiết kế giao'), ['UI/UX Design', 'Figma']),
+    (('frontend', 'react', 'web', 'trang', 'hiển thị', 'responsive'), ['Frontend', 'React']),
+    (('api', 'backend', 'server', 'xử lý', 'tích hợp', 'thanh toán'), ['Backend', 'API']),
+    (('cơ sở dữ liệu', 'database', 'sql', 'truy vấn', 'dữ liệu'), ['Database', 'SQL']),
+    (('test', 'kiểm thử', 'qa', 'lỗi', 'bug'), ['Testing', 'QA']),
+    (('deploy', 'triển khai', 'cloud', 'aws', 'docker', 'backup', 'ci/cd', 'server'), ['DevOps', 'AWS']),
+    (('mobile', 'android', 'ios', 'ứng dụng di động'), ['Mobile']),
+    (('đăng nhập', 'login', 'bảo mật', 'security', 'xác thực', 'auth'), ['Security', 'Backend']),
+    (('yêu cầu', 'use case', 'phân tích', 'tài liệu', 'document', 'báo cáo'), ['Business Analysis', 'Communication']),
+    (('video', 'phim', 'stream'), ['Media Streaming', 'Backend']),
+]
+_FALLBACK_SKILLS = [['Backend'], ['Frontend'], ['Testing'], ['Communication'], ['DevOps']]
+_URGENT_KEYWORDS = ('gấp', 'urgent', 'khẩn', 'ngay', 'deadline', 'hotfix')
+_HARD_KEYWORDS = ('tối ưu', 'kiến trúc', 'bảo mật', 'tích hợp', 'thanh toán', 'hiệu năng', 'architecture',
+                  'optimi', 'security', 'stream', 'real-time', 'realtime', 'scale')
+_PRIORITY = {'Low': 2, 'Medium': 3, 'High': 4, 'Urgent': 5}
+
+_fixed_id_line_re = re.compile(r'^\s*(TASK\d+)\s*:\s*(.+?)\s*$', re.IGNORECASE)
+_experience_re = re.compile(r'\d+(?:[.,]\d+)?\s*(?:năm|years?)', re.IGNORECASE)
+
+def _stable_int(text):
+    return int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:4], 'big')
+
+def _section(prompt, start, end):
+    """Text of the prompt between two marker lines, or None"""
+    begin = prompt.find(start)
+    if begin < 0:
+        return None
+    begin = prompt.find('\n', begin) + 1
+    finish = prompt.find(end, begin)
+    return prompt[begin:finish if finish >= 0 else len(prompt)].strip()
+
+def classify_task(text):
+    """Deterministic stand-in for the model's task analysis of one task text"""
+    lowered = text.lower()
+    skills = []
+    for keywords, names in _SKILL_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            skills.extend(name for name in names if name not in skills)
+    h = _stable_int(lowered)
+    if not skills:
+        skills = list(_FALLBACK_SKILLS[h % len(_FALLBACK_SKILLS)])
+    skills = skills[:3]
+
+    words = len(lowered.split())
+    if any(keyword in lowered for keyword in _URGENT_KEYWORDS):
+        task_type = 'Urgent'
+    elif any(keyword in lowered for keyword in _HARD_KEYWORDS) or len(skills) >= 3:
+        task_type = 'High'
+    elif words <= 5 and h % 3 == 0:
+        task_type = 'Low'
+    else:
+        task_type = ('Medium', 'Medium', 'Low', 'High')[h % 4]
+
+    if task_type in ('High', 'Urgent') or words > 14:
+        workload = 'Large' if h % 2 else 'Medium'
+    elif task_type == 'Low':
+        workload = 'Small'
+    else:
+        workload = ('Small', 'Medium', 'Medium')[h % 3]
+
+    priority = min(5, max(1, _PRIORITY[task_type] + (h >> 4) % 3 - 1))
+    return {"type": task_type, "difficulty": task_type, "skills": skills, "workload": workload, "priority": priority}
+
+def _prompt_tasks(block):
+    """(taskId, text) pairs of the task list embedded in an analysis prompt"""
+    lines = [line for line in block.splitlines() if line.strip()]
+    fixed = [_fixed_id_line_re.match(line) for line in lines]
+    if lines and all(fixed):
+        return [(m.group(1).upper(), m.group(2)) for m in fixed]
+    tasks = []
+    for index, task in enumerate(split_tasks(block)):
+        text = f"{task['name']} - {task['description']}" if task['description'] else task['name']
+        tasks.append((task['taskId'] or f"TASK{index + 1:02d}", text))
+    return tasks
+
+def _markdown_members(block):
+    """Member records from the free-form member lines of model.py's PROMPT_ASSIGN"""
+    members = []
+    for index, line in enumerate(l for l in block.splitlines() if l.strip()):
+        fields = [f.strip() for f in re.split(r'\s+-\s+|\|', line) if f.strip()]
+        name = next((f for f in fields if not f.isdigit()), '')
+        experience = _experience_re.search(line)
+        if name:
+            members.append({"Id": str(index + 1), "Name": name, "Department": line,
+                            "Experience": experience.group() if experience else '1 years'})
+    return members
+
+class StubBackend(SimulatedLatency):
+    """Offline backend that answers the prompts of ai_integration.py and model.py.
+
+    Task analysis is derived from keywords of each task text, assignments come from
+    the local solver over the tasks and members embedded in the prompt. The same
+    prompt always gets the same answer; nothing leaves the machine.
+    """
+
+    model_name = 'stub'
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        config = kwargs.get('generation_config') or {}
+        # Schema-constrained requests get a bare JSON array, like Gemini sends them
+        bare_json = config.get('response_mime_type') == 'application/json'
+        return self.respond(self.answer(prompt, bare_json), stream)
+
+    def answer(self, prompt, bare_json=False):
+        text = self._answer(prompt)
+        if bare_json and text.startswith('```json\n'):
+            return text[len('```json\n'):-len('\n```')]
+        return text
+
+    def _answer(self, prompt):
+        if 'Hãy sửa lại từng object' in prompt:
+            return self._json_repair(prompt)
+        if 'DỮ LIỆU THÀNH VIÊN' in prompt:
+            return self._markdown_assignment(prompt)
+        if '| Task ID |' in prompt:
+            return self._markdown_analysis(prompt)
+        if '"MemberName"' in prompt:
+            return self._json_assignment(prompt)
+        if '"taskId"' in prompt:
+            return self._json_analysis(prompt)
+        return "[]"
+
+    def _json_analysis(self, prompt):
+        block = _section(prompt, 'Dưới đây là danh sách các task', 'Với từng task') or ''
+        rows = [{"taskId": task_id, **classify_task(text)} for task_id, text in _prompt_tasks(block)]
+        return "```json\n" + json.dumps(rows, ensure_ascii=False, indent=2) + "\n```"
+
+    def _json_assignment(self, prompt):
+        tasks_block = _section(prompt, 'Danh sách task đã phân tích', 'Danh sách thành viên') or ''
+        members_block = _section(prompt, 'Danh sách thành viên', 'Hãy phân công') or ''
+        task_analysis = parse_compact_tasks(tasks_block)
+        user_data = parse_compact_members(members_block)
+        try:
+            if task_analysis is None:
+                task_analysis = json.loads(tasks_block)
+            if user_data is None:
+                user_data = json.loads(members_block)
+        except ValueError:
+            return "[]"
+        from ai_assigner import assign_tasks
+        mapping, _ = assign_tasks(task_analysis, user_data)
+        return "```json\n" + json.dumps(mapping, ensure_ascii=False, indent=2) + "\n```"
+
+    def _json_repair(self, prompt):
+        """Re-derive the analysis of each listed item from what is left of it"""
+        block = _section(prompt, 'không đúng format', 'Hãy sửa lại') or ''
+        rows = []
+        for entry in parse_json_objects(block):
+            item = entry.get('item') if isinstance(entry.get('item'), dict) else {}
+            if item.get('taskId'):
+                rows.append({"taskId": item['taskId'], **classify_task(json.dumps(item, ensure_ascii=False))})
+        return "```json\n" + json.dumps(rows, ensure_ascii=False, indent=2) + "\n```"
+
+    def _markdown_analysis(self, prompt):
+        block = _section(prompt, 'Dưới đây là danh sách các task', 'Với từng task') or ''
+        lines = ["| Task ID | Tên task | Loại task | Độ khó (giải thích) | Kỹ năng chính | Khối lượng | Ưu tiên (1-5, lý do) |",
+                 "|---|---|---|---|---|---|---|"]
+        for task_id, text in _prompt_tasks(block):
+            row = classify_task(text)
+            lines.append(f"| {task_id} | {text.replace('|', '/')} | {row['type']} | Ước lượng theo mô tả task "
+                         f"| {', '.join(row['skills'])} | {row['workload']} | {row['priority']} |")
+        return "\n".join(lines) + "\n"
+
+    def _markdown_assignment(self, prompt):
+        members = _markdown_members(_section(prompt, 'DỮ LIỆU THÀNH VIÊN', '--- DỮ LIỆU TASK') or '')
+        block = _section(prompt, 'DỮ LIỆU TASK', '--- QUY TẮC') or ''
+        tasks = parse_compact_tasks(block)
+        if tasks is None:
+            table = first_data_table(block)
+            tasks = list(table.iter_records()) if table else []
+        from ai_assigner import assign_tasks
+        mapping, _ = assign_tasks(tasks, members) if tasks and members else ([], [])
+        lines = ["| Task ID | Thành viên (tên) |", "|---|---|"]
+        lines.extend(f"| {m['taskId']} | {m['MemberName']} |" for m in mapping)
+        return "\n".join(lines) + "\n"
+
+def record_key(model_name, prompt, kwargs):
+    """Recording key of a request; generation options (e.g. a response schema) are part of it, as in the cache"""
+    return cache_key(model_name, prompt, options_key(kwargs) if kwargs else None)
+
+class ReplayMiss(LookupError):
+    """No recorded response for a prompt"""
+
+class ReplayBackend(SimulatedLatency):
+    """Serves responses recorded by RecordingBackend, keyed like the response cache.
+
+    Without an explicit latency each response takes as long as it did when it was
+    recorded. Prompts that were never recorded go to `fallback` or raise ReplayMiss.
+    """
+
+    def __init__(self, path, latency=None, jitter=0.0, seed=None, fallback=None, model_name=GEMINI_MODEL):
+        super().__init__(latency, jitter, seed)
+        self.path = Path(path)
+        self.model_name = model_name
+        self.fallback = fallback
+        self.records = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[record['key']] = record
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        record = self.records.get(record_key(self.model_name, prompt, kwargs))
+        if record is None:
+            if self.fallback is None:
+                raise ReplayMiss(f"No recorded response for prompt ({len(prompt)} chars) in {self.path}")
+            return self.fallback.generate_content(prompt, stream=stream, **kwargs)
+        latency = self.latency if self.latency is not None else record.get('latency', 0.0)
+        return self.respond(record['response'], stream, latency)
+
+class RecordingBackend:
+    """Appends every prompt/response pair of a backend to a JSONL file for ReplayBackend"""
+
+    def __init__(self, backend, path, model_name=GEMINI_MODEL):
+        self.backend = backend
+        self.model_name = model_name
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        started = time.perf_counter()
+        if not stream:
+            response = self.backend.generate_content(prompt, **kwargs)
+            self._record(prompt, kwargs, response.text, time.perf_counter() - started)
+            return response
+        return self._stream_and_record(prompt, kwargs, started,
+                                       self.backend.generate_content(prompt, stream=True, **kwargs))
+
+    def _stream_and_record(self, prompt, kwargs, started, chunks):
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk_text(chunk))
+                yield chunk
+        except GeneratorExit:
+            # Callers stop reading once the JSON array is closed; that response is complete
+            parser = JsonArrayParser()
+            parser.feed(''.join(parts))
+            if parser.finished:
+                self._record(prompt, kwargs, ''.join(parts), time.perf_counter() - started)
+            raise
+        self._record(prompt, kwargs, ''.join(parts), time.perf_counter() - started)
+
+    def _record(self, prompt, kwargs, response, latency):
+        record = {"key": record_key(self.model_name, prompt, kwargs), "model": self.model_name,
+                  "latency": round(latency, 4), "prompt": prompt, "response": response}
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+class TransientError(RuntimeError):
+    """Injected API failure shaped like google.api_core errors: an HTTP `code` and a `retry_after` hint"""
+
+    def __init__(self, code=429, retry_after=None):
+        super().__init__(f"{code} {'Resource has been exhausted' if code == 429 else 'Service unavailable'}"
+                         " (injected)")
+        self.code = code
+        self.retry_after = retry_after
+
+# Ways a model answer item goes wrong: out-of-enum values, missing fields, unknown names
+_CORRUPTIONS = (
+    ('type', 'Very Hard'), ('workload', 'Huge'), ('priority', 'top'), ('skills', None),
+    ('MemberName', 'Không rõ'), ('taskId', None),
+)
+
+class FaultInjectingBackend:
+    """Fails calls of a backend the way an overloaded API does, for scheduler tests.
+
+    Calls beyond quota_per_minute (a server-side token bucket) get a 429 with a
+    retry_after hint; others fail at random with error_rate (429 or 503). With
+    corrupt_rate, that share of the JSON items in answers get an invalid field.
+    """
+
+    def __init__(self, backend, error_rate=0.0, quota_per_minute=None, seed=None, corrupt_rate=0.0):
+        self.backend = backend
+        self.error_rate = error_rate
+        self.corrupt_rate = corrupt_rate
+        self.quota_rate = quota_per_minute / 60.0 if quota_per_minute else None
+        self.quota_burst = max(1.0, self.quota_rate or 0.0)
+        self._quota = self.quota_burst
+        self._quota_updated = time.monotonic()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _check(self):
+        with self._lock:
+            if self.quota_rate:
+                now = time.monotonic()
+                self._quota = min(self.quota_burst, self._quota + (now - self._quota_updated) * self.quota_rate)
+                self._quota_updated = now
+                if self._quota < 1.0:
+                    self.rejected += 1
+                    raise TransientError(429, retry_after=(1.0 - self._quota) / self.quota_rate)
+                self._quota -= 1.0
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.rejected += 1
+                raise TransientError(self._rng.choice((429, 503)))
+
+    def _corrupt(self, text):
+        items = parse_json_objects(text)
+        if not items:
+            return text
+        with self._lock:
+            for item in items:
+                if self._rng.random() < self.corrupt_rate:
+                    field, value = self._rng.choice([c for c in _CORRUPTIONS if c[0] in item] or _CORRUPTIONS)
+                    if value is None:
+                        item.pop(field, None)
+                    else:
+                        item[field] = value
+        return json.dumps(items, ensure_ascii=False)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self._check()
+        if self.corrupt_rate:
+            response = BackendResponse(self._corrupt(self.backend.generate_content(prompt, **kwargs).text))
+            return [response] if stream else response
+        if stream:
+            return self.backend.generate_content(prompt, stream=True, **kwargs)
+        return self.backend.generate_content(prompt, **kwargs)
+
+def _env_float(name, default=None):
+    value = os.getenv(name)
+    return float(value) if value not in (None, '') else default
+
+def resolve_backend(name=None):
+    """Backend name from the parameter, then AI_BACKEND, defaulting to gemini"""
+    name = (name or os.getenv('AI_BACKEND') or 'gemini').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return name
+
+def create_backend(name=None, api_key=None, model_name=GEMINI_MODEL):
+    """Build a backend from its name and the AI_BACKEND_* / AI_REPLAY_* / AI_RECORD_PATH settings.
+
+    AI_FAULT_RATE / AI_FAULT_QUOTA make the offline backends fail like a throttled API,
+    AI_FAULT_CORRUPT makes them return some invalid JSON items.
+    """
+    name = resolve_backend(name)
+    latency = _env_float('AI_BACKEND_LATENCY')
+    jitter = _env_float('AI_BACKEND_JITTER', 0.0)
+    token_latency = _env_float('AI_BACKEND_TOKEN_LATENCY', 0.0)
+    seed = os.getenv('AI_BACKEND_SEED')
+
+    if name in ('stub', 'replay'):
+        if name == 'stub':
+            backend = StubBackend(latency or 0.0, jitter, seed, token_latency)
+        else:
+            path = os.getenv('AI_REPLAY_PATH')
+            if not path:
+                raise ValueError("AI_REPLAY_PATH must point to a recorded JSONL file for the replay backend")
+            fallback = (StubBackend(latency or 0.0, jitter, seed, token_latency) if os.getenv('AI_REPLAY_FALLBACK') == 'stub'
+                        else None)
+            backend = ReplayBackend(path, latency, jitter, seed, fallback, model_name)
+        error_rate = _env_float('AI_FAULT_RATE', 0.0)
+        quota = _env_float('AI_FAULT_QUOTA')
+        corrupt_rate = _env_float('AI_FAULT_CORRUPT', 0.0)
+        if error_rate or quota or corrupt_rate:
+            backend = FaultInjectingBackend(backend, error_rate, quota, seed, corrupt_rate)
+        return backend
+
+    backend = GeminiBackend(api_key, model_name)
+    if os.getenv('AI_RECORD_PATH'):
+        backend = RecordingBackend(backend, os.getenv('AI_RECORD_PATH'), model_name)
+    return backend
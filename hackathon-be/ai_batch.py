@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Batch Analysis
+Loads many (tasks, users, output) jobs from a manifest or a directory of projects,
+runs them under a global job concurrency limit in one process, and builds a
+summary report with per-job timings.
+"""
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_BATCH_JOBS = int(os.getenv('AI_BATCH_JOBS', 4))
+
+TASK_FILE_NAMES = ('tasks.json', 'tasks.txt', 'tasks.md', 'tasks.csv', 'tasks.ndjson')
+USER_FILE_NAMES = ('users.json', 'output_user.json', 'users.csv')
+JOB_OPTIONS = ('project', 'assigner', 'chunkSize', 'concurrency')
+
+def atomic_write_json(data, path):
+    """Write JSON to a temp file next to path and rename it into place"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _first_existing(directory, names):
+    return next((directory / name for name in names if (directory / name).is_file()), None)
+
+def _output_path(job_id, tasks_path, output_dir):
+    if output_dir:
+        return Path(output_dir) / f"{job_id}.json"
+    return tasks_path.parent / f"{job_id}.ai_output.json"
+
+def load_manifest(path, output_dir=None):
+    """Jobs from a manifest: a list of jobs or {"defaults": {...}, "jobs": [...]}.
+
+    Each job names "tasks", "users" and optionally "output", "id", "project",
+    "assigner", "chunkSize" and "concurrency". Paths are relative to the manifest.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    defaults = {}
+    if isinstance(manifest, dict):
+        defaults = manifest.get('defaults', {})
+        manifest = manifest.get('jobs', [])
+
+    base = path.parent
+    jobs = []
+    seen = set()
+    for index, entry in enumerate(manifest):
+        entry = {**defaults, **entry}
+        tasks_path = base / entry['tasks']
+        job_id = str(entry.get('id') or tasks_path.stem)
+        if job_id in seen:
+            job_id = f"{job_id}-{index + 1}"
+        seen.add(job_id)
+        output = base / entry['output'] if entry.get('output') else _output_path(job_id, tasks_path, output_dir)
+        jobs.append({
+            "id": job_id,
+            "tasks": str(tasks_path),
+            "users": str(base / entry['users']),
+            "output": str(output),
+            **{k: entry[k] for k in JOB_OPTIONS if entry.get(k) is not None},
+        })
+    return jobs
+
+def discover_jobs(directory, output_dir=None):
+    """One job per project subdirectory holding a tasks file (tasks.json/.txt/.md/.csv/.ndjson).
+
+    The subdirectory's users.json is used, or the one at the top of the directory.
+    """
+    directory = Path(directory)
+    shared_users = _first_existing(directory, USER_FILE_NAMES)
+    jobs = []
+    for project_dir in sorted(p for p in directory.iterdir() if p.is_dir()):
+        tasks_path = _first_existing(project_dir, TASK_FILE_NAMES)
+        users_path = _first_existing(project_dir, USER_FILE_NAMES) or shared_users
+        if tasks_path is None or users_path is None:
+            continue
+        output = (Path(output_dir) / f"{project_dir.name}.json" if output_dir
+                  else project_dir / 'ai_output.json')
+        jobs.append({"id": project_dir.name, "tasks": str(tasks_path), "users": str(users_path),
+                     "output": str(output)})
+    return jobs
+
+def load_jobs(source, output_dir=None):
+    """Jobs from a manifest file or a directory of projects"""
+    if Path(source).is_dir():
+        return discover_jobs(source, output_dir)
+    return load_manifest(source, output_dir)
+
+def run_jobs(jobs, run_one, concurrency=None):
+    """Run run_one(job) -> result dict for every job; returns the per-job report rows in job order"""
+    concurrency = concurrency or DEFAULT_BATCH_JOBS
+
+    def timed(job):
+        started = time.perf_counter()
+        try:
+            result = run_one(job)
+            error = result.get('error')
+        except Exception as e:
+            result, error = {}, str(e)
+        return {
+            "id": job['id'],
+            "tasks": job['tasks'],
+            "output": job['output'],
+            "status": "error" if error else "ok",
+            **({"error": error} if error else {}),
+            "seconds": round(time.perf_counter() - started, 3),
+            "analyzedTasks": len(result.get('taskAnalysis', [])),
+            "assignments": len(result.get('userTaskMapping', [])),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs) or 1))) as executor:
+        return list(executor.map(timed, jobs))
+
+def build_summary(rows, wall_seconds, extra=None):
+    """Totals plus per-job rows"""
+    seconds = sorted(row['seconds'] for row in rows)
+    failed = sum(1 for row in rows if row['status'] != 'ok')
+    return {
+        "jobs": len(rows),
+        "succeeded": len(rows) - failed,
+        "failed": failed,
+        "wallSeconds": round(wall_seconds, 3),
+        "jobSecondsTotal": round(sum(seconds), 3),
+        "jobSecondsMedian": seconds[len(seconds) // 2] if seconds else 0.0,
+        "jobSecondsMax": seconds[-1] if seconds else 0.0,
+        **(extra or {}),
+        "results": rows,
+    }
+
+def format_summary(summary):
+    """Human-readable table of a batch summary"""
+    lines = [f"{'job':<24} {'status':<6} {'seconds':>8} {'tasks':>6} {'assigned':>9}"]
+    for row in summary['results']:
+        lines.append(f"{row['id'][:24]:<24} {row['status']:<6} {row['seconds']:>8.2f} "
+                     f"{row['analyzedTasks']:>6} {row['assignments']:>9}")
+    lines.append(f"{summary['succeeded']}/{summary['jobs']} jobs succeeded in {summary['wallSeconds']:.2f}s "
+                 f"(sum of job times {summary['jobSecondsTotal']:.2f}s)")
+    return "\n".join(lines)
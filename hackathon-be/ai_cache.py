@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Gemini Response Cache
+Content-addressed, on-disk (SQLite) cache for model.generate_content responses with
+TTL expiry, size-bounded LRU eviction and hit/miss statistics.
+
+Usage: python ai_cache.py [stats|clear] [--path PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from ai_store import connect, store_path
+from ai_stream import JsonArrayParser, chunk_text
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+
+_whitespace_re = re.compile(r'[ \t]+')
+_blank_lines_re = re.compile(r'\n{2,}')
+
+def normalize_prompt(prompt):
+    """Collapse indentation and whitespace runs so reformatted prompts share a key"""
+    lines = (_whitespace_re.sub(' ', line).strip() for line in prompt.strip().splitlines())
+    return _blank_lines_re.sub('\n', '\n'.join(lines))
+
+def cache_key(model_name, prompt, options=None):
+    """SHA-256 of the model name, the normalized prompt and any generation options"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_prompt(prompt).encode('utf-8'))
+    if options:
+        digest.update(b'\0')
+        digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def options_key(kwargs):
+    """kwargs as a JSON-able dict for the cache key, or None when they can't be keyed"""
+    try:
+        json.dumps(kwargs, sort_keys=True)
+    except TypeError:
+        return None
+    return kwargs
+
+class ResponseCache:
+    """SQLite-backed prompt -> response text cache shared by threads and processes"""
+
+    def __init__(self, path=None, ttl=None, max_entries=None):
+        self.path = Path(path or os.getenv('AI_CACHE_PATH') or store_path())
+        self.ttl = float(ttl if ttl is not None else os.getenv('AI_CACHE_TTL', DEFAULT_TTL))
+        self.max_entries = int(max_entries if max_entries is not None
+                               else os.getenv('AI_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        """Return the cached response text, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl:
+                self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+                self._count('hits')
+                self.hits += 1
+                self._conn.commit()
+                return row[0]
+            if row:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._count('expired')
+            self._count('misses')
+            self.misses += 1
+            self._conn.commit()
+            return None
+
+    def put(self, key, model_name, response):
+        """Store a response and evict least recently used entries above max_entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, model_name, response, now, now)
+            )
+            self._conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl,))
+            evicted = self._conn.execute(
+                'DELETE FROM responses WHERE key IN ('
+                'SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            ).rowcount
+            if evicted > 0:
+                self._count('evictions', evicted)
+            self._conn.commit()
+
+    def stats(self):
+        """Persistent counters plus this process's hits/misses and current size"""
+        with self._lock:
+            totals = dict(self._conn.execute('SELECT name, value FROM stats').fetchall())
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        lookups = totals.get('hits', 0) + totals.get('misses', 0)
+        return {
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl,
+            "hits": totals.get('hits', 0),
+            "misses": totals.get('misses', 0),
+            "expired": totals.get('expired', 0),
+            "evictions": totals.get('evictions', 0),
+            "hitRate": round(totals.get('hits', 0) / lookups, 4) if lookups else 0.0,
+            "sessionHits": self.hits,
+            "sessionMisses": self.misses,
+        }
+
+    def clear(self):
+        """Drop every cached response and reset the counters"""
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.execute('DELETE FROM stats')
+            self._conn.commit()
+
+    def _count(self, name, amount=1):
+        self._conn.execute(
+            'INSERT INTO stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, amount)
+        )
+
+class CachedResponse:
+    """Minimal stand-in for a GenerateContentResponse served from the cache"""
+
+    cached = True
+
+    def __init__(self, text):
+        self.text = text
+
+class CachedModel:
+    """Wraps a GenerativeModel so identical prompts are answered from the cache"""
+
+    def __init__(self, model, model_name, cache=None):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache or ResponseCache()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        # Generation options (e.g. a response schema) change the output, so they are part of the key
+        options = options_key(kwargs) if kwargs else None
+        if kwargs and options is None:
+            return self.model.generate_content(prompt, stream=stream, **kwargs)
+        key = cache_key(self.model_name, prompt, options)
+        text = self.cache.get(key)
+        if text is not None:
+            return [CachedResponse(text)] if stream else CachedResponse(text)
+        if stream:
+            return self._stream_and_store(key, self.model.generate_content(prompt, stream=True, **kwargs))
+        response = self.model.generate_content(prompt, **kwargs)
+        self.cache.put(key, self.model_name, response.text)
+        return response
+
+    def _stream_and_store(self, key, chunks):
+        """Pass streamed chunks through and cache the full text once the stream completes.
+
+        A caller that stops reading once the JSON array is closed still gets the text
+        cached; a stream closed before that is not.
+        """
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk_text(chunk))
+                yield chunk
+        except GeneratorExit:
+            text = ''.join(parts)
+            parser = JsonArrayParser()
+            parser.feed(text)
+            if parser.finished:
+                self.cache.put(key, self.model_name, text)
+            raise
+        self.cache.put(key, self.model_name, ''.join(parts))
+
+def cache_enabled():
+    """The cache is on unless AI_CACHE is set to off/false/0"""
+    return os.getenv('AI_CACHE', 'on').lower() not in ('off', 'false', '0')
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the Gemini response cache")
+    parser.add_argument('command', choices=['stats', 'clear'], nargs='?', default='stats')
+    parser.add_argument('--path')
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+    if args.command == 'clear':
+        cache.clear()
+        print(f"Cache cleared: {cache.path}")
+    else:
+        for name, value in cache.stats().items():
+            print(f"{name}: {value}")
+
+if __name__ == "__main__":
+    main()
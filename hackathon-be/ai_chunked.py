@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Chunked Task Analysis
+Splits large task lists into bounded chunks, analyzes them concurrently and merges
+the rows back in input order. Failed or incomplete chunks are retried on their own.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('AI_CHUNK_SIZE', 40))
+DEFAULT_CONCURRENCY = int(os.getenv('AI_CHUNK_CONCURRENCY', 4))
+DEFAULT_RETRIES = int(os.getenv('AI_CHUNK_RETRIES', 2))
+RETRY_DELAY = 1.0
+
+def make_chunks(tasks, chunk_size):
+    """Split tasks into consecutive chunks of at most chunk_size"""
+    chunk_size = max(1, chunk_size)
+    return [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+def analyze_chunk(chunk, analyze, retries):
+    """Analyze one chunk, re-asking only for tasks missing from earlier attempts"""
+    rows = {}
+    pending = chunk
+    for attempt in range(retries + 1):
+        try:
+            wanted = {t['taskId'].upper() for t in pending}
+            for row in analyze(pending):
+                task_id = str(row.get('taskId', '')).upper()
+                if task_id in wanted:
+                    rows[task_id] = row
+        except Exception as e:
+            print(f"Chunk analysis failed (attempt {attempt + 1}): {e}", file=sys.stderr)
+        pending = [t for t in chunk if t['taskId'].upper() not in rows]
+        if not pending:
+            break
+        if attempt < retries:
+            time.sleep(RETRY_DELAY * (2 ** attempt))
+    return rows
+
+def analyze_in_chunks(tasks, analyze, chunk_size=None, concurrency=None, retries=None):
+    """Analyze tasks chunk by chunk in a thread pool.
+
+    Every task must already carry a unique taskId. `analyze(chunk)` returns the
+    analysis rows for a chunk. The merged rows follow the order of `tasks`; tasks
+    still missing after all retries are left out.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    retries = DEFAULT_RETRIES if retries is None else retries
+
+    chunks = make_chunks(tasks, chunk_size)
+    if len(chunks) == 1:
+        merged = analyze_chunk(chunks[0], analyze, retries)
+    else:
+        merged = {}
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as executor:
+            for rows in executor.map(lambda chunk: analyze_chunk(chunk, analyze, retries), chunks):
+                merged.update(rows)
+
+    result = []
+    for task in tasks:
+        row = merged.get(task['taskId'].upper())
+        if row is not None:
+            result.append({**row, "taskId": task['taskId']})
+    return result
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Embedding Index for Task/Member Matching
+Embeds tasks (name, description, skill tags) and member profiles (Department,
+Position, past tasks from an earlier result or the result history) as unit vectors and answers batched top-k nearest-member
+queries locally, without an LLM call. Vectors come from a sentence-transformers
+model when AI_EMBEDDING_MODEL names one and it is installed, and from a hashing
+embedder (word and character n-gram feature hashing) otherwise. They are stored
+per embedder under .cache/embeddings and memory-mapped, so a text is embedded
+once across runs.
+
+Usage: python ai_embeddings.py <result.json|task_analysis.json> <user_file.json> [--k 5] [--history result.json]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+from ai_names import name_key
+from ai_scoring import task_skills, tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / '.cache' / 'embeddings'
+HASH_DIM = 512
+# Task rows scored per matrix product in top_k
+QUERY_BATCH = 1024
+# Past tasks per member that go into their profile text
+HISTORY_LIMIT = 20
+
+# Character n-grams weigh less than whole words but still match "design" with "designer"
+NGRAM = 3
+NGRAM_WEIGHT = 0.5
+
+_whitespace_re = re.compile(r'\s+')
+_embedders = {}
+_embedders_lock = threading.Lock()
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def embeddings_enabled():
+    """Blend embedding similarity into the local solver's scores when AI_EMBEDDINGS=on"""
+    return os.getenv('AI_EMBEDDINGS', 'off').lower() in ('1', 'on', 'true', 'yes')
+
+def text_key(text):
+    """Fingerprint of a text after whitespace and case normalization"""
+    normalized = _whitespace_re.sub(' ', str(text or '')).strip().lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:20]
+
+class HashingEmbedder:
+    """Signed feature hashing of word tokens and character n-grams; needs only NumPy"""
+
+    def __init__(self, dim=HASH_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        for word in tokenize(text):
+            yield f"w:{word}", 1.0
+            padded = f"#{word}#"
+            for i in range(len(padded) - NGRAM + 1):
+                yield f"c:{padded[i:i + NGRAM]}", NGRAM_WEIGHT
+
+    def embed(self, texts):
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+class SentenceEmbedder:
+    """A sentence-transformers model on the CPU"""
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device='cpu')
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = re.sub(r'[^\w.-]', '_', model_name)
+
+    def embed(self, texts):
+        import numpy as np
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+def get_embedder(model_name=None):
+    """The embedder for AI_EMBEDDING_MODEL, or the hashing embedder when none is set or it cannot load"""
+    model_name = model_name or os.getenv('AI_EMBEDDING_MODEL')
+    with _embedders_lock:
+        embedder = _embedders.get(model_name)
+        if embedder is None:
+            embedder = HashingEmbedder()
+            if model_name:
+                try:
+                    embedder = SentenceEmbedder(model_name)
+                except Exception as e:
+                    print(f"Embedding model {model_name} unavailable ({e}); using {embedder.name}",
+                          file=sys.stderr)
+            _embedders[model_name] = embedder
+        return embedder
+
+class EmbeddingIndex:
+    """Text -> vector store of one embedder, kept as a memory-mapped float32 matrix.
+
+    `vectors.f32` holds one row per embedded text and `keys.json` the row of each
+    text fingerprint. Missing texts are embedded in one batch and appended under a
+    file lock; the key file is replaced after the rows are written, so readers in
+    other processes only ever map complete rows.
+    """
+
+    def __init__(self, embedder=None, path=None):
+        self.embedder = embedder or get_embedder()
+        root = Path(path or os.getenv('AI_EMBEDDING_PATH') or DEFAULT_INDEX_PATH)
+        self.path = root / self.embedder.name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._rows = 0
+        self._vectors = None
+        self._reload()
+
+    @property
+    def vectors_path(self):
+        return self.path / 'vectors.f32'
+
+    @property
+    def keys_path(self):
+        return self.path / 'keys.json'
+
+    def _reload(self):
+        import numpy as np
+        try:
+            keys = json.loads(self.keys_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            keys = {}
+        rows = max(keys.values(), default=-1) + 1
+        row_bytes = self.embedder.dim * 4
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        if size < rows * row_bytes:
+            # Vectors lost or truncated behind the keys: start over
+            keys, rows = {}, 0
+        self._keys = keys
+        self._rows = rows
+        self._vectors = (np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.embedder.dim))
+                         if rows else None)
+
+    def __len__(self):
+        return self._rows
+
+    def _append(self, missing):
+        with open(self.path / '.lock', 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another process may have added some of them meanwhile
+            self._reload()
+            missing = {key: text for key, text in missing.items() if key not in self._keys}
+            if not missing:
+                return
+            vectors = self.embedder.embed(list(missing.values()))
+            mode = 'r+b' if self.vectors_path.exists() else 'wb'
+            with open(self.vectors_path, mode) as f:
+                # Bytes past the last indexed row belong to an interrupted append
+                f.seek(self._rows * self.embedder.dim * 4)
+                f.write(vectors.astype('<f4').tobytes())
+                f.truncate()
+            keys = dict(self._keys)
+            for offset, key in enumerate(missing):
+                keys[key] = self._rows + offset
+            tmp = self.keys_path.with_name(f".keys.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(keys), encoding='utf-8')
+            os.replace(tmp, self.keys_path)
+            self._reload()
+
+    def embed(self, texts):
+        """Unit vectors (len(texts) x dim) for texts, embedding only the ones not stored yet"""
+        import numpy as np
+        keys = [text_key(text) for text in texts]
+        with self._lock:
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self._keys:
+                    missing.setdefault(key, text)
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+            if missing:
+                self._append(missing)
+            if not keys:
+                return np.zeros((0, self.embedder.dim), dtype=np.float32)
+            return np.asarray(self._vectors[[self._keys[key] for key in keys]])
+
+def get_index(path=None):
+    """The process-wide EmbeddingIndex of the configured embedder"""
+    embedder = get_embedder()
+    key = (embedder.name, str(path or ''))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = EmbeddingIndex(embedder, path)
+            _indexes[key] = index
+        return index
+
+def task_text(task):
+    """Text embedded for a task: name, description and skill tags"""
+    name = task.get('taskName') or task.get('name') or task.get('Tên task') or ''
+    parts = [name, task.get('description') or '', ', '.join(task_skills(task))]
+    return ' | '.join(str(part) for part in parts if part)
+
+def member_text(member, history=()):
+    """Text embedded for a member: Department, Position and their latest past tasks"""
+    parts = [member.get('Department') or '', member.get('Position') or '']
+    parts += list(history)[-HISTORY_LIMIT:]
+    return ' | '.join(str(part) for part in parts if part)
+
+def member_history(result):
+    """{name key: [task texts]} of the tasks each member got in an earlier result"""
+    tasks = {str(t.get('taskId', '')).upper(): task_text(t) for t in result.get('taskAnalysis') or []}
+    history = {}
+    for mapping in result.get('userTaskMapping') or []:
+        text = tasks.get(str(mapping.get('taskId', '')).upper())
+        if text and mapping.get('MemberName'):
+            history.setdefault(name_key(mapping['MemberName']), []).append(text)
+    return history
+
+def stored_history(store, user_data):
+    """{name key: [task texts]} of each member's latest past tasks in a ResultStore, oldest first"""
+    history = {}
+    for member in user_data:
+        name = member.get('Name')
+        rows = store.member_tasks(name)[:HISTORY_LIMIT] if name else []
+        texts = [task_text({**(row['analysis'] or {}), "taskName": row['taskName']}) for row in reversed(rows)]
+        if texts:
+            history[name_key(name)] = texts
+    return history
+
+def _vectors(task_analysis, user_data, history=None, index=None):
+    index = index or get_index()
+    history = history or {}
+    tasks = index.embed([task_text(t) for t in task_analysis])
+    members = index.embed([member_text(m, history.get(name_key(m.get('Name') or ''), ()))
+                           for m in user_data])
+    return tasks, members
+
+def similarity(task_analysis, user_data, history=None, index=None):
+    """Cosine similarity of every task to every member (tasks x members)"""
+    tasks, members = _vectors(task_analysis, user_data, history, index)
+    return tasks @ members.T
+
+def top_k(queries, keys, k, batch=QUERY_BATCH):
+    """(indexes, scores) of the k keys nearest to each query row, best first.
+
+    Queries are scored QUERY_BATCH rows at a time, so memory stays bounded by
+    batch x keys whatever the number of tasks.
+    """
+    import numpy as np
+    k = min(k, keys.shape[0])
+    indexes = np.zeros((queries.shape[0], k), dtype=np.intp)
+    scores = np.zeros((queries.shape[0], k), dtype=np.float32)
+    if k == 0:
+        return indexes, scores
+    for start in range(0, queries.shape[0], batch):
+        block = queries[start:start + batch] @ keys.T
+        candidates = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(block, candidates, axis=1)
+        # Ties go to the lower member index, as in SuitabilityMatrix.top_k
+        order = np.lexsort((candidates, -candidate_scores), axis=1)
+        indexes[start:start + batch] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:start + batch] = np.take_along_axis(candidate_scores, order, axis=1)
+    return indexes, scores
+
+def nearest_members(task_analysis, user_data, k=5, history=None, index=None):
+    """Top-k member shortlist per task as {taskId: [{"userId", "userName", "score"}]}"""
+    tasks, members = _vectors(task_analysis, user_data, history, index)
+    indexes, scores = top_k(tasks, members, k)
+    shortlist = {}
+    for i, (task, row, row_scores) in enumerate(zip(task_analysis, indexes, scores)):
+        task_id = task.get('taskId') or f"TASK{i + 1:02d}"
+        shortlist[task_id] = [
+            {"userId": str(user_data[m].get('Id', '')), "userName": user_data[m].get('Name', ''),
+             "score": round(float(s), 4)}
+            for m, s in zip(row, row_scores)
+        ]
+    return shortlist
+
+def main():
+    parser = argparse.ArgumentParser(description="Shortlist the nearest members for each analyzed task")
+    parser.add_argument('tasks', help="an ai_integration result or a taskAnalysis list")
+    parser.add_argument('users', help="output_user.json style member list")
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--history', help="earlier result whose assignments extend the member profiles")
+    parser.add_argument('--path', help="index directory (AI_EMBEDDING_PATH)")
+    args = parser.parse_args()
+
+    with open(args.tasks, 'r', encoding='utf-8') as f:
+        task_analysis = json.load(f)
+    if isinstance(task_analysis, dict):
+        task_analysis = task_analysis.get('taskAnalysis', [])
+    with open(args.users, 'r', encoding='utf-8') as f:
+        user_data = json.load(f)
+    history = None
+    if args.history:
+        with open(args.history, 'r', encoding='utf-8') as f:
+            history = member_history(json.load(f))
+
+    index = get_index(args.path)
+    shortlist = nearest_members(task_analysis, user_data, args.k, history, index)
+    print(json.dumps(shortlist, ensure_ascii=False, indent=2))
+    print(f"{index.embedder.name}: {len(index)} vectors, {index.hits} reused, {index.misses} embedded",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Incremental Task Analysis
+Fingerprints each task (step + name + description) and keeps its previous analysis in
+the shared local store (ai_store.py), so only new or changed tasks are sent to the model.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from ai_store import connect, store_path
+
+# SQLite's default limit on bound parameters is 999
+QUERY_CHUNK = 500
+
+# Fields of a task analysis row that are reused across runs
+ANALYSIS_FIELDS = ('type', 'difficulty', 'skills', 'workload', 'priority')
+
+_task_id_re = re.compile(r'^TASK(\d+)$', re.IGNORECASE)
+_whitespace_re = re.compile(r'\s+')
+
+def _normalize(text):
+    return _whitespace_re.sub(' ', str(text or '')).strip().lower()
+
+def task_fingerprint(name, description='', step=''):
+    """Stable fingerprint of a task's name and description within its step"""
+    text = f"{_normalize(step)}\n{_normalize(name)}\n{_normalize(description)}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:20]
+
+def _task_entry(item, step=None):
+    if isinstance(item, str):
+        name, description, task_id = item, '', None
+    else:
+        # Exports from other trackers capitalize their columns ("Title", "Summary")
+        fields = {str(k).strip().lower(): v for k, v in item.items()}
+        name = fields.get('name') or fields.get('taskname') or fields.get('title') or fields.get('summary') or ''
+        description = fields.get('description') or ''
+        task_id = fields.get('taskid') or fields.get('task id')
+    return {"taskId": task_id, "name": str(name).strip(), "description": str(description).strip(), "step": step}
+
+def task_entries(items):
+    """Task entries of a stream of items: task strings or objects, or {"step", "tasks"} groups"""
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get('tasks'), list):
+            for task in item['tasks']:
+                yield _task_entry(task, item.get('step'))
+        else:
+            yield _task_entry(item)
+
+def split_tasks(task_input):
+    """Split a task file into individual tasks.
+
+    Understands the JSON layouts produced by the NestJS service and lam_phim.json
+    (a list of {"step", "tasks"} groups, or a flat list of tasks as strings or
+    objects) and falls back to one task per non-empty line for plain text. An
+    iterable of items (ai_loader.py) is consumed as it is read.
+    """
+    if not isinstance(task_input, (str, bytes)):
+        return [t for t in task_entries(task_input) if t['name']]
+
+    try:
+        data = json.loads(task_input)
+    except (TypeError, ValueError):
+        data = None
+
+    if isinstance(data, dict):
+        data = data.get('tasks', [data])
+    if isinstance(data, list):
+        return [t for t in task_entries(data) if t['name']]
+
+    return [_task_entry(line.strip()) for line in str(task_input).splitlines() if line.strip()]
+
+def fingerprint_tasks(tasks):
+    """Set each task entry's `fingerprint`; identical tasks in one step ("Tìm kiếm phim."
+    twice) are told apart by occurrence"""
+    seen = {}
+    for task in tasks:
+        fingerprint = task_fingerprint(task['name'], task['description'], task['step'])
+        seen[fingerprint] = seen.get(fingerprint, 0) + 1
+        task['fingerprint'] = fingerprint if seen[fingerprint] == 1 else f"{fingerprint}#{seen[fingerprint]}"
+    return tasks
+
+def format_tasks(tasks):
+    """Render tasks as prompt lines, each prefixed with its fixed Task ID"""
+    lines = []
+    for task in tasks:
+        line = f"{task['taskId']}: {task['name']}"
+        if task['description']:
+            line += f" - {task['description']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+class TaskAnalysisStore:
+    """Per-project task analysis rows keyed by task fingerprint"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.getenv('AI_TASK_STORE_PATH') or store_path())
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS task_analysis (
+                project TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (project, fingerprint)
+            );
+            CREATE INDEX IF NOT EXISTS task_analysis_fingerprint ON task_analysis (fingerprint, updated_at);
+        """)
+        self._conn.commit()
+
+    def load(self, project):
+        """Return {fingerprint: (task_id, analysis)} for a project"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT fingerprint, task_id, analysis FROM task_analysis WHERE project = ?', (project,)
+            ).fetchall()
+        return {fp: (task_id, json.loads(analysis)) for fp, task_id, analysis in rows}
+
+    def find(self, fingerprints):
+        """Return {fingerprint: analysis} of the latest row for each fingerprint in any project"""
+        found = {}
+        fingerprints = list(fingerprints)
+        with self._lock:
+            for start in range(0, len(fingerprints), QUERY_CHUNK):
+                chunk = fingerprints[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    'SELECT fingerprint, analysis FROM task_analysis WHERE fingerprint IN '
+                    f"({', '.join('?' * len(chunk))}) ORDER BY updated_at", chunk
+                ).fetchall()
+                # Later rows overwrite earlier ones, so the newest analysis wins
+                found.update(rows)
+        return {fp: json.loads(analysis) for fp, analysis in found.items()}
+
+    def save(self, project, rows):
+        """Upsert (fingerprint, task_id, name, analysis) rows for a project"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO task_analysis (project, fingerprint, task_id, name, analysis, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                [(project, fp, task_id, name, json.dumps(analysis, ensure_ascii=False), now)
+                 for fp, task_id, name, analysis in rows]
+            )
+            self._conn.commit()
+
+def assign_task_ids(tasks, known):
+    """Give every task a Task ID: its own, the one stored for its fingerprint, or the next free one.
+
+    IDs of tasks that disappeared are never handed out again, so TASKxx references
+    stay unambiguous across runs.
+    """
+    used = set()
+    highest = 0
+    for task_id, _ in known.values():
+        match = _task_id_re.match(task_id)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    for task in tasks:
+        match = _task_id_re.match(task['taskId'] or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+
+    for task in tasks:
+        if not task['taskId'] and task.get('fingerprint') in known:
+            stored_id = known[task['fingerprint']][0]
+            if stored_id not in used:
+                task['taskId'] = stored_id
+        if not task['taskId'] or task['taskId'] in used:
+            highest += 1
+            task['taskId'] = f"TASK{highest:02d}"
+        used.add(task['taskId'])
+    return tasks
+
+def tasks_by_position(task_analysis, tasks):
+    """{taskId: task entry} for rows analyzed from the verbatim task list, where the model
+    numbers the tasks TASK01, TASK02... in input order"""
+    matched = {}
+    for row in task_analysis:
+        task_id = str(row.get('taskId', ''))
+        match = _task_id_re.match(task_id)
+        if match and 0 < int(match.group(1)) <= len(tasks):
+            matched[task_id] = tasks[int(match.group(1)) - 1]
+    return matched
+
+def analyze_incremental(task_input, project, analyze, store=None, fingerprints=None, on_tasks=None):
+    """Analyze only new or changed tasks and merge them with the stored rows.
+
+    `analyze(tasks)` receives the tasks that need the model (each with a fixed
+    taskId) and returns their analysis dicts; tasks another project already has an
+    analysis for reuse it. Returns (task_analysis, stats) with rows in input order;
+    a `fingerprints` dict receives the fingerprint of every returned Task ID.
+    `on_tasks(tasks)` sees the project's full task list before anything is analyzed.
+    """
+    store = store or TaskAnalysisStore()
+    tasks = fingerprint_tasks(split_tasks(task_input))
+    if on_tasks:
+        on_tasks(tasks)
+
+    known = store.load(project)
+    assign_task_ids(tasks, known)
+
+    pending = [t for t in tasks if t['fingerprint'] not in known]
+    # The same task analyzed for another project is not sent to the model again
+    shared = store.find(t['fingerprint'] for t in pending) if pending else {}
+    pending = [t for t in pending if t['fingerprint'] not in shared]
+    fresh = {}
+    if pending:
+        by_id = {t['taskId'].upper(): t for t in pending}
+        for row in analyze(pending):
+            task = by_id.get(str(row.get('taskId', '')).upper())
+            if task is not None:
+                fresh[task['fingerprint']] = {k: row[k] for k in ANALYSIS_FIELDS if k in row}
+
+    task_analysis = []
+    rows = []
+    for task in tasks:
+        analysis = fresh.get(task['fingerprint']) or shared.get(task['fingerprint'])
+        if analysis is None and task['fingerprint'] in known:
+            analysis = known[task['fingerprint']][1]
+        if analysis is None:
+            continue
+        task_analysis.append({"taskId": task['taskId'], "taskName": task['name'], **analysis})
+        if fingerprints is not None:
+            fingerprints[task['taskId']] = task['fingerprint']
+        rows.append((task['fingerprint'], task['taskId'], task['name'], analysis))
+    # Re-saving reused rows keeps their stored Task ID in line with this run's
+    store.save(project, rows)
+
+    stats = {"tasks": len(tasks), "reused": len(tasks) - len(pending), "shared": len(shared),
+             "analyzed": len(fresh)}
+    return task_analysis, stats
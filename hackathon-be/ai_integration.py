@@ -7,343 +7,1018 @@ This script integrates with the existing model.py to provide AI-powered task ass
 import sys
 import json
 import os
+import argparse
+import io
+import socketserver
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import google.generativeai as genai
-import pandas as pd
-import re
 
 # Add the current directory to Python path to import model functions
 sys.path.append(str(Path(__file__).parent))
 
-def parse_markdown_table(markdown_text):
-    """Parse markdown table and return DataFrame"""
-    tables = re.findall(r"((?:\|[^\n]*\|\n)+)", markdown_text)
-    for tbl in tables:
-        lines = [line for line in tbl[0].split('\n') if line.strip().startswith('|')]
-        if len(lines) < 2:
-            continue
-        divider_idx = None
-        for idx, l in enumerate(lines):
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", l):
-                divider_idx = idx
-                break
-        if divider_idx is not None and divider_idx > 0:
-            header = [h.strip() for h in lines[divider_idx-1].strip("|").split("|")]
-            data_lines = lines[divider_idx+1:]
-        else:
-            header = [h.strip() for h in lines[0].strip("|").split("|")]
-            data_lines = lines[1:]
-        data = []
-        for row in data_lines:
-            cells = [c.strip() for c in row.strip("|").split("|")]
-            if len(cells) == len(header):
-                data.append(cells)
-        if data:
-            try:
-                df = pd.DataFrame(data, columns=header)
-                if df.columns.duplicated().any():
-                    continue
-                return df
-            except Exception:
-                continue
-    return None
-
-def extract_mapping_user_task(markdown_text):
-    """Extract user-task mapping from markdown text"""
-    def clean_member_name(name_str):
-        """Extract only the member name, removing role/experience info"""
-        if not name_str or name_str.strip() == "":
-            return ""
-
-        # Remove content in parentheses and brackets
-        cleaned = re.sub(r'[\(\[\{][^\)\]\}]*[\)\]\}]', '', name_str).strip()
-
-        # Remove common suffixes like "KN)", "năm)", etc.
-        cleaned = re.sub(r'\s*(KN|năm|years?)\s*\)?\s*$', '', cleaned, flags=re.IGNORECASE).strip()
-
-        # Split by common separators and take the first meaningful part
-        parts = re.split(r'[\-,|]', cleaned)
-        if parts:
-            first_part = parts[0].strip()
-
-            # Skip if empty after cleaning
-            if not first_part:
-                return ""
-
-            # If first part is just a single letter, it's likely the name
-            if len(first_part) == 1 and first_part.isalpha():
-                return first_part
-
-            # Skip obvious non-names
-            if first_part.lower() in ['kn', 'năm', 'years', 'kinh nghiệm'] or first_part.isdigit():
-                return ""
-
-            # Remove common role keywords but keep actual names
-            role_keywords = ['fresher', 'junior', 'senior', 'medium', 'developer', 'engineer', 'tester', 'qa']
-            words = first_part.split()
-
-            # If only one word and it's not a role keyword, keep it
-            if len(words) == 1 and not any(keyword in words[0].lower() for keyword in role_keywords):
-                return words[0]
-
-            # Filter out role keywords but keep meaningful words
-            filtered_words = []
-            for w in words:
-                if not any(keyword in w.lower() for keyword in role_keywords) and not w.isdigit():
-                    filtered_words.append(w)
-
-            result = ' '.join(filtered_words).strip()
-            return result if result else ""
-
-        return ""
-
-    tables = re.findall(r"((?:\|[^\n]*\|\n)+)", markdown_text)
-    for tbl in tables:
-        lines = [line for line in tbl.split('\n') if line.strip().startswith('|')]
-        if len(lines) < 2:
-            continue
-
-        # Find header row (skip separator rows)
-        header_idx = 0
-        separator_idx = -1
-
-        for i, line in enumerate(lines):
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", line):
-                separator_idx = i
-                if i > 0:
-                    header_idx = i - 1
-                break
+from ai_batch import atomic_write_json, build_summary, format_summary, load_jobs, run_jobs
+from ai_backends import BACKENDS, create_backend, resolve_backend
+from ai_cache import CachedModel, ResponseCache, cache_enabled
+from ai_incremental import (TaskAnalysisStore, analyze_incremental, assign_task_ids, fingerprint_tasks, format_tasks,
+                            split_tasks, tasks_by_position)
+from ai_chunked import DEFAULT_CHUNK_SIZE, analyze_in_chunks
+from ai_embeddings import embeddings_enabled, stored_history
+from ai_loader import load_members, read_task_input
+import ai_metrics
+from ai_metrics import InstrumentedModel, JobTrace, add_time, current_trace, export, process_age, profiled, span
+from ai_names import MemberIndex
+import ai_parallel
+from ai_parallel import parallel_map, parse_and_validate, process_count
+from ai_pipeline import PIPELINE_BATCH, AssignmentPipeline, WorkloadBalance, pipeline_enabled
+from ai_prompts import compact_members, compact_tasks, prompt_format
+from ai_protocol import FRAMINGS, encode_frame, read_document
+from ai_reassign import previous_plan, reassign
+from ai_results import ResultStore, result_store_enabled
+from ai_scheduler import ScheduledModel, Scheduler, budget_share, merge_stats
+from ai_schemas import (MAPPING_SCHEMA, TASK_ANALYSIS_SCHEMA, json_generation_config,
+                        structured_output_enabled, validate_mapping_row, validate_task_row)
+from ai_stream import JsonArrayParser, chunk_text, parse_json_objects
 
-        if separator_idx == -1:
-            # No separator found, assume first line is header
-            header_idx = 0
-            data_start_idx = 1
-        else:
-            data_start_idx = separator_idx + 1
+MODEL_NAME = 'gemini-1.5-flash'
 
-        header = [h.strip().lower() for h in lines[header_idx].strip("|").split("|")]
+# "llm" asks Gemini to assign the analyzed tasks, "local" uses the deterministic solver
+ASSIGNERS = ('llm', 'local')
 
-        # Find Task ID and User columns
-        idx_task = None
-        idx_user = None
+# Rounds of repair prompts for response items that fail schema validation
+REPAIR_ROUNDS = int(os.getenv('AI_REPAIR_ROUNDS', 1))
 
-        for i, h in enumerate(header):
-            if 'task' in h and 'id' in h:
-                idx_task = i
-            elif any(kw in h for kw in ['thành viên', 'user', 'người phụ trách', 'tên']) and 'tên' in h:
-                idx_user = i
+# Configured models are kept per (backend, API key) so a long-lived worker only pays
+# for genai.configure() once; each Gemini model holds the client of its own key, so
+# jobs with different `apiKey`s never run under another job's key
+_models = {}
+_models_lock = threading.Lock()
+_response_cache = None
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_task_store = None
+_task_store_lock = threading.Lock()
+_result_store = None
+_result_store_lock = threading.Lock()
 
-        if idx_task is None or idx_user is None:
-            continue
+def resolve_api_key(api_key=None):
+    """Return the API key from the parameter first, then the GEMINI_API_KEY environment variable"""
+    return api_key or os.getenv('GEMINI_API_KEY')
 
-        # Extract data rows
-        mapping = []
-        for i in range(data_start_idx, len(lines)):
-            row = lines[i]
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", row):
-                continue  # Skip any additional separator rows
+def get_response_cache():
+    """Process-wide response cache, or None when disabled with AI_CACHE=off"""
+    global _response_cache
+    if _response_cache is None and cache_enabled():
+        _response_cache = ResponseCache()
+    return _response_cache
 
-            cells = [c.strip() for c in row.strip("|").split("|")]
-            if len(cells) <= max(idx_task, idx_user):
-                continue
+def get_task_store():
+    """Process-wide store of per-task analysis rows used by incremental mode"""
+    global _task_store
+    with _task_store_lock:
+        if _task_store is None:
+            _task_store = TaskAnalysisStore()
+        return _task_store
 
-            task_id = cells[idx_task].strip()
-            user_cell = cells[idx_user].strip()
+def get_result_store():
+    """Process-wide result history, or None when disabled with AI_RESULT_STORE=off"""
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None and result_store_enabled():
+            _result_store = ResultStore()
+        return _result_store
 
-            if not task_id or not user_cell:  # Skip empty cells
-                continue
+def load_member_history(user_data):
+    """Members' past tasks from the result history for the local solver, or None when
+    AI_EMBEDDINGS is off (the only scoring that reads them) or the history is disabled"""
+    store = get_result_store()
+    if store is None or not embeddings_enabled():
+        return None
+    return stored_history(store, user_data)
 
-            # Split multiple users
-            users = re.split(r'[;,/]', user_cell)
-            for u in users:
-                u = u.strip()
-                if u:
-                    # Clean the member name
-                    name_only = clean_member_name(u)
-                    if name_only and len(name_only) >= 1 and name_only.isalpha():  # Only accept alphabetic names
-                        mapping.append([task_id, name_only])
+def load_previous(previous, project=None, completed=None, pinned=None):
+    """The plan to re-assign from: an earlier result or its path, or 'latest' for the
+    project's last stored result (ai_results.py)"""
+    if previous == 'latest':
+        store = get_result_store()
+        previous = store.latest_result(project) if store else None
+        if previous is None:
+            raise ValueError(f"No stored result for project {project}")
+    return previous_plan(previous, completed, pinned)
 
-        if mapping:
-            df_map = pd.DataFrame(mapping, columns=["Task ID", "Thành viên (tên)"])
-            return df_map
+def get_scheduler():
+    """Process-wide LLM call scheduler (rate limits, retries, coalescing) shared by every model"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
 
-    return None
+def configure_scheduler(**options):
+    """Replace the scheduler for models created afterwards, e.g. requests_per_minute=60"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = Scheduler(**options)
+        return _scheduler
 
-def run_ai_analysis(task_file_path, user_file_path, output_path, api_key=None):
-    """Run AI analysis using Gemini API"""
-    try:
-        # Read input files
-        with open(task_file_path, 'r', encoding='utf-8') as f:
-            task_input = f.read()
+def get_model(api_key, backend=None):
+    """Return the model for a backend (gemini, stub, replay) and API key, creating it on first use.
 
-        with open(user_file_path, 'r', encoding='utf-8') as f:
-            user_data = json.load(f)
+    Every backend's calls go through the shared scheduler. Only Gemini responses go
+    through the response cache (in front of the scheduler, so hits cost no budget);
+    the offline backends are meant for load tests, which should see every call.
+    """
+    backend = resolve_backend(backend)
+    with _models_lock:
+        model = _models.get((backend, api_key))
+        if model is None:
+            model = create_backend(backend, api_key, MODEL_NAME)
+            model = ScheduledModel(model, get_scheduler())
+            cache = get_response_cache() if backend == 'gemini' else None
+            if cache is not None:
+                model = CachedModel(model, MODEL_NAME, cache)
+            _models[(backend, api_key)] = model
+        return model
 
-        # Configure Gemini API - try API key from parameter first, then environment variable
-        if api_key:
-            genai.configure(api_key=api_key)
-        else:
-            # Try to get API key from environment variable
-            env_api_key = os.getenv('GEMINI_API_KEY')
-            if env_api_key:
-                genai.configure(api_key=env_api_key)
-            else:
-                print("Warning: No API key provided. Using mock data for demonstration.")
-                # Return mock data if no API key
-                mock_result = {
-                    "taskAnalysis": [
-                        {"taskId": "TASK01", "type": "Medium", "difficulty": "Medium", "skills": ["Frontend", "React"], "workload": "Medium"},
-                        {"taskId": "TASK02", "type": "High", "difficulty": "High", "skills": ["Backend", "API"], "workload": "Large"}
-                    ],
-                    "taskAssignment": [
-                        {"taskId": "TASK01", "userId": "1", "userName": "John Doe", "assigned": True},
-                        {"taskId": "TASK02", "userId": "2", "userName": "Jane Smith", "assigned": True}
-                    ],
-                    "userTaskMapping": [
-                        {"Task ID": "TASK01", "Thành viên (tên)": "John Doe"},
-                        {"Task ID": "TASK02", "Thành viên (tên)": "Jane Smith"}
-                    ]
-                }
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(mock_result, f, ensure_ascii=False, indent=2)
-                return mock_result
-
-        model = genai.GenerativeModel('gemini-1.5-flash')
-
-        # Create prompts for task analysis and assignment
-        task_analysis_prompt = f"""
-        Bạn là AI trợ lý quản lý dự án phần mềm chuyên nghiệp.
-        Nhiệm vụ của bạn là phân tích và phân loại các task đầu vào.
-
-        Dưới đây là danh sách các task:
-        {task_input}
-
-        Với từng task, hãy:
-        1. Tạo Task ID duy nhất (TASK01, TASK02...)
-        2. Xác định Loại task: Low, Medium, High, Urgent
-        3. Phân tích Độ khó
-        4. Xác định Kỹ năng chính cần thiết
-        5. Ước lượng khối lượng công việc: Small, Medium, Large
-
-        Trả về kết quả dưới dạng JSON array với format:
-        [
-          {{
-            "taskId": "TASK01",
-            "type": "Medium",
-            "difficulty": "Medium",
-            "skills": ["Frontend", "React"],
-            "workload": "Medium"
-          }}
+def build_mock_result():
+    """Mock data returned when no API key is configured; `mock` keeps it out of the result history"""
+    return {
+        "mock": True,
+        "taskAnalysis": [
+            {"taskId": "TASK01", "type": "Medium", "difficulty": "Medium", "skills": ["Frontend", "React"], "workload": "Medium"},
+            {"taskId": "TASK02", "type": "High", "difficulty": "High", "skills": ["Backend", "API"], "workload": "Large"}
+        ],
+        "taskAssignment": [
+            {"taskId": "TASK01", "userId": "1", "userName": "John Doe", "assigned": True},
+            {"taskId": "TASK02", "userId": "2", "userName": "Jane Smith", "assigned": True}
+        ],
+        "userTaskMapping": [
+            {"Task ID": "TASK01", "Thành viên (tên)": "John Doe"},
+            {"Task ID": "TASK02", "Thành viên (tên)": "Jane Smith"}
         ]
-        """
+    }
 
-        # Get task analysis
-        task_analysis_response = model.generate_content(task_analysis_prompt)
-        task_analysis_text = task_analysis_response.text
+def build_error_result(error):
+    """Empty result carrying an error message"""
+    return {
+        "taskAnalysis": [],
+        "taskAssignment": [],
+        "userTaskMapping": [],
+        "error": str(error)
+    }
 
-        # Extract JSON from response
-        task_analysis_match = re.search(r'\[.*\]', task_analysis_text, re.DOTALL)
-        if task_analysis_match:
-            task_analysis = json.loads(task_analysis_match.group())
-        else:
-            task_analysis = []
-
-        # Create user assignment prompt
-        user_assignment_prompt = f"""
-        Bạn là AI trợ lý quản lý dự án phần mềm chuyên nghiệp.
-        Nhiệm vụ của bạn là phân công task cho các thành viên dựa trên kỹ năng và kinh nghiệm.
-
-        Danh sách task đã phân tích:
-        {json.dumps(task_analysis, ensure_ascii=False, indent=2)}
-
-        Danh sách thành viên:
-        {json.dumps(user_data, ensure_ascii=False, indent=2)}
-
-        Hãy phân công task cho thành viên phù hợp nhất dựa trên:
-        1. Kỹ năng phù hợp với yêu cầu task
-        2. Kinh nghiệm và khả năng
-        3. Khối lượng công việc hiện tại
-        4. Độ khó của task
-
-        Trả về kết quả dưới dạng JSON array với format:
-        [
-          {{
-            "taskId": "TASK01",
-            "MemberName": "Tên thành viên"
-          }}
-        ]
-        """
+def write_result(result, output_path):
+    """Write a result dict to the output file (atomically, readers never see a partial file)"""
+    atomic_write_json(result, output_path)
+
+def build_task_analysis_prompt(task_input, fixed_ids=False):
+    """Prompt asking the model to classify tasks as a JSON array"""
+    id_instruction = ("Giữ nguyên Task ID đã cho ở đầu mỗi dòng" if fixed_ids
+                      else "Tạo Task ID duy nhất (TASK01, TASK02...)")
+    return f"""
+    Bạn là AI trợ lý quản lý dự án phần mềm chuyên nghiệp.
+    Nhiệm vụ của bạn là phân tích và phân loại các task đầu vào.
+
+    Dưới đây là danh sách các task:
+    {task_input}
+
+    Với từng task, hãy:
+    1. {id_instruction}
+    2. Xác định Loại task: Low, Medium, High, Urgent
+    3. Phân tích Độ khó
+    4. Xác định Kỹ năng chính cần thiết
+    5. Ước lượng khối lượng công việc: Small, Medium, Large
+    6. Xác định Mức độ ưu tiên từ 1-5 (5 là ưu tiên nhất)
+
+    Trả về kết quả dưới dạng JSON array với format:
+    [
+      {{
+        "taskId": "TASK01",
+        "type": "Medium",
+        "difficulty": "Medium",
+        "skills": ["Frontend", "React"],
+        "workload": "Medium",
+        "priority": 3
+      }}
+    ]
+    """
+
+def json_request_options(schema=None):
+    """generate_content options asking for schema-constrained JSON (unless AI_STRUCTURED_OUTPUT=off)"""
+    if schema is not None and structured_output_enabled():
+        return {'generation_config': json_generation_config(schema)}
+    return {}
+
+def generate_json_items(model, prompt, on_item=None, schema=None):
+    """Ask the model for a JSON array and return its objects.
+
+    With `schema` the request asks for schema-constrained JSON output (unless
+    AI_STRUCTURED_OUTPUT=off). With `on_item`, the response is streamed and each
+    object is handed over as soon as it is complete. Either way a truncated array
+    still yields the objects closed before the cut; a stream that breaks after some
+    objects keeps them.
+    """
+    kwargs = json_request_options(schema)
+    if on_item is None:
+        text = model.generate_content(prompt, **kwargs).text
+        started = time.perf_counter()
+        items = parse_json_objects(text)
+        add_time('json_extract', time.perf_counter() - started)
+        return items
+
+    parser = JsonArrayParser()
+    items = []
+    parsing = 0.0
+    try:
+        for chunk in model.generate_content(prompt, stream=True, **kwargs):
+            started = time.perf_counter()
+            parsed = parser.feed(chunk_text(chunk))
+            parsing += time.perf_counter() - started
+            for item in parsed:
+                items.append(item)
+                on_item(item)
+            if parser.finished:
+                break
+    except Exception as e:
+        if not items:
+            raise
+        print(f"Response stream interrupted after {len(items)} items: {e}", file=sys.stderr)
+    add_time('json_extract', parsing)
+    return items
+
+class ValidatedItems:
+    """Valid rows of one response stage, deduplicated by key(row).
+
+    Each item is validated as it arrives; new valid rows go to `on_item` right away
+    and invalid ones are kept with their errors for a repair prompt. Items are
+    checked by validator(context), which a large response also sends to worker
+    processes (ai_parallel.py) along with slices of its text.
+    """
+
+    def __init__(self, validator, context, key, on_item=None):
+        self.validator = validator
+        self.context = context
+        self.validate = validator(context)
+        self.key = key
+        self.on_item = on_item
+        self.rows = []
+        self.invalid = []
+        self.dropped = []
+        self._keys = set()
+
+    def add(self, item):
+        self._accept(item, *self.validate(item))
+
+    def _accept(self, item, row, errors):
+        if row is None:
+            self.invalid.append((item, errors))
+            return
+        key = self.key(row)
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self.rows.append(row)
+        if self.on_item:
+            self.on_item(row)
+
+    def request(self, model, prompt, schema, stream=False):
+        """Ask the model and validate every item of the response"""
+        if stream:
+            generate_json_items(model, prompt, self.add, schema)
+            return
+        text = model.generate_content(prompt, **json_request_options(schema)).text
+        started = time.perf_counter()
+        results = parse_and_validate(text, self.validator, self.context)
+        if results is None:
+            items = parse_json_objects(text)
+            results = ((item, *self.validate(item)) for item in items)
+        add_time('json_extract', time.perf_counter() - started)
+        for item, row, errors in results:
+            self._accept(item, row, errors)
+
+    def take_invalid(self, repairable=lambda item: True):
+        """Invalid items worth a repair prompt; the others are recorded as dropped"""
+        invalid, self.invalid = self.invalid, []
+        self.dropped.extend(entry for entry in invalid if not repairable(entry[0]))
+        return [entry for entry in invalid if repairable(entry[0])]
+
+    def report(self, stage):
+        dropped = self.dropped + self.invalid
+        if dropped:
+            print(f"Dropped {len(dropped)} invalid {stage} items: "
+                  f"{'; '.join(', '.join(errors) for _, errors in dropped[:5])}", file=sys.stderr)
+
+def build_repair_prompt(invalid, example):
+    """Prompt asking the model to fix only the listed items"""
+    items = json.dumps([{"item": item, "errors": errors} for item, errors in invalid], ensure_ascii=False)
+    return f"""
+    Các object JSON dưới đây (kèm danh sách lỗi) không đúng format yêu cầu:
+    {items}
+
+    Hãy sửa lại từng object cho đúng format, giữ nguyên taskId và các giá trị đã hợp lệ.
+    Trả về kết quả dưới dạng JSON array các object đã sửa với format:
+    [
+      {json.dumps(example, ensure_ascii=False)}
+    ]
+    """
+
+TASK_ANALYSIS_EXAMPLE = {"taskId": "TASK01", "type": "Medium", "difficulty": "Medium",
+                         "skills": ["Frontend", "React"], "workload": "Medium", "priority": 3}
+
+def run_task_analysis(model, task_input, fixed_ids=False, on_item=None):
+    """Ask the model to analyze tasks and return the validated rows.
+
+    Rows that fail validation are sent back in a small repair prompt (up to
+    AI_REPAIR_ROUNDS times) instead of re-asking for the whole list.
+    """
+    rows = ValidatedItems(task_row_validator, None, lambda row: row['taskId'].upper(), on_item)
+    rows.request(model, build_task_analysis_prompt(task_input, fixed_ids), TASK_ANALYSIS_SCHEMA, on_item is not None)
+    # An item without its taskId can't be matched back to a task, so it isn't repaired
+    has_id = lambda item: isinstance(item, dict) and bool(str(item.get('taskId') or '').strip())
+    for _ in range(REPAIR_ROUNDS):
+        invalid = rows.take_invalid(has_id)
+        if not invalid:
+            break
+        rows.request(model, build_repair_prompt(invalid, TASK_ANALYSIS_EXAMPLE), TASK_ANALYSIS_SCHEMA)
+        rows.dropped.extend(entry for entry in invalid
+                            if str(entry[0]['taskId']).strip().upper() not in rows._keys)
+    rows.report('task analysis')
+    return rows.rows
+
+def build_user_assignment_prompt(task_analysis, user_data, compact=None, balance=None):
+    """Prompt asking the model to assign analyzed tasks to members.
+
+    The task and member lists are sent as compact coded rows (ai_prompts.py) unless
+    compact is False or AI_PROMPT_FORMAT=json. With a `balance` (one batch of a
+    pipelined run) each member carries the workload already assigned to them and
+    the prompt states the project-wide cap.
+    """
+    if compact is None:
+        compact = prompt_format() == 'compact'
+    loads = [balance.member_load(m.get('Name')) for m in user_data] if balance is not None else None
+    cap_rule = (f"\n    5. Không ai nhận quá {balance.cap_units():g} đơn vị khối lượng tính cả phần đã nhận "
+                f"(40% tổng dự án; Small=1, Medium=2, Large=4)") if balance is not None else ''
+    if compact:
+        tasks_block = compact_tasks(task_analysis).replace('\n', '\n    ')
+        members_block = compact_members(user_data, loads).replace('\n', '\n    ')
+        load_note = ', load: khối lượng đã nhận ở các đợt phân công trước' if balance is not None else ''
+        return f"""
+    Bạn là AI trợ lý quản lý dự án phần mềm chuyên nghiệp.
+    Nhiệm vụ của bạn là phân công task cho các thành viên dựa trên kỹ năng và kinh nghiệm.
+    Dữ liệu bên dưới ở dạng bảng phân cách bằng "|", dòng đầu tiên là tên cột; các mã S1, D1, P1... được giải nghĩa ở dòng "Mã:".
+
+    Danh sách task đã phân tích (skills: kỹ năng cần có, priority: 1-5):
+    {tasks_block}
+
+    Danh sách thành viên (years: số năm kinh nghiệm{load_note}):
+    {members_block}
+
+    Hãy phân công task cho thành viên phù hợp nhất dựa trên:
+    1. Kỹ năng phù hợp với yêu cầu task
+    2. Kinh nghiệm và khả năng
+    3. Khối lượng công việc hiện tại
+    4. Độ khó của task{cap_rule}
+
+    Trả về kết quả dưới dạng JSON array với format (MemberName đúng như cột Name):
+    [
+      {{
+        "taskId": "TASK01",
+        "MemberName": "Tên thành viên"
+      }}
+    ]
+    """
+    members = user_data if loads is None else [{**m, "load": load} for m, load in zip(user_data, loads)]
+    load_note = ' (load: khối lượng đã nhận ở các đợt phân công trước)' if balance is not None else ''
+    return f"""
+    Bạn là AI trợ lý quản lý dự án phần mềm chuyên nghiệp.
+    Nhiệm vụ của bạn là phân công task cho các thành viên dựa trên kỹ năng và kinh nghiệm.
+
+    Danh sách task đã phân tích:
+    {json.dumps(task_analysis, ensure_ascii=False, indent=2)}
+
+    Danh sách thành viên{load_note}:
+    {json.dumps(members, ensure_ascii=False, indent=2)}
+
+    Hãy phân công task cho thành viên phù hợp nhất dựa trên:
+    1. Kỹ năng phù hợp với yêu cầu task
+    2. Kinh nghiệm và khả năng
+    3. Khối lượng công việc hiện tại
+    4. Độ khó của task{cap_rule}
+
+    Trả về kết quả dưới dạng JSON array với format:
+    [
+      {{
+        "taskId": "TASK01",
+        "MemberName": "Tên thành viên"
+      }}
+    ]
+    """
+
+def normalize_mapping(mapping):
+    """Convert old mapping keys to new keys if needed"""
+    if 'Task ID' in mapping:
+        mapping['taskId'] = mapping.pop('Task ID')
+    if 'Thành viên (tên)' in mapping:
+        mapping['MemberName'] = mapping.pop('Thành viên (tên)')
+    return mapping
+
+def task_row_validator(context=None):
+    return validate_task_row
+
+def mapping_row_validator(context):
+    """validate(item) for mapping items naming one of context["taskIds"] and one of context["members"]"""
+    task_ids = set(context['taskIds'])
+    members = MemberIndex(context['members'])
+    return lambda item: validate_mapping_row(normalize_mapping(dict(item)) if isinstance(item, dict) else item,
+                                             task_ids, members)
+
+def run_user_assignment(model, task_analysis, user_data, on_item=None, balance=None):
+    """Ask the model to assign tasks; returns (user_task_mapping, task_assignment).
+
+    Mapping items must name an analyzed task and a known member. Tasks left
+    without a valid mapping are re-asked on their own (up to AI_REPAIR_ROUNDS times).
+    With a `balance` the tasks are one batch of a pipelined run: the prompt carries
+    the loads of earlier batches and rows over the workload cap are dropped.
+    """
+    if balance is not None:
+        balance.add_tasks(task_analysis)
+    members = MemberIndex(user_data)
+    context = {"taskIds": sorted({str(t.get('taskId', '')).upper() for t in task_analysis}),
+               "members": user_data}
+    mappings = ValidatedItems(mapping_row_validator, context,
+                              lambda row: (row['taskId'].upper(), row['MemberName']), on_item)
+    mappings.request(model, build_user_assignment_prompt(task_analysis, user_data, balance=balance),
+                     MAPPING_SCHEMA, on_item is not None)
+    for _ in range(REPAIR_ROUNDS):
+        assigned = {row['taskId'].upper() for row in mappings.rows}
+        pending = [t for t in task_analysis if str(t.get('taskId', '')).upper() not in assigned]
+        if not pending:
+            break
+        mappings.take_invalid()
+        mappings.request(model, build_user_assignment_prompt(pending, user_data, balance=balance), MAPPING_SCHEMA)
+    mappings.report('mapping')
+    user_task_mapping = mappings.rows if balance is None else balance.admit(mappings.rows)
+
+    # Create task assignment details; names were resolved to member records by the validator
+    task_assignment = []
+    for mapping in user_task_mapping:
+        user_info = members.resolve(mapping['MemberName'])
+        task_assignment.append({
+            "taskId": mapping['taskId'],
+            "userId": user_info.get('Id', '') if user_info else '',
+            "userName": mapping['MemberName'],
+            "assigned": True
+        })
+
+    return user_task_mapping, task_assignment
+
+class ProgressEmitter:
+    """Forwards analysis and mapping rows to an on_progress(stage, item) callback.
+
+    Each task-analysis row is reported once, whether it was streamed from the model,
+    reused from the incremental store or recovered by a chunk retry.
+    """
+
+    def __init__(self, on_progress):
+        self.on_progress = on_progress
+        self._reported = set()
+        self._lock = threading.Lock()
+
+    def task(self, row):
+        task_id = str(row.get('taskId', '')).upper()
+        with self._lock:
+            if task_id in self._reported:
+                return
+            self._reported.add(task_id)
+        self.on_progress('taskAnalysis', row)
+
+    def mapping(self, mapping):
+        self.on_progress('userTaskMapping', mapping)
+
+def analyze_tasks(task_input, user_data, api_key=None, assigner='llm', project=None,
+                  chunk_size=None, concurrency=None, on_progress=None, backend=None, previous=None,
+                  fingerprints=None):
+    """Analyze tasks and assign them to users, returning the result dict.
+
+    `task_input` is the task file text or an iterable of task items (ai_loader.py).
+
+    With a project key, analysis is incremental: only tasks whose name/description
+    changed since the last run of that project are sent to the model. Task lists
+    longer than chunk_size are analyzed in concurrent chunks, and each chunk is
+    assigned as soon as it is analyzed (ai_pipeline.py, AI_PIPELINE=off to wait for
+    the whole analysis) against loads shared by all batches. `on_progress(stage, item)`
+    streams the responses and receives every analysis and mapping row as it completes.
+    `backend` picks the LLM backend (default AI_BACKEND, then gemini); only Gemini
+    needs an API key. With a `previous` plan (ai_reassign.previous_plan) the last
+    run's assignments are kept and only the changes are solved locally; the Task IDs
+    only line up across runs in incremental mode or when the tasks carry their own.
+    A `fingerprints` dict receives each analyzed Task ID's task fingerprint
+    (ai_incremental.py), which the result history is indexed by.
+    """
+    api_key = resolve_api_key(api_key)
+    backend = resolve_backend(backend)
+    if backend == 'gemini' and not api_key:
+        print("Warning: No API key provided. Using mock data for demonstration.", file=sys.stderr)
+        result = build_mock_result()
+        if on_progress:
+            for row in result['taskAnalysis']:
+                on_progress('taskAnalysis', row)
+            for mapping in result['userTaskMapping']:
+                on_progress('userTaskMapping', mapping)
+        return result
+
+    model = get_model(api_key, backend)
+    trace = current_trace()
+    if trace:
+        model = InstrumentedModel(model, trace)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    progress = ProgressEmitter(on_progress) if on_progress else None
+    on_task = progress.task if progress else None
+    on_mapping = progress.mapping if progress else None
+
+    def assign(task_analysis, balance=None):
+        with span('assignment.batch', trace, tasks=len(task_analysis)):
+            if assigner == 'local':
+                # The NumPy solver is only loaded when it is used
+                from ai_assigner import assign_tasks
+                return assign_tasks(task_analysis, user_data, balance, history)
+            return run_user_assignment(model, task_analysis, user_data, balance=balance)
+
+    # Read once per job, before any batch runs, from the runs stored so far
+    history = load_member_history(user_data) if assigner == 'local' or previous is not None else None
+    tasks = None if project else fingerprint_tasks(split_tasks(task_input))
+    # Small inputs go to the model verbatim in one call, so there is nothing to overlap;
+    # streamed items have no text to send verbatim, so they always get fixed IDs
+    chunked = bool(project) or len(tasks) > chunk_size or not isinstance(task_input, str)
+    pipeline = balance = None
+    if previous is not None and not project:
+        print("Warning: re-assignment without --project; Task IDs may not match the previous run",
+              file=sys.stderr)
+    if chunked and pipeline_enabled() and previous is None:
+        # With --project the task count is known once analyze_incremental has read the input
+        balance = WorkloadBalance(user_data, len(tasks) if tasks is not None else None)
+        pipeline = AssignmentPipeline(lambda batch: assign(batch, balance), PIPELINE_BATCH or chunk_size,
+                                      on_mapping)
+
+    def analyze_chunk(chunk):
+        # Chunk threads record into the job's trace too
+        with span('analysis.chunk', trace, tasks=len(chunk)):
+            rows = run_task_analysis(model, format_tasks(chunk), fixed_ids=True, on_item=on_task)
+        if pipeline:
+            # Hand the chunk's rows to the assignment stage while later chunks are analyzed
+            wanted = {t['taskId'].upper() for t in chunk}
+            pipeline.add([row for row in rows if row['taskId'].upper() in wanted])
+        return rows
+
+    def analyze_fixed_ids(tasks):
+        return analyze_in_chunks(tasks, analyze_chunk, chunk_size, concurrency)
+
+    def expect_tasks(tasks):
+        if balance is not None:
+            balance.expected_tasks = len(tasks)
+
+    try:
+        # Get task analysis
+        with span('analysis'):
+            if project:
+                task_analysis, _ = analyze_incremental(task_input, project, analyze_fixed_ids, get_task_store(),
+                                                       fingerprints, on_tasks=expect_tasks)
+            else:
+                if chunked:
+                    assign_task_ids(tasks, {})
+                    by_id = {t['taskId']: t for t in tasks}
+                    task_analysis = analyze_fixed_ids(tasks)
+                else:
+                    task_analysis = run_task_analysis(model, task_input, on_item=on_task)
+                    by_id = tasks_by_position(task_analysis, tasks)
+                task_analysis = [{**row, "taskName": by_id[row['taskId']]['name']} if row['taskId'] in by_id
+                                 else row for row in task_analysis]
+                if fingerprints is not None:
+                    fingerprints.update((row['taskId'], by_id[row['taskId']]['fingerprint'])
+                                        for row in task_analysis if row['taskId'] in by_id)
+        if progress:
+            # Rows that never went through the model (incremental reuse)
+            for row in task_analysis:
+                progress.task(row)
 
         # Get user assignment
-        user_assignment_response = model.generate_content(user_assignment_prompt)
-        user_assignment_text = user_assignment_response.text
-
-        # Extract JSON from response
-        user_assignment_match = re.search(r'\[.*\]', user_assignment_text, re.DOTALL)
-        if user_assignment_match:
-            user_task_mapping = json.loads(user_assignment_match.group())
-            # Convert old keys to new keys if needed
-            for mapping in user_task_mapping:
-                if 'Task ID' in mapping:
-                    mapping['taskId'] = mapping.pop('Task ID')
-                if 'Thành viên (tên)' in mapping:
-                    mapping['MemberName'] = mapping.pop('Thành viên (tên)')
-        else:
-            user_task_mapping = []
-
-        # Create task assignment details
-        task_assignment = []
-        for mapping in user_task_mapping:
-            task_id = mapping.get('taskId', '')
-            user_name = mapping.get('MemberName', '')
-
-            # Find user data
-            user_info = next((user for user in user_data if user.get('Name') == user_name), None)
-            user_id = user_info.get('Id', '') if user_info else ''
-
-            task_assignment.append({
-                "taskId": task_id,
-                "userId": user_id,
-                "userName": user_name,
-                "assigned": True
-            })
-
-        # Prepare final result
-        result = {
-            "taskAnalysis": task_analysis,
-            "taskAssignment": task_assignment,
-            "userTaskMapping": user_task_mapping
-        }
-
-        # Write result to output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with span('assignment'):
+            if pipeline:
+                # Rows reused by incremental mode and the last partial batch are assigned here
+                user_task_mapping, task_assignment = pipeline.finish(task_analysis)
+                balance.report()
+            elif previous is not None or assigner == 'local':
+                if previous is not None:
+                    user_task_mapping, task_assignment, stats = reassign(
+                        task_analysis, user_data, previous['userTaskMapping'], previous['completed'],
+                        previous['pinned'], history)
+                    print(f"Re-assignment: kept {stats['kept']}, added {stats['added']}, dropped "
+                          f"{stats['removedTask']} (removed tasks) + {stats['departed']} (departed members) + "
+                          f"{stats['overCap']} (over the cap) mapping rows", file=sys.stderr)
+                else:
+                    user_task_mapping, task_assignment = assign(task_analysis)
+                if progress:
+                    for mapping in user_task_mapping:
+                        progress.mapping(mapping)
+            else:
+                user_task_mapping, task_assignment = run_user_assignment(
+                    model, task_analysis, user_data, on_item=on_mapping
+                )
+    finally:
+        if pipeline:
+            pipeline.close()
+
+    # Prepare final result
+    return {
+        "taskAnalysis": task_analysis,
+        "taskAssignment": task_assignment,
+        "userTaskMapping": user_task_mapping
+    }
+
+def finish_job(trace, result, output_path=None, project=None, source=None, fingerprints=None):
+    """Attach the `metrics` block, write the output file, record the result in the
+    history store and export the job's spans.
+
+    The file gets the metrics as they stand before it is written; the returned
+    result also covers the write_output and store_result spans.
+    """
+    result['metrics'] = trace.summary()
+    if output_path:
+        with trace.span('write_output'):
+            write_result(result, output_path)
+    store = get_result_store()
+    if store is not None:
+        try:
+            with trace.span('store_result'):
+                store.save_run(result, project, source, fingerprints)
+        except sqlite3.Error as e:
+            print(f"Could not record the result: {e}", file=sys.stderr)
+    status = 'error' if result.get('error') else 'ok'
+    trace.finish(status=status)
+    result['metrics'] = trace.summary()
+    export(trace, status)
+    return result
+
+def run_ai_analysis(task_file_path, user_file_path, output_path, api_key=None, assigner='llm', project=None,
+                    chunk_size=None, concurrency=None, on_progress=None, backend=None, previous=None,
+                    trace=None):
+    """Run AI analysis using Gemini API"""
+    trace = trace or JobTrace('run_ai_analysis')
+    with trace.activate(), profiled('run_ai_analysis'):
+        try:
+            with span('read_input'):
+                # Large task files and CSV / NDJSON exports are streamed item by item
+                task_input = read_task_input(task_file_path)
+                user_data = load_members(user_file_path)
+
+            fingerprints = {}
+            result = analyze_tasks(task_input, user_data, api_key, assigner, project, chunk_size, concurrency,
+                                   on_progress, backend, previous, fingerprints)
+
+            # Write result to output file
+            return finish_job(trace, result, output_path, project, str(task_file_path), fingerprints)
+
+        except Exception as e:
+            print(f"Error in AI analysis: {str(e)}", file=sys.stderr)
+            # Return error result
+            return finish_job(trace, build_error_result(e), output_path, project, str(task_file_path))
 
+def run_job(job, api_key=None, assigner='llm', on_progress=None, backend=None):
+    """Run one worker job and return the result dict.
+
+    A job either carries its payload inline ("tasks" as text, "users" as a list or
+    JSON string) or points at files ("taskFile", "userFile"). "outputFile" is optional;
+    the result is always returned on the worker channel as well. "assigner" overrides
+    the worker's default assigner and "backend" its LLM backend, "project" turns on
+    incremental analysis and "chunkSize" / "concurrency" tune chunked analysis. "previous"
+    (an earlier result, or its path) with optional "completed" / "pinned" Task IDs
+    re-assigns incrementally. `on_progress` receives streamed rows for jobs that ask for "stream".
+    """
+    name = f"job-{job['id']}" if job.get('id') else 'job'
+    trace = JobTrace('run_job', **({"jobId": str(job['id'])} if job.get('id') else {}))
+    fingerprints = {}
+    with trace.activate(), profiled(name):
+        try:
+            with span('read_input'):
+                if 'tasks' in job:
+                    task_input = job['tasks']
+                else:
+                    task_input = read_task_input(job['taskFile'])
+
+                if 'users' in job:
+                    user_data = job['users']
+                    if isinstance(user_data, str):
+                        user_data = json.loads(user_data)
+                else:
+                    user_data = load_members(job['userFile'])
+
+                previous = (load_previous(job['previous'], job.get('project'), job.get('completed'),
+                                          job.get('pinned'))
+                            if job.get('previous') else None)
+
+            result = analyze_tasks(task_input, user_data, job.get('apiKey') or api_key,
+                                   job.get('assigner') or assigner, job.get('project'),
+                                   job.get('chunkSize'), job.get('concurrency'), on_progress,
+                                   job.get('backend') or backend, previous, fingerprints)
+        except Exception as e:
+            print(f"Error in AI analysis: {str(e)}", file=sys.stderr)
+            result = build_error_result(e)
+
+        return finish_job(trace, result, job.get('outputFile'), job.get('project'),
+                          str(job.get('id') or job.get('taskFile') or 'job'), fingerprints)
+
+def _run_batch_job(job, api_key=None, assigner='llm', backend=None):
+    return run_job({"taskFile": job['tasks'], "userFile": job['users'], "outputFile": job['output'],
+                    **{k: v for k, v in job.items() if k not in ('tasks', 'users', 'output')}},
+                   api_key, assigner, backend=backend)
+
+def _run_batch_share(share):
+    """Run one worker process's share of a batch (see run_batch); returns its report rows,
+    job metrics and LLM / cache counters"""
+    ai_metrics.configure_worker(share['settings'])
+    scheduler = configure_scheduler(**share['budget']) if share['budget'] else get_scheduler()
+    metrics = {}
+
+    def run_one(job):
+        result = _run_batch_job(job, share['apiKey'], share['assigner'], share['backend'])
+        metrics[job['id']] = (result.get('metrics'), 'error' if result.get('error') else 'ok')
         return result
 
-    except Exception as e:
-        print(f"Error in AI analysis: {str(e)}")
-        # Return error result
-        error_result = {
-            "taskAnalysis": [],
-            "taskAssignment": [],
-            "userTaskMapping": [],
-            "error": str(e)
-        }
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(error_result, f, ensure_ascii=False, indent=2)
-        return error_result
+    rows = run_jobs(share['jobs'], run_one, share['concurrency'])
+    cache = get_response_cache()
+    return {"rows": rows, "metrics": [metrics.get(row['id']) for row in rows], "llm": scheduler.stats(),
+            "cache": [cache.hits, cache.misses] if cache is not None else [0, 0]}
+
+def run_batch_processes(batch_jobs, workers, api_key=None, assigner='llm', backend=None, jobs=None,
+                        rate_limit=None, max_in_flight=None):
+    """Run a batch in `workers` processes; returns (report rows in job order, summary extras).
+
+    Jobs are dealt out round-robin; each process runs its share with up to `jobs`
+    jobs at a time and its share of the LLM budgets, and writes its outputs itself.
+    """
+    workers = min(workers, len(batch_jobs))
+    budget = budget_share(workers, requests_per_minute=rate_limit, max_in_flight=max_in_flight)
+    shares = [{"jobs": batch_jobs[i::workers], "apiKey": api_key, "assigner": assigner, "backend": backend,
+               "concurrency": jobs, "budget": budget, "settings": ai_metrics.worker_settings()}
+              for i in range(workers)]
+    parts = parallel_map(_run_batch_share, shares, workers)
+
+    rows = [None] * len(batch_jobs)
+    for i, part in enumerate(parts):
+        for j, (row, job_metrics) in enumerate(zip(part['rows'], part['metrics'])):
+            rows[i + j * workers] = row
+            if job_metrics and job_metrics[0]:
+                ai_metrics.record(*job_metrics)
+    extra = {"processes": workers, "llm": merge_stats([part['llm'] for part in parts])}
+    if resolve_backend(backend) == 'gemini' and get_response_cache() is not None:
+        extra["cache"] = {"sessionHits": sum(part['cache'][0] for part in parts),
+                          "sessionMisses": sum(part['cache'][1] for part in parts)}
+    return rows, extra
+
+def run_batch(source, output_dir=None, api_key=None, assigner='llm', backend=None, jobs=None,
+              rate_limit=None, max_in_flight=None, summary_path=None, processes=None):
+    """Run every job of a manifest or project directory and return the summary report.
+
+    All jobs share one model client and response cache; `jobs` bounds how many run
+    at once and `rate_limit` / `max_in_flight` bound the LLM calls across all of them.
+    With `processes` (AI_PROCESSES) above 1 the jobs are spread over that many worker
+    processes instead, each with its own client and a share of the budgets.
+    The summary is written next to the manifest (batch_summary.json) unless
+    summary_path is given.
+    """
+    batch_jobs = load_jobs(source, output_dir)
+    workers = process_count(processes)
+
+    started = time.perf_counter()
+    if workers > 1 and len(batch_jobs) > 1:
+        rows, extra = run_batch_processes(batch_jobs, workers, api_key, assigner, backend, jobs,
+                                          rate_limit, max_in_flight)
+    else:
+        scheduler = (configure_scheduler(requests_per_minute=rate_limit, max_in_flight=max_in_flight)
+                     if rate_limit or max_in_flight else get_scheduler())
+        rows = run_jobs(batch_jobs, lambda job: _run_batch_job(job, api_key, assigner, backend), jobs)
+        extra = {"llm": scheduler.stats()}
+        cache = get_response_cache()
+        if cache is not None and resolve_backend(backend) == 'gemini':
+            extra["cache"] = {"sessionHits": cache.hits, "sessionMisses": cache.misses}
+    summary = build_summary(rows, time.perf_counter() - started, extra)
+
+    if summary_path is None:
+        base = Path(source) if Path(source).is_dir() else Path(source).parent
+        summary_path = base / 'batch_summary.json'
+    atomic_write_json(summary, summary_path)
+    return summary
+
+class JobChannel:
+    """Newline-delimited JSON channel that dispatches jobs to a shared executor.
+
+    Each job gets one {"id", "result"} line; jobs with "stream": true also get
+    {"id", "progress": {"stage", "item"}} lines for every row before that. A
+    {"id", "stats": true} request is answered at once with the LLM scheduler's
+    metrics (queue depth, wait times, retries) as {"id", "stats"}.
+    """
+
+    def __init__(self, executor, api_key=None, assigner='llm', backend=None):
+        self.executor = executor
+        self.api_key = api_key
+        self.assigner = assigner
+        self.backend = backend
+
+    def process(self, reader, writer):
+        """Read jobs until EOF, writing one response line per job as it completes"""
+        write_lock = threading.Lock()
+        pending = []
+
+        def respond(response):
+            line = json.dumps(response, ensure_ascii=False) + '\n'
+            with write_lock:
+                writer.write(line)
+                writer.flush()
+
+        def execute(job_id, job):
+            on_progress = None
+            if job.get('stream'):
+                def on_progress(stage, item):
+                    respond({"id": job_id, "progress": {"stage": stage, "item": item}})
+            respond({"id": job_id, "result": run_job(job, self.api_key, self.assigner, on_progress, self.backend)})
+
+        for raw in reader:
+            if not raw.strip():
+                continue
+            try:
+                job = json.loads(raw)
+            except json.JSONDecodeError as e:
+                respond({"id": None, "result": build_error_result(f"Invalid job: {e}")})
+                continue
+            if job.get('stats'):
+                respond({"id": job.get('id'), "stats": get_scheduler().stats()})
+                continue
+            pending.append(self.executor.submit(execute, job.get('id'), job))
+
+        # Drain in-flight jobs before the channel is closed
+        for future in pending:
+            future.result()
+
+def serve(workers=4, socket_path=None, api_key=None, assigner='llm', backend=None):
+    """Run as a long-lived worker reading NDJSON jobs from stdin or a Unix socket"""
+    api_key = resolve_api_key(api_key)
+    backend = resolve_backend(backend)
+    if api_key or backend != 'gemini':
+        # Warm the model up front so the first job only pays for the LLM call
+        get_model(api_key, backend)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    channel = JobChannel(executor, api_key, assigner, backend)
+
+    if socket_path:
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                reader = io.TextIOWrapper(self.rfile, encoding='utf-8')
+                writer = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+                channel.process(reader, writer)
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+            print(f"AI worker listening on {socket_path}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            finally:
+                executor.shutdown(wait=True)
+                os.unlink(socket_path)
+        return
+
+    # stdout is the protocol channel, so anything printed elsewhere goes to stderr
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        reader = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        writer = io.TextIOWrapper(stdout.buffer, encoding='utf-8', write_through=True)
+        channel.process(reader, writer)
+    finally:
+        executor.shutdown(wait=True)
+        sys.stdout = stdout
+
+def run_stdin(framing='length', api_key=None, assigner='llm', backend=None, stream=False, defaults=None):
+    """Run the job read from stdin and write its records to stdout.
+
+    stdin holds one JSON object shaped like a worker job ("tasks", "users" and the
+    optional job fields), either raw or as a single length-prefixed frame. stdout
+    gets {"type": "progress"} records while streaming, then one {"type": "result"}.
+    """
+    stdout = sys.stdout.buffer
+    write_lock = threading.Lock()
+
+    def emit(record):
+        frame = encode_frame(record, framing)
+        with write_lock:
+            stdout.write(frame)
+            stdout.flush()
+
+    # stdout is the protocol channel, so anything printed elsewhere goes to stderr
+    sys.stdout = sys.stderr
+    try:
+        try:
+            job = read_document(sys.stdin.buffer)
+        except ValueError as e:
+            result = build_error_result(f"Invalid input: {e}")
+        else:
+            for key, value in (defaults or {}).items():
+                if value is not None:
+                    job.setdefault(key, value)
+            on_progress = None
+            if stream or job.get('stream'):
+                def on_progress(stage, item):
+                    emit({"type": "progress", "stage": stage, "item": item})
+            result = run_job(job, api_key, assigner, on_progress, backend)
+        emit({"type": "result", "result": result})
+        return result
+    finally:
+        sys.stdout = sys.__stdout__
 
 def main():
     """Main function to run the AI integration"""
-    if len(sys.argv) < 4:
-        print("Usage: python ai_integration.py <task_file> <user_file> <output_file> [api_key]")
+    # Interpreter start and imports, up to here
+    trace = JobTrace('run_ai_analysis')
+    startup = process_age()
+    if startup is not None:
+        trace.add_span('startup', trace.root['start'] - int(startup * 1e9), trace.root['start'])
+    parser = argparse.ArgumentParser(
+        usage="python ai_integration.py <task_file> <user_file> <output_file> [api_key] [--assigner llm|local] [--project KEY] [--previous RESULT [--completed IDS] [--pin IDS]] [--stream] [--backend gemini|stub|replay]\n"
+              "       python ai_integration.py --stdin [--framing length|ndjson] [--stream] [--api-key KEY] [--assigner llm|local] [--backend gemini|stub|replay] < job.json\n"
+              "       python ai_integration.py --serve [--socket PATH] [--workers N] [--api-key KEY] [--assigner llm|local] [--backend gemini|stub|replay]\n"
+              "       python ai_integration.py --batch MANIFEST|DIR [--output-dir DIR] [--jobs N] [--rate-limit RPM] [--max-in-flight N] [--processes N] [--summary PATH]"
+    )
+    parser.add_argument('task_file', nargs='?')
+    parser.add_argument('user_file', nargs='?')
+    parser.add_argument('output_file', nargs='?')
+    parser.add_argument('api_key', nargs='?')
+    parser.add_argument('--serve', action='store_true', help="run as a persistent NDJSON worker")
+    parser.add_argument('--stdin', action='store_true',
+                        help="read the job as one JSON document on stdin and write the result to stdout")
+    parser.add_argument('--framing', choices=FRAMINGS, default='length',
+                        help="stdout records in --stdin mode: length-prefixed frames (default) or NDJSON lines")
+    parser.add_argument('--socket', help="listen on a Unix socket instead of stdin/stdout")
+    parser.add_argument('--workers', type=int, default=4, help="jobs processed concurrently in serve mode")
+    parser.add_argument('--api-key', dest='api_key_option')
+    parser.add_argument('--assigner', choices=ASSIGNERS, default='llm',
+                        help="assign tasks with a second LLM call or the local solver")
+    parser.add_argument('--project', help="reuse stored per-task analysis for this project (incremental mode)")
+    parser.add_argument('--chunk-size', type=int, help="analyze task lists longer than this in chunks")
+    parser.add_argument('--concurrency', type=int, help="chunks analyzed in parallel")
+    parser.add_argument('--backend', choices=BACKENDS,
+                        help="LLM backend: gemini (default, AI_BACKEND), offline stub or replay of recorded responses")
+    parser.add_argument('--stream', action='store_true',
+                        help="write NDJSON progress records for each analyzed task and mapping row to stdout")
+    parser.add_argument('--batch', metavar='MANIFEST|DIR',
+                        help="run many jobs from a JSON manifest or a directory of project folders")
+    parser.add_argument('--output-dir', help="batch outputs go here as <job id>.json")
+    parser.add_argument('--jobs', type=int, help="batch jobs run concurrently (default AI_BATCH_JOBS or 4)")
+    parser.add_argument('--rate-limit', type=float,
+                        help="LLM calls per minute across all batch jobs (AI_RATE_LIMIT)")
+    parser.add_argument('--max-in-flight', type=int, help="LLM calls running at once across all batch jobs")
+    parser.add_argument('--processes', type=int,
+                        help="worker processes for batch jobs and large responses (AI_PROCESSES, 0 = one per core)")
+    parser.add_argument('--summary', help="batch summary report path (default: batch_summary.json next to the manifest)")
+    parser.add_argument('--previous', metavar='RESULT',
+                        help="re-assign from this earlier output file (or 'latest' stored result of --project), "
+                             "keeping its assignments where possible")
+    parser.add_argument('--completed', help="with --previous: comma-separated Task IDs that are done")
+    parser.add_argument('--pin', help="with --previous: comma-separated Task IDs whose members must not change")
+    parser.add_argument('--trace-file', help="append each job's spans as OTLP/JSON lines to this file (AI_TRACE_FILE)")
+    parser.add_argument('--prom-file', help="keep Prometheus counters of finished jobs in this file (AI_PROM_FILE)")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="write cProfile and tracemalloc reports of each job to DIR (AI_PROFILE_DIR)")
+    args = parser.parse_args()
+    ai_metrics.configure(args.trace_file, args.prom_file, args.profile)
+    ai_parallel.configure(args.processes)
+
+    if args.serve:
+        serve(args.workers, args.socket, args.api_key_option, args.assigner, args.backend)
+        return
+
+    if args.stdin:
+        result = run_stdin(args.framing, args.api_key_option, args.assigner, args.backend, args.stream,
+                           {"project": args.project, "chunkSize": args.chunk_size,
+                            "concurrency": args.concurrency})
+        sys.exit(1 if result.get('error') else 0)
+
+    if args.batch:
+        summary = run_batch(args.batch, args.output_dir, args.api_key_option, args.assigner, args.backend,
+                            args.jobs, args.rate_limit, args.max_in_flight, args.summary, args.processes)
+        print(format_summary(summary))
+        sys.exit(1 if summary['failed'] else 0)
+
+    if not args.output_file:
+        parser.print_usage()
         sys.exit(1)
 
-    task_file = sys.argv[1]
-    user_file = sys.argv[2]
-    output_file = sys.argv[3]
-    api_key = sys.argv[4] if len(sys.argv) > 4 else None
+    task_file = args.task_file
+    user_file = args.user_file
+    output_file = args.output_file
+    api_key = args.api_key or args.api_key_option
 
     # Check if input files exist
     if not os.path.exists(task_file):
@@ -354,15 +1029,44 @@ def main():
         print(f"Error: User file {user_file} not found")
         sys.exit(1)
 
+    on_progress = None
+    status = sys.stdout
+    if args.stream:
+        # stdout carries NDJSON records only; status messages move to stderr
+        status = sys.stderr
+        write_lock = threading.Lock()
+
+        def emit(record):
+            line = json.dumps(record, ensure_ascii=False)
+            with write_lock:
+                print(line, flush=True)
+
+        def on_progress(stage, item):
+            emit({"type": "progress", "stage": stage, "item": item})
+
+    previous = None
+    if args.previous:
+        if args.previous != 'latest' and not os.path.exists(args.previous):
+            print(f"Error: Previous result {args.previous} not found")
+            sys.exit(1)
+        try:
+            previous = load_previous(args.previous, args.project, args.completed, args.pin)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
     # Run AI analysis
-    result = run_ai_analysis(task_file, user_file, output_file, api_key)
+    result = run_ai_analysis(task_file, user_file, output_file, api_key, args.assigner, args.project,
+                             args.chunk_size, args.concurrency, on_progress, args.backend, previous, trace)
+    if args.stream:
+        emit({"type": "result", "result": result})
 
     if result.get('error'):
-        print(f"AI analysis completed with error: {result['error']}")
+        print(f"AI analysis completed with error: {result['error']}", file=status)
         sys.exit(1)
     else:
-        print("AI analysis completed successfully")
-        print(f"Results saved to: {output_file}")
+        print("AI analysis completed successfully", file=status)
+        print(f"Results saved to: {output_file}", file=status)
 
 if __name__ == "__main__":
     main()
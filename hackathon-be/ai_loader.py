@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Streaming Task/Member Loader
+Reads task and member files as a stream of records: CSV row by row, NDJSON line
+by line, and JSON arrays element by element (including arrays under a "tasks" /
+"members" key), so a large backlog export never has to sit in memory as text or
+as a parsed document. Only one element and one read buffer are held at a time;
+analyze_tasks still keeps a compact entry per task and the member list.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from pathlib import Path
+
+READ_SIZE = 1 << 16
+# Task files smaller than this are still read whole, so short lists reach the
+# model verbatim (free-text structure included) as before
+STREAM_MIN_BYTES = int(os.getenv('AI_STREAM_MIN_BYTES', 1 << 20))
+
+TASK_KEYS = ('tasks',)
+MEMBER_KEYS = ('members', 'users')
+_NAME_COLUMNS = ('name', 'taskname', 'title', 'summary')
+
+_whitespace = ' \t\r\n'
+_delimiters = _whitespace + ',:]}'
+_nonblank_re = re.compile(r'[^ \t\r\n]')
+_decoder = json.JSONDecoder()
+
+def file_format(name):
+    """csv, ndjson, json or text, from a file name's extension"""
+    suffix = Path(str(name)).suffix.lower()
+    if suffix == '.csv':
+        return 'csv'
+    if suffix in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if suffix == '.json':
+        return 'json'
+    return 'text'
+
+class JsonStreamReader:
+    """Decodes JSON values one at a time from a text stream through a sliding buffer"""
+
+    def __init__(self, stream, read_size=READ_SIZE):
+        self.stream = stream
+        self.read_size = read_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        data = self.stream.read(size or self.read_size)
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """Next non-blank character, or '' at the end of the stream"""
+        while True:
+            match = _nonblank_re.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if self.eof:
+                return ''
+            self._fill()
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}, found {found or 'end of input'!r}")
+        self.pos += 1
+
+    def decode(self):
+        """The next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise
+                end = None
+            # A number cut by the read ("12|3", "1.|5") decodes early; a value is only
+            # complete once a delimiter follows it
+            if end is not None and (self.eof or (end < len(self.buffer) and self.buffer[end] in _delimiters)):
+                self.pos = end
+                return value
+            # Grow the read with the pending value so long elements decode in linear time
+            self._fill(max(self.read_size, len(self.buffer) - self.pos))
+
+    def iter_array(self):
+        """Elements of the array starting at the current position"""
+        self.expect('[')
+        while True:
+            char = self.peek()
+            if char == ']':
+                self.pos += 1
+                return
+            if char == ',':
+                self.pos += 1
+                continue
+            if not char:
+                raise ValueError("Unterminated JSON array")
+            yield self.decode()
+
+def iter_json_items(stream, keys=()):
+    """Items of a top-level JSON array, or of the array under one of `keys` in a
+    top-level object; any other object is yielded as a single item"""
+    reader = JsonStreamReader(stream)
+    first = reader.peek()
+    if first == '[':
+        yield from reader.iter_array()
+        return
+    if first != '{':
+        raise ValueError("Expected a JSON array or object")
+    reader.expect('{')
+    record = {}
+    while True:
+        char = reader.peek()
+        if char == '}':
+            break
+        if char == ',':
+            reader.pos += 1
+            continue
+        key = reader.decode()
+        reader.expect(':')
+        if key in keys and reader.peek() == '[':
+            yield from reader.iter_array()
+            return
+        record[key] = reader.decode()
+    yield record
+
+def iter_ndjson(stream):
+    """One JSON value per non-blank line"""
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Line {number}: {e}") from None
+
+def iter_csv(stream):
+    """CSV rows as {header: cell} dicts"""
+    yield from csv.DictReader(stream)
+
+def iter_lines(stream):
+    for line in stream:
+        if line.strip():
+            yield line.strip()
+
+def iter_items(stream, fmt, keys=()):
+    """Records of an open text stream in the given format"""
+    if fmt == 'csv':
+        return iter_csv(stream)
+    if fmt == 'ndjson':
+        return iter_ndjson(stream)
+    if fmt == 'json':
+        return iter_json_items(stream, keys)
+    return iter_lines(stream)
+
+def text_stream(source):
+    """A text stream over a binary upload / file object, decoding UTF-8 with or without BOM"""
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+def _task_item(row):
+    """A CSV row without a name-like column becomes first column = name, second = description"""
+    if any(str(k).strip().lower() in _NAME_COLUMNS for k in row):
+        return row
+    values = [v for v in row.values() if isinstance(v, str)]
+    return {"name": values[0] if values else '', "description": values[1] if len(values) > 1 else ''}
+
+def iter_task_items(path):
+    """Raw task items of a task file (strings, task objects or {"step", "tasks"} groups)"""
+    fmt = file_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for item in iter_items(f, fmt, TASK_KEYS):
+            yield _task_item(item) if fmt == 'csv' else item
+
+def iter_members(path):
+    """Member records of a user file; anything but CSV / NDJSON is read as JSON"""
+    fmt = file_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for item in iter_items(f, fmt if fmt in ('csv', 'ndjson') else 'json', MEMBER_KEYS):
+            if isinstance(item, dict):
+                yield item
+
+def load_members(path):
+    return list(iter_members(path))
+
+def read_task_input(path):
+    """Task input for analyze_tasks: the whole text of a small JSON / text file, else a
+    generator of raw task items"""
+    if file_format(path) in ('json', 'text') and os.path.getsize(path) < STREAM_MIN_BYTES:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return iter_task_items(path)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Markdown Table Parser
+Single-pass tokenizer for the markdown tables in LLM responses, shared by model.py
+and ai_integration.py. Tables come back as header + row lists and mappings as
+MappingRow tuples; only model.py turns them into DataFrames for display.
+"""
+
+import re
+from collections import namedtuple
+
+from ai_names import normalize_member_name
+
+# Separators between members, except inside "(Senior, 8 năm)"
+_user_split_re = re.compile(r'[;,/](?![^(\[{]*[)\]}])')
+
+MappingRow = namedtuple('MappingRow', ['task_id', 'member_name'])
+
+def is_separator(line):
+    """A divider row such as |---|:---:| holds nothing but pipes, dashes, colons and blanks"""
+    return '-' in line and not line.strip('|-: \t')
+
+def split_cells(line):
+    """Cells of a table row, without the outer pipes"""
+    return [c.strip() for c in line.strip('|').split('|')]
+
+class MarkdownTable:
+    """One table: header cells, a lowercase header -> column index map and raw rows"""
+
+    __slots__ = ('header', 'header_map', 'rows')
+
+    def __init__(self, header, rows):
+        self.header = header
+        self.header_map = {}
+        for index, name in enumerate(header):
+            self.header_map.setdefault(name.lower(), index)
+        self.rows = rows
+
+    def find_column(self, *keywords):
+        """Index of the first column whose lowercase header contains every keyword"""
+        for index, name in enumerate(self.header):
+            lowered = name.lower()
+            if all(keyword in lowered for keyword in keywords):
+                return index
+        return None
+
+    def has_duplicate_columns(self):
+        return len(set(self.header)) != len(self.header)
+
+    def iter_complete_rows(self):
+        """Rows with exactly one cell per header column"""
+        width = len(self.header)
+        return (row for row in self.rows if len(row) == width)
+
+    def iter_records(self):
+        """Complete rows as {header: cell} dicts"""
+        for row in self.iter_complete_rows():
+            yield dict(zip(self.header, row))
+
+    def iter_columns(self, *indexes):
+        """Tuples of the given columns for every row long enough to hold them"""
+        needed = max(indexes) + 1
+        for row in self.rows:
+            if len(row) >= needed:
+                yield tuple(row[i] for i in indexes)
+
+def _build_table(lines):
+    """Turn a run of consecutive pipe lines into a MarkdownTable, or None"""
+    if len(lines) < 2:
+        return None
+    divider = next((i for i, line in enumerate(lines) if is_separator(line)), None)
+    if divider is None:
+        header_line, body = lines[0], lines[1:]
+    elif divider > 0:
+        header_line, body = lines[divider - 1], lines[divider + 1:]
+    else:
+        header_line, body = lines[0], lines[1:]
+    rows = [split_cells(line) for line in body if not is_separator(line)]
+    return MarkdownTable(split_cells(header_line), rows)
+
+def iter_tables(markdown_text):
+    """Yield the markdown tables of the text in order, in one linear pass over its lines"""
+    block = []
+    for line in markdown_text.splitlines():
+        stripped = line.strip()
+        if len(stripped) > 1 and stripped[0] == '|' and stripped[-1] == '|':
+            block.append(stripped)
+            continue
+        if block:
+            table = _build_table(block)
+            if table is not None:
+                yield table
+            block = []
+    if block:
+        table = _build_table(block)
+        if table is not None:
+            yield table
+
+def parse_tables(markdown_text):
+    """Every markdown table in the text"""
+    return list(iter_tables(markdown_text))
+
+def first_data_table(markdown_text):
+    """First table with complete rows and distinct column names"""
+    for table in iter_tables(markdown_text):
+        if not table.has_duplicate_columns() and any(True for _ in table.iter_complete_rows()):
+            return table
+    return None
+
+def mapping_columns(table):
+    """(task id column, member name column) of a mapping table, or None"""
+    idx_task = None
+    idx_user = None
+    for i, h in enumerate(table.header):
+        h = h.lower()
+        if 'task' in h and 'id' in h:
+            idx_task = i
+        elif 'tên' in h:
+            idx_user = i
+    if idx_task is None or idx_user is None:
+        return None
+    return idx_task, idx_user
+
+def iter_mapping_rows(table):
+    """MappingRow(task_id, member_name) for every member listed in a mapping table"""
+    columns = mapping_columns(table)
+    if columns is None:
+        return
+    idx_task, idx_user = columns
+    needed = max(columns) + 1
+    for row in table.rows:
+        if len(row) < needed:
+            continue
+        task_id = row[idx_task]
+        user_cell = row[idx_user]
+        if not task_id or not user_cell:
+            continue
+        # Split multiple users
+        for u in _user_split_re.split(user_cell):
+            name_only = normalize_member_name(u.strip())
+            if name_only:
+                yield MappingRow(task_id, name_only)
+
+def extract_mapping_rows(markdown_text):
+    """Task ID / member name pairs from the first mapping table that yields any"""
+    for table in iter_tables(markdown_text):
+        rows = list(iter_mapping_rows(table))
+        if rows:
+            return rows
+    return []
+
+def find_table(markdown_text, predicate):
+    """First table whose header satisfies predicate(header)"""
+    return next((t for t in iter_tables(markdown_text) if predicate(t.header)), None)
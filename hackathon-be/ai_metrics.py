@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Job Metrics and Tracing
+Span timings for every stage of a job (startup, input reading, analysis chunks,
+LLM calls, JSON extraction, assignment, output writing) plus prompt/response token
+counts and cache hits per LLM call. Each job gets a `metrics` block in its result;
+the same spans can be appended to an OTLP/JSON trace file, sent through the
+OpenTelemetry API when it is installed (AI_OTEL=on), and folded into a
+Prometheus text file. AI_PROFILE_DIR dumps cProfile and tracemalloc reports per job.
+"""
+
+import io
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+from ai_scheduler import estimate_tokens
+from ai_stream import chunk_text
+
+TRACE_FILE = os.getenv('AI_TRACE_FILE')
+PROM_FILE = os.getenv('AI_PROM_FILE')
+PROFILE_DIR = os.getenv('AI_PROFILE_DIR')
+PROFILE_TOP = 40
+
+_local = threading.local()
+
+def configure(trace_file=None, prom_file=None, profile_dir=None):
+    """Override the AI_TRACE_FILE / AI_PROM_FILE / AI_PROFILE_DIR settings"""
+    global TRACE_FILE, PROM_FILE, PROFILE_DIR
+    TRACE_FILE = trace_file or TRACE_FILE
+    PROM_FILE = prom_file or PROM_FILE
+    PROFILE_DIR = profile_dir or PROFILE_DIR
+
+def otel_enabled():
+    """Send spans through the OpenTelemetry API when AI_OTEL=on"""
+    return os.getenv('AI_OTEL', 'off').lower() in ('1', 'on', 'true', 'yes')
+
+def process_age():
+    """Seconds since this process started (Linux), or None"""
+    try:
+        with open('/proc/self/stat', 'r') as f:
+            # Field 22 (after the parenthesised command name) is the start time in clock ticks
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime', 'r') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def current_trace():
+    """The JobTrace whose span is open on this thread, or None"""
+    stack = _stack()
+    return stack[-1][0] if stack else None
+
+@contextmanager
+def span(name, trace=None, **attributes):
+    """A span of `trace`, or of the trace active on this thread; a no-op outside a traced job"""
+    trace = trace or current_trace()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name, **attributes) as record:
+        yield record
+
+def add_time(name, seconds):
+    """Add to a timer of the trace active on this thread (for work too fine-grained for spans)"""
+    trace = current_trace()
+    if trace is not None:
+        trace.add_time(name, seconds)
+
+class JobTrace:
+    """Spans and LLM call records of one job; safe to use from several threads.
+
+    `span()` also makes the trace current on the calling thread, so code deeper in
+    the call stack (and chunk threads that open their own span) records into it
+    without passing it around. Spans opened in other threads hang off the root span.
+    """
+
+    def __init__(self, name='job', **attributes):
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self.calls = []
+        self.timers = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._epoch_ns = time.time_ns()
+        self.root = self._open(name, None, attributes)
+
+    def _now_ns(self):
+        return self._epoch_ns + int((time.perf_counter() - self._started) * 1e9)
+
+    def _open(self, name, parent, attributes):
+        return {"name": name, "spanId": secrets.token_hex(8), "parentSpanId": parent,
+                "start": self._now_ns(), "end": None, "attributes": dict(attributes)}
+
+    @contextmanager
+    def activate(self):
+        """Make this trace current on the calling thread without opening a span"""
+        stack = _stack()
+        stack.append((self, self.root))
+        try:
+            yield self
+        finally:
+            stack.pop()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        stack = _stack()
+        parent = stack[-1][1]['spanId'] if stack and stack[-1][0] is self else self.root['spanId']
+        record = self._open(name, parent, attributes)
+        stack.append((self, record))
+        try:
+            yield record
+        except BaseException as e:
+            record['attributes']['error'] = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            record['end'] = self._now_ns()
+            with self._lock:
+                self.spans.append(record)
+
+    def add_span(self, name, start_ns, end_ns, **attributes):
+        """Record a span measured elsewhere (e.g. the process startup before the job began)"""
+        record = {"name": name, "spanId": secrets.token_hex(8), "parentSpanId": self.root['spanId'],
+                  "start": start_ns, "end": end_ns, "attributes": dict(attributes)}
+        with self._lock:
+            self.spans.append(record)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            timer = self.timers.setdefault(name, [0, 0.0, 0.0])
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    def record_call(self, stage, prompt_tokens, response_tokens, seconds, cached, first_chunk=None):
+        """One LLM call: its stage, token counts, duration and whether the cache answered it"""
+        call = {"stage": stage, "promptTokens": prompt_tokens, "responseTokens": response_tokens,
+                "ms": round(seconds * 1000, 2), "cached": cached}
+        if first_chunk is not None:
+            call['firstChunkMs'] = round(first_chunk * 1000, 2)
+        with self._lock:
+            self.calls.append(call)
+
+    def finish(self, **attributes):
+        if self.root['end'] is None:
+            self.root['end'] = self._now_ns()
+            self.root['attributes'].update(attributes)
+            with self._lock:
+                self.spans.append(self.root)
+
+    def summary(self):
+        """The `metrics` block: per-stage span timings and per-stage LLM usage"""
+        with self._lock:
+            spans = [s for s in self.spans if s is not self.root and s['end'] is not None]
+            calls = list(self.calls)
+            timers = {name: list(timer) for name, timer in self.timers.items()}
+        end = self.root['end'] or self._now_ns()
+        stages = {}
+        for record in spans:
+            ms = (record['end'] - record['start']) / 1e6
+            stage = stages.setdefault(record['name'], {"count": 0, "ms": 0.0, "maxMs": 0.0})
+            stage['count'] += 1
+            stage['ms'] += ms
+            stage['maxMs'] = max(stage['maxMs'], ms)
+        for name, (count, seconds, longest) in timers.items():
+            stages[name] = {"count": count, "ms": seconds * 1000, "maxMs": longest * 1000}
+        for stage in stages.values():
+            stage['ms'] = round(stage['ms'], 2)
+            stage['maxMs'] = round(stage['maxMs'], 2)
+        llm = {}
+        for call in calls:
+            usage = llm.setdefault(call['stage'], {"calls": 0, "cacheHits": 0, "promptTokens": 0,
+                                                   "responseTokens": 0, "ms": 0.0})
+            usage['calls'] += 1
+            usage['cacheHits'] += 1 if call['cached'] else 0
+            usage['promptTokens'] += call['promptTokens']
+            usage['responseTokens'] += call['responseTokens']
+            usage['ms'] = round(usage['ms'] + call['ms'], 2)
+        return {
+            "traceId": self.trace_id,
+            "totalMs": round((end - self.root['start']) / 1e6, 2),
+            "stages": stages,
+            "llm": llm,
+            "llmCalls": calls,
+        }
+
+    def otlp(self, service='ai-task-assignment'):
+        """The spans as an OTLP/JSON ExportTraceServiceRequest"""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        with self._lock:
+            spans = list(self.spans)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute('service.name', service)]},
+            "scopeSpans": [{
+                "scope": {"name": 'ai_metrics'},
+                "spans": [{
+                    "traceId": self.trace_id,
+                    "spanId": s['spanId'],
+                    **({"parentSpanId": s['parentSpanId']} if s['parentSpanId'] else {}),
+                    "name": s['name'],
+                    "kind": 1,
+                    "startTimeUnixNano": str(s['start']),
+                    "endTimeUnixNano": str(s['end'] or s['start']),
+                    "attributes": [attribute(k, v) for k, v in s['attributes'].items()],
+                } for s in spans],
+            }],
+        }]}
+
+class InstrumentedModel:
+    """Records every generate_content call of a model into a JobTrace.
+
+    The stage of a call is the innermost open span on the calling thread. Token
+    counts come from the response's usage metadata when the backend reports it
+    and are estimated from the text otherwise; cache hits are the responses the
+    response cache marks as `cached`.
+    """
+
+    def __init__(self, model, trace):
+        self.model = model
+        self.trace = trace
+
+    def _stage(self):
+        stack = _stack()
+        return stack[-1][1]['name'] if stack and stack[-1][0] is self.trace else 'llm'
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        stage = self._stage()
+        started = time.perf_counter()
+        if stream:
+            return self._stream(prompt, stage, started, self.model.generate_content(prompt, stream=True, **kwargs))
+        response = self.model.generate_content(prompt, **kwargs)
+        prompt_tokens, response_tokens = _usage(response, prompt, response.text)
+        self.trace.record_call(stage, prompt_tokens, response_tokens, time.perf_counter() - started,
+                               bool(getattr(response, 'cached', False)))
+        return response
+
+    def _stream(self, prompt, stage, started, chunks):
+        parts = []
+        first = None
+        last = None
+        cached = False
+        try:
+            for chunk in chunks:
+                if first is None:
+                    first = time.perf_counter() - started
+                cached = cached or bool(getattr(chunk, 'cached', False))
+                parts.append(chunk_text(chunk))
+                last = chunk
+                yield chunk
+        finally:
+            prompt_tokens, response_tokens = _usage(last, prompt, ''.join(parts))
+            self.trace.record_call(stage, prompt_tokens, response_tokens, time.perf_counter() - started,
+                                   cached, first)
+
+def _usage(response, prompt, text):
+    """(prompt tokens, response tokens) from usage metadata, else estimated"""
+    usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    response_tokens = getattr(usage, 'candidates_token_count', None)
+    return (prompt_tokens if prompt_tokens else estimate_tokens(prompt),
+            response_tokens if response_tokens else (estimate_tokens(text) if text else 0))
+
+class PrometheusFile:
+    """Process-wide counters over finished jobs, rewritten as a Prometheus text file"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = {}
+        self.stage_seconds = {}
+        self.stage_count = {}
+        self.llm_calls = {}
+        self.llm_tokens = {}
+
+    def add(self, summary, status):
+        with self._lock:
+            self.jobs[status] = self.jobs.get(status, 0) + 1
+            for name, stage in summary['stages'].items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + stage['ms'] / 1000
+                self.stage_count[name] = self.stage_count.get(name, 0) + stage['count']
+            for name, usage in summary['llm'].items():
+                hits = usage['cacheHits']
+                for cached, count in (('true', hits), ('false', usage['calls'] - hits)):
+                    key = (name, cached)
+                    self.llm_calls[key] = self.llm_calls.get(key, 0) + count
+                for kind in ('prompt', 'response'):
+                    key = (name, kind)
+                    self.llm_tokens[key] = self.llm_tokens.get(key, 0) + usage[f"{kind}Tokens"]
+
+    def render(self):
+        out = io.StringIO()
+        with self._lock:
+            out.write("# HELP ai_jobs_total Finished assignment jobs\n# TYPE ai_jobs_total counter\n")
+            for status, count in sorted(self.jobs.items()):
+                out.write(f'ai_jobs_total{{status="{status}"}} {count}\n')
+            out.write("# HELP ai_stage_seconds_total Time spent per job stage\n"
+                      "# TYPE ai_stage_seconds_total counter\n")
+            for name, seconds in sorted(self.stage_seconds.items()):
+                out.write(f'ai_stage_seconds_total{{stage="{name}"}} {seconds:.6f}\n')
+            out.write("# HELP ai_stage_spans_total Spans recorded per job stage\n"
+                      "# TYPE ai_stage_spans_total counter\n")
+            for name, count in sorted(self.stage_count.items()):
+                out.write(f'ai_stage_spans_total{{stage="{name}"}} {count}\n')
+            out.write("# HELP ai_llm_calls_total LLM calls per stage and cache result\n"
+                      "# TYPE ai_llm_calls_total counter\n")
+            for (name, cached), count in sorted(self.llm_calls.items()):
+                out.write(f'ai_llm_calls_total{{stage="{name}",cached="{cached}"}} {count}\n')
+            out.write("# HELP ai_llm_tokens_total LLM tokens per stage and direction\n"
+                      "# TYPE ai_llm_tokens_total counter\n")
+            for (name, kind), count in sorted(self.llm_tokens.items()):
+                out.write(f'ai_llm_tokens_total{{stage="{name}",kind="{kind}"}} {count}\n')
+        return out.getvalue()
+
+    def write(self, path):
+        # Written next to the target and renamed, so a scraper never reads half a file
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(self.render(), encoding='utf-8')
+        os.replace(tmp, path)
+
+_prometheus = PrometheusFile()
+_trace_lock = threading.Lock()
+_profile_lock = threading.Lock()
+
+def _export_otel(trace):
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:
+        print("AI_OTEL=on but opentelemetry is not installed; spans are not exported", file=sys.stderr)
+        return
+    tracer = otel_trace.get_tracer('ai_metrics')
+    by_id = {}
+    with trace._lock:
+        spans = sorted(trace.spans, key=lambda s: s['start'])
+    # Parents start before their children, so they are created first
+    for record in spans:
+        parent = by_id.get(record['parentSpanId'])
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = tracer.start_span(record['name'], context=context, start_time=record['start'],
+                                      attributes=record['attributes'])
+        otel_span.end(end_time=record['end'] or record['start'])
+        by_id[record['spanId']] = otel_span
+
+def export(trace, status='ok'):
+    """Append the job's spans to the trace file / OpenTelemetry and update the Prometheus file"""
+    try:
+        if TRACE_FILE:
+            line = json.dumps(trace.otlp(), ensure_ascii=False) + '\n'
+            with _trace_lock, open(TRACE_FILE, 'a', encoding='utf-8') as f:
+                # Batch worker processes append to the same file
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.write(line)
+        if otel_enabled():
+            _export_otel(trace)
+    except OSError as e:
+        print(f"Could not export job metrics: {e}", file=sys.stderr)
+    record(trace.summary(), status)
+
+def record(summary, status='ok'):
+    """Count a finished job's summary in the Prometheus file"""
+    if not PROM_FILE:
+        return
+    try:
+        _prometheus.add(summary, status)
+        with _trace_lock:
+            _prometheus.write(PROM_FILE)
+    except OSError as e:
+        print(f"Could not export job metrics: {e}", file=sys.stderr)
+
+def worker_settings():
+    """Trace / profile settings for a worker process (see configure_worker)"""
+    return {"traceFile": TRACE_FILE, "profileDir": PROFILE_DIR}
+
+def configure_worker(settings):
+    """Apply worker_settings() of the parent in a worker process.
+
+    The parent keeps the Prometheus file and record()s the summaries its workers
+    send back, so the counters cover every job.
+    """
+    global TRACE_FILE, PROM_FILE, PROFILE_DIR
+    TRACE_FILE = settings.get('traceFile')
+    PROFILE_DIR = settings.get('profileDir')
+    PROM_FILE = None
+
+@contextmanager
+def profiled(name):
+    """cProfile and tracemalloc reports for the block in AI_PROFILE_DIR/<name>.*; a no-op
+    without AI_PROFILE_DIR. One job is profiled at a time; concurrent jobs run unprofiled."""
+    if not PROFILE_DIR or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    directory = Path(PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = re.sub(r'[^\w.-]', '_', name)
+    stem = directory / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    profile = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start(25)
+    try:
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+            profile.dump_stats(f"{stem}.prof")
+            report = io.StringIO()
+            pstats.Stats(profile, stream=report).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            Path(f"{stem}.cprofile.txt").write_text(report.getvalue(), encoding='utf-8')
+            lines = [f"current {current / 2**20:.2f} MB, peak {peak / 2**20:.2f} MB", ""]
+            lines += [str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+            Path(f"{stem}.tracemalloc.txt").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+            print(f"Profile written to {stem}.*", file=sys.stderr)
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Member Name Normalizer
+Cleans member names out of LLM mapping cells ("Nguyễn Văn A (Senior, 8 năm KN)")
+with precompiled patterns and a per-cell LRU cache, and resolves them to member
+records through a prebuilt, diacritic-insensitive name index.
+"""
+
+import re
+import sys
+import unicodedata
+from functools import lru_cache
+
+_brackets_re = re.compile(r'[\(\[\{][^\)\]\}]*[\)\]\}]')
+_experience_suffix_re = re.compile(r'\s*(KN|năm|years?)\s*\)?\s*$', re.IGNORECASE)
+_name_split_re = re.compile(r'\s+-\s+|[,|]|-(?=\s|$)')
+_whitespace_re = re.compile(r'\s+')
+_word_punctuation = '.:;!?\'"`*_()[]{}'
+
+# Words that describe a role or level rather than a person
+ROLE_KEYWORDS = frozenset(sys.intern(k) for k in (
+    'fresher', 'junior', 'senior', 'medium', 'middle', 'mid', 'developer', 'dev', 'engineer',
+    'tester', 'qa', 'intern', 'lead', 'leader', 'designer', 'manager'))
+NON_NAMES = frozenset(sys.intern(k) for k in ('kn', 'năm', 'years', 'kinh nghiệm'))
+
+NAME_CACHE_SIZE = 8192
+
+def _is_role_word(word):
+    word = word.strip(_word_punctuation).lower()
+    return word in ROLE_KEYWORDS or (word.endswith('s') and word[:-1] in ROLE_KEYWORDS)
+
+def _is_name_word(word):
+    # Letters only, allowing inner hyphens/apostrophes (Anh-Thư, O'Neil)
+    return word.replace('-', '').replace("'", '').isalpha()
+
+def clean_member_name(name_str):
+    """Extract only the member name, removing role/experience info.
+
+    Returns "" when nothing that looks like a name is left. Multi-word and
+    Vietnamese names are kept as written (NFC-normalized).
+    """
+    if not name_str or not name_str.strip():
+        return ""
+    cleaned = unicodedata.normalize('NFC', name_str)
+
+    # Remove content in parentheses and brackets, then suffixes like "KN)", "năm)"
+    cleaned = _brackets_re.sub('', cleaned).strip()
+    cleaned = _experience_suffix_re.sub('', cleaned).strip()
+
+    # The name is the first part before " - ", "," or "|"
+    first_part = _name_split_re.split(cleaned, 1)[0].strip()
+    if not first_part or first_part.lower() in NON_NAMES:
+        return ""
+
+    words = [w.strip(_word_punctuation) for w in first_part.split()]
+    words = [w for w in words if w and not w.isdigit() and not _is_role_word(w)]
+    if not words or not all(_is_name_word(w) for w in words):
+        return ""
+    return ' '.join(words)
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def normalize_member_name(cell):
+    """Memoized clean_member_name for one raw mapping cell"""
+    return clean_member_name(cell)
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def name_key(name):
+    """Case-, whitespace- and diacritic-insensitive lookup key ("Nguyễn  Văn A" -> "nguyen van a")"""
+    decomposed = unicodedata.normalize('NFD', str(name).replace('đ', 'd').replace('Đ', 'D'))
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _whitespace_re.sub(' ', stripped).strip().casefold()
+
+class MemberIndex:
+    """Prebuilt name -> member lookup for output_user.json style records.
+
+    `resolve(cell)` accepts a raw mapping cell or a clean name and costs one
+    memoized clean-up plus one dictionary lookup.
+    """
+
+    def __init__(self, user_data, name_field='Name', id_field='Id'):
+        self.id_field = id_field
+        self._by_key = {}
+        for member in user_data:
+            name = member.get(name_field)
+            if name:
+                # The first member wins when two share a name, as before
+                self._by_key.setdefault(name_key(name), member)
+
+    def resolve(self, cell):
+        """Member record for a name or mapping cell, or None"""
+        if not cell:
+            return None
+        member = self._by_key.get(name_key(cell))
+        if member is None:
+            name = normalize_member_name(cell)
+            member = self._by_key.get(name_key(name)) if name else None
+        return member
+
+    def member_id(self, cell):
+        """Member Id for a name or mapping cell, or ''"""
+        member = self.resolve(cell)
+        return str(member.get(self.id_field, '')) if member else ''
+
+    def __len__(self):
+        return len(self._by_key)
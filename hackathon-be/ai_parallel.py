@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Process-Pool Execution
+Runs CPU-bound post-processing (JSON extraction, name normalization, the
+mapping-to-member join, output serialization) in worker processes instead of one
+GIL-bound interpreter. Work goes out as compact UTF-8 JSON buffers, not pickled
+objects, in contiguous shards; results come back in shard order, so the output is
+the same for any number of workers.
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from ai_stream import JsonArrayParser
+
+# Responses shorter than this are parsed in-process; a pool round trip costs more
+PARALLEL_MIN_BYTES = int(os.getenv('AI_PARALLEL_MIN_BYTES', 1 << 20))
+
+# Where a response may be cut: a newline after a ',' with an object opening next.
+# Raw newlines never occur inside JSON strings; a cut inside a nested object is
+# caught when the shards are merged.
+_cut_re = re.compile(r',[ \t\r]*\n(?=[ \t\r\n]*\{)')
+
+# Worker processes for batches and large responses (AI_PROCESSES); 0 means one per core
+PROCESSES = int(os.getenv('AI_PROCESSES', 1))
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+# Set in pool workers, which don't start pools of their own
+_in_worker = False
+
+def configure(processes=None):
+    """Override the AI_PROCESSES setting"""
+    global PROCESSES
+    if processes is not None:
+        PROCESSES = processes
+
+def process_count(value=None):
+    """Worker processes: `value`, else PROCESSES; 1 means in-process, 0 one per core"""
+    if _in_worker:
+        return 1
+    if value is None:
+        value = PROCESSES
+    return value if value > 0 else (os.cpu_count() or 1)
+
+def encode_buffer(data):
+    """Compact UTF-8 JSON bytes"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def decode_buffer(buffer):
+    return json.loads(buffer)
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+
+def get_pool(workers):
+    """The process pool of this process, resized to `workers`.
+
+    Workers are spawned rather than forked, so they don't inherit the parent's
+    threads, locks or SQLite connections.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker)
+            _pool_workers = workers
+        return _pool
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+atexit.register(shutdown_pool)
+
+def _call(fn, buffer):
+    return encode_buffer(fn(decode_buffer(buffer)))
+
+def parallel_map(fn, payloads, workers):
+    """[fn(payload)] in payload order; fn and its result must be JSON-friendly module-level code.
+
+    With one worker (or one payload) fn runs in-process on the payloads as they are.
+    """
+    if workers <= 1 or len(payloads) <= 1:
+        return [fn(payload) for payload in payloads]
+    pool = get_pool(workers)
+    futures = [pool.submit(_call, fn, encode_buffer(payload)) for payload in payloads]
+    return [decode_buffer(future.result()) for future in futures]
+
+def cut_points(text, parts):
+    """Up to parts - 1 offsets where `text` can be split between top-level array objects"""
+    cuts = []
+    for k in range(1, parts):
+        match = _cut_re.search(text, max(len(text) * k // parts, cuts[-1] if cuts else 0))
+        if match is None:
+            break
+        if not cuts or match.end() > cuts[-1]:
+            cuts.append(match.end())
+    return cuts
+
+def _parse_shard(validator, payload):
+    """Objects of one slice of a response, validated; with the parser state at the slice's end"""
+    parser = JsonArrayParser()
+    text = payload['text'] if payload['first'] else '[' + payload['text']
+    objects = parser.feed(text)
+    validate = validator(payload['context'])
+    results = []
+    for item in objects:
+        row, errors = validate(item)
+        # Valid items are only needed as rows
+        results.append([row, errors, item if row is None else None])
+    return {"started": parser.started, "finished": parser.finished, "balanced": parser.balanced,
+            "results": results}
+
+def parse_and_validate(text, validator, context, workers=None):
+    """(item, row, errors) for the objects of the first JSON array in a response, or None.
+
+    The text is cut between objects and every slice is parsed and checked with
+    validator(context) (a module-level factory returning validate(item) -> (row,
+    errors)) in its own worker. Valid rows come back without their item. None
+    means the response is too small, the pool is off, or the slices did not line
+    up with object boundaries; the caller then parses it in-process.
+    """
+    workers = process_count(workers)
+    if workers <= 1 or len(text) < PARALLEL_MIN_BYTES:
+        return None
+    cuts = cut_points(text, workers)
+    if not cuts:
+        return None
+    bounds = [0] + cuts + [len(text)]
+    payloads = [{"text": text[start:end], "first": i == 0, "context": context}
+                for i, (start, end) in enumerate(zip(bounds, bounds[1:]))]
+    try:
+        shards = parallel_map(partial(_parse_shard, validator), payloads, workers)
+    except BrokenProcessPool as e:
+        print(f"Process pool failed, parsing in-process: {e}", file=sys.stderr)
+        shutdown_pool()
+        return None
+
+    results = []
+    for i, shard in enumerate(shards):
+        if not shard['started']:
+            return None
+        results.extend(shard['results'])
+        if shard['finished']:
+            break
+        # A slice that ends inside an object was cut in the wrong place, unless it is the
+        # last one (a truncated response)
+        if not shard['balanced'] and i < len(shards) - 1:
+            return None
+    return [(item, row, errors) for row, errors, item in results]
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Pipelined Analysis and Assignment
+Assigns analyzed tasks batch by batch while later chunks are still being analyzed,
+so a large project waits roughly max(analysis, assignment) instead of their sum.
+Batches are assigned one at a time in arrival order against a shared
+WorkloadBalance, so the load balance and the 40% cap hold for the whole project
+rather than for each batch on its own.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_assigner import MAX_WORKLOAD_SHARE
+from ai_names import name_key
+from ai_scoring import WORKLOAD_UNITS, normalize_member, normalize_task
+
+# Analyzed rows per assignment batch; 0 means the analysis chunk size
+PIPELINE_BATCH = int(os.getenv('AI_PIPELINE_BATCH', 0))
+
+HARD_TASK_TYPES = ('Urgent', 'High')
+
+def pipeline_enabled():
+    """Assign while analysis is still running unless AI_PIPELINE=off"""
+    return os.getenv('AI_PIPELINE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+class WorkloadBalance:
+    """Member loads shared by every assignment batch of one project.
+
+    `load[m]` holds the workload units given to member m so far and `hard_count[m]`
+    their Urgent/High tasks. The 40% cap is taken against a lower bound of the
+    project total: the units analyzed so far plus the smallest workload for every
+    task not analyzed yet. The bound only grows, so batches that respect it never
+    break the cap of the finished project. `expected_tasks` must be set before the
+    first batch is admitted; without it the bound is too tight for early batches.
+    """
+
+    def __init__(self, user_data, expected_tasks=None):
+        self.members = [normalize_member(m, i) for i, m in enumerate(user_data)]
+        self.load = [0.0] * len(self.members)
+        self.hard_count = [0] * len(self.members)
+        self.expected_tasks = expected_tasks
+        self.dropped = 0
+        self._tasks = {}
+        self._units = 0.0
+        self._by_name = {}
+        for member in self.members:
+            if member['name']:
+                self._by_name.setdefault(name_key(member['name']), member['index'])
+
+    def add_tasks(self, task_analysis):
+        """Count a batch of analyzed rows into the project total"""
+        for row in task_analysis:
+            task = normalize_task(row, len(self._tasks))
+            key = str(task['taskId']).upper()
+            if key not in self._tasks:
+                self._tasks[key] = task
+                self._units += task['units']
+
+    def total_units(self):
+        remaining = max((self.expected_tasks or 0) - len(self._tasks), 0)
+        return (self._units + remaining * min(WORKLOAD_UNITS.values())) or 1.0
+
+    def cap_units(self):
+        # Below three members the 40% cap cannot be met; fall back to an even split
+        share = max(MAX_WORKLOAD_SHARE, 1.0 / max(len(self.members), 1))
+        return share * self.total_units()
+
+    def member_index(self, name):
+        """Index of the member with this name, or None"""
+        return self._by_name.get(name_key(name)) if name else None
+
+    def member_load(self, name):
+        """Units held by the member with this name (0 for unknown names)"""
+        m = self.member_index(name)
+        return self.load[m] if m is not None else 0.0
+
+    def admit(self, user_task_mapping, capped=True, fallback=True):
+        """Book a batch of LLM mapping rows against the loads and return the rows kept.
+
+        A member the row would take over the cap is dropped from the task's team as
+        long as someone else is left; a task with no one under the cap keeps its
+        least-loaded member rather than going unassigned (fallback=False drops the
+        whole team for the caller to re-staff). With capped=False every row is booked
+        and kept (pinned assignments).
+        """
+        teams = {}
+        for row in user_task_mapping:
+            teams.setdefault(str(row['taskId']).upper(), []).append(row)
+        cap = self.cap_units()
+        kept = []
+        for task_id, rows in teams.items():
+            task = self._tasks.get(task_id)
+            members = [(row, self.member_index(row['MemberName'])) for row in rows]
+            members = [(row, m) for row, m in members if m is not None]
+            if task is None or not members:
+                kept.extend(rows)
+                continue
+            share = task['units'] / len(members)
+            team = [(row, m) for row, m in members if not capped or self.load[m] + share <= cap + 1e-9]
+            if not team and fallback:
+                team = [min(members, key=lambda entry: (self.load[entry[1]], entry[1]))]
+            self.dropped += len(members) - len(team)
+            if not team:
+                continue
+            share = task['units'] / len(team)
+            for row, m in team:
+                self.load[m] += share
+                if task['type'] in HARD_TASK_TYPES:
+                    self.hard_count[m] += 1
+                kept.append(row)
+        return kept
+
+    def report(self):
+        if self.dropped:
+            print(f"Dropped {self.dropped} mapping rows over the {MAX_WORKLOAD_SHARE:.0%} workload cap",
+                  file=sys.stderr)
+
+class AssignmentPipeline:
+    """Collects analyzed rows and assigns them in batches on a background thread.
+
+    `assign(batch)` returns (user_task_mapping, task_assignment) for a list of rows
+    and runs for one batch at a time, in arrival order. Rows can be added from any
+    thread (concurrent chunk analysis); each taskId is assigned once.
+    """
+
+    def __init__(self, assign, batch_size, on_mapping=None):
+        self.assign = assign
+        self.batch_size = max(1, batch_size)
+        self.on_mapping = on_mapping
+        self.batches = 0
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._seen = set()
+        self._futures = []
+
+    def add(self, rows):
+        with self._lock:
+            for row in rows:
+                key = str(row.get('taskId', '')).upper()
+                if key and key not in self._seen:
+                    self._seen.add(key)
+                    self._pending.append(row)
+            while len(self._pending) >= self.batch_size:
+                self._submit(self._pending[:self.batch_size])
+                self._pending = self._pending[self.batch_size:]
+
+    def _submit(self, batch):
+        self._futures.append(self._executor.submit(self._run, batch))
+        self.batches += 1
+
+    def _run(self, batch):
+        user_task_mapping, task_assignment = self.assign(batch)
+        if self.on_mapping:
+            for mapping in user_task_mapping:
+                self.on_mapping(mapping)
+        return user_task_mapping, task_assignment
+
+    def finish(self, task_analysis):
+        """Assign what is left of task_analysis and return (user_task_mapping,
+        task_assignment) for its tasks, in task order"""
+        try:
+            self.add(task_analysis)
+            with self._lock:
+                if self._pending:
+                    self._submit(self._pending)
+                    self._pending = []
+            results = [future.result() for future in self._futures]
+        finally:
+            self.close()
+        order = {str(row.get('taskId', '')).upper(): i for i, row in enumerate(task_analysis)}
+        pairs = [pair for mapping, assignment in results for pair in zip(mapping, assignment)
+                 if str(pair[0]['taskId']).upper() in order]
+        pairs.sort(key=lambda pair: order[str(pair[0]['taskId']).upper()])
+        return [mapping for mapping, _ in pairs], [assignment for _, assignment in pairs]
+
+    def close(self):
+        """Stop the background thread, dropping batches that have not started"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
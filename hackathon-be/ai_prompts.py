@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Prompt Compaction
+Serializes analyzed tasks and members for the assignment prompts as pipe-separated
+rows holding only the fields the assignment needs, with repeated skill, department
+and position strings replaced by short codes (S1, D1, P1) listed once in a legend.
+
+Usage: python ai_prompts.py <task_analysis.json> <user_file.json>   (token counts before/after)
+"""
+
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+from ai_markdown import first_data_table
+from ai_scheduler import estimate_tokens
+from ai_scoring import parse_years, task_skills
+
+LEGEND_PREFIX = 'Mã: '
+TASK_COLUMNS = ('taskId', 'type', 'workload', 'priority', 'skills')
+NAMED_TASK_COLUMNS = ('taskId', 'name', 'type', 'workload', 'priority', 'skills')
+MEMBER_COLUMNS = ('Name', 'Department', 'Position', 'years', 'ProjectsDone', 'DeadlineMisses')
+
+# Field names of the LLM JSON first, then the markdown headers of model.py's analysis table
+TASK_FIELDS = {
+    'taskId': ('taskId', 'task id'),
+    'name': ('name', 'tên task'),
+    'type': ('type', 'loại task'),
+    'workload': ('workload', 'khối lượng'),
+    'priority': ('priority', 'ưu tiên'),
+}
+
+_priority_re = re.compile(r'\d+')
+_code_re = re.compile(r'^[SDP]\d+$')
+
+def prompt_format():
+    """"compact" (default) or "json" for the previous indented-JSON prompt (AI_PROMPT_FORMAT)"""
+    return 'json' if os.getenv('AI_PROMPT_FORMAT', 'compact').lower() == 'json' else 'compact'
+
+def _cell(value):
+    return ' '.join(str(value).replace('|', '/').split())
+
+def _field(record, key):
+    """A task field by JSON name or by (prefix of) its markdown header"""
+    for alias in TASK_FIELDS[key]:
+        if alias in record:
+            return record[alias]
+    for name, value in record.items():
+        if any(name.lower().startswith(alias) for alias in TASK_FIELDS[key][1:]):
+            return value
+    return ''
+
+class Codebook:
+    """Short codes for strings repeated across rows, numbered in order of first use"""
+
+    def __init__(self, prefix, values):
+        counts = Counter(values)
+        self.prefix = prefix
+        self.codes = {}
+        for value in values:
+            # A code only pays off for strings used more than once and longer than the code
+            if counts[value] > 1 and value not in self.codes and len(value) > len(prefix) + 2:
+                self.codes[value] = f"{prefix}{len(self.codes) + 1}"
+
+    def encode(self, value):
+        return self.codes.get(value, value)
+
+    def legend(self):
+        return '; '.join(f"{code}={value}" for value, code in self.codes.items())
+
+def _legend_line(*codebooks):
+    legend = '; '.join(filter(None, (c.legend() for c in codebooks)))
+    return [LEGEND_PREFIX + legend] if legend else []
+
+def _skill_text(skill):
+    return _cell(skill).replace(',', ' ').replace(';', ' ').replace('=', '-')
+
+def compact_tasks(task_analysis, with_names=False):
+    """Analyzed tasks as a legend line, a header and one pipe-separated row per task"""
+    columns = NAMED_TASK_COLUMNS if with_names else TASK_COLUMNS
+    skills = [[_skill_text(s) for s in task_skills(task)] for task in task_analysis]
+    codebook = Codebook('S', [s for row in skills for s in row])
+    lines = _legend_line(codebook) + ['|'.join(columns)]
+    for task, row_skills in zip(task_analysis, skills):
+        priority = _priority_re.search(str(_field(task, 'priority')))
+        values = {
+            'taskId': _cell(_field(task, 'taskId')),
+            'name': _cell(_field(task, 'name')),
+            'type': _cell(_field(task, 'type')),
+            'workload': _cell(_field(task, 'workload')),
+            'priority': priority.group() if priority else '',
+            'skills': ','.join(codebook.encode(s) for s in row_skills),
+        }
+        lines.append('|'.join(values[c] for c in columns))
+    return '\n'.join(lines)
+
+def compact_members(user_data, loads=None):
+    """Members as a legend line, a header and one pipe-separated row per member.
+
+    `loads` (one number per member) adds a `load` column with the workload units
+    each member already holds from earlier assignment batches.
+    """
+    departments = Codebook('D', [_cell(m.get('Department', '')) for m in user_data])
+    positions = Codebook('P', [_cell(m.get('Position', '')) for m in user_data])
+    columns = MEMBER_COLUMNS + (('load',) if loads is not None else ())
+    lines = _legend_line(departments, positions) + ['|'.join(columns)]
+    for index, member in enumerate(user_data):
+        years = parse_years(member.get('Experience'))
+        values = [
+            _cell(member.get('Name', '')),
+            departments.encode(_cell(member.get('Department', ''))),
+            positions.encode(_cell(member.get('Position', ''))),
+            f"{years:g}",
+            _cell(member.get('ProjectsDone', '')),
+            _cell(member.get('DeadlineMisses', '')),
+        ]
+        if loads is not None:
+            values.append(f"{loads[index]:g}")
+        lines.append('|'.join(values))
+    return '\n'.join(lines)
+
+def _parse_block(block, first_column):
+    """(legend, header, rows) of a compact block, or None if it has no such header"""
+    legend = {}
+    header = None
+    rows = []
+    for line in (l.strip() for l in block.splitlines()):
+        if not line:
+            continue
+        if line.startswith(LEGEND_PREFIX):
+            for entry in line[len(LEGEND_PREFIX):].split('; '):
+                code, _, value = entry.partition('=')
+                legend[code.strip()] = value.strip()
+        elif header is None:
+            if line.startswith(first_column + '|'):
+                header = line.split('|')
+        elif '|' in line:
+            rows.append(dict(zip(header, (c.strip() for c in line.split('|')))))
+    return (legend, header, rows) if header else None
+
+def _decode(legend, value):
+    return legend.get(value, value) if _code_re.match(value) else value
+
+def parse_compact_tasks(block):
+    """Task records back from compact_tasks() output, or None if the block is not compact"""
+    parsed = _parse_block(block, 'taskId')
+    if parsed is None:
+        return None
+    legend, _, rows = parsed
+    for row in rows:
+        row['skills'] = [_decode(legend, s) for s in row.get('skills', '').split(',') if s]
+        if row.get('priority', '').isdigit():
+            row['priority'] = int(row['priority'])
+    return rows
+
+def parse_compact_members(block):
+    """Member records back from compact_members() output, or None if the block is not compact"""
+    parsed = _parse_block(block, 'Name')
+    if parsed is None:
+        return None
+    legend, _, rows = parsed
+    members = []
+    for index, row in enumerate(rows):
+        members.append({
+            "Id": str(index + 1),
+            "Name": row.get('Name', ''),
+            "Department": _decode(legend, row.get('Department', '')),
+            "Position": _decode(legend, row.get('Position', '')),
+            "Experience": f"{row.get('years', '0')} years",
+            "ProjectsDone": row.get('ProjectsDone', ''),
+            "DeadlineMisses": row.get('DeadlineMisses', ''),
+        })
+    return members
+
+def compact_markdown_tasks(markdown_text):
+    """model.py's analysis table reduced to Task ID, name, type, workload, priority and coded skills.
+
+    The difficulty and priority explanations are dropped; text without a table is
+    returned unchanged.
+    """
+    table = first_data_table(markdown_text)
+    if table is None:
+        return markdown_text
+    return compact_tasks(list(table.iter_records()), with_names=True)
+
+def token_report(before, after):
+    """Estimated token counts of a prompt section before and after compaction"""
+    tokens_before = estimate_tokens(before)
+    tokens_after = estimate_tokens(after)
+    return {
+        "tokensBefore": tokens_before,
+        "tokensAfter": tokens_after,
+        "reduction": round(1 - tokens_after / tokens_before, 4) if tokens_before else 0.0,
+    }
+
+def assignment_token_report(task_analysis, user_data):
+    """Token counts of the assignment prompt data as indented JSON vs compact rows"""
+    before = (json.dumps(task_analysis, ensure_ascii=False, indent=2)
+              + json.dumps(user_data, ensure_ascii=False, indent=2))
+    after = compact_tasks(task_analysis) + compact_members(user_data)
+    return token_report(before, after)
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        task_analysis = json.load(f)
+    if isinstance(task_analysis, dict):
+        task_analysis = task_analysis.get('taskAnalysis', [])
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        user_data = json.load(f)
+    print(json.dumps(assignment_token_report(task_analysis, user_data), indent=2))
+
+if __name__ == "__main__":
+    main()
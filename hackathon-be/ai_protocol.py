@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Stdin/Stdout Protocol
+Framing for `ai_integration.py --stdin`: the job arrives as one JSON document on
+stdin and every record goes back on stdout, so a caller never touches the
+filesystem. Frames are "<byte length>\\n<json>\\n"; with ndjson framing each record
+is a single line instead.
+"""
+
+import json
+
+FRAMINGS = ('length', 'ndjson')
+
+def read_exact(stream, size):
+    """`size` bytes from a binary stream, reading until EOF if a read returns fewer
+    (raw pipes and sockets return what has arrived so far)"""
+    parts = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        parts.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(parts)
+
+def read_document(stream):
+    """The JSON document on a binary stream: one length-prefixed frame or everything up to EOF"""
+    first = stream.readline()
+    header = first.strip()
+    if header.isdigit():
+        size = int(header)
+        payload = read_exact(stream, size)
+        if len(payload) < size:
+            raise ValueError(f"Truncated input: expected {size} bytes, got {len(payload)}")
+    else:
+        payload = first + stream.read()
+    if not payload.strip():
+        raise ValueError("No JSON document on stdin")
+    document = json.loads(payload.decode('utf-8-sig'))
+    if not isinstance(document, dict):
+        raise ValueError("The stdin document must be a JSON object")
+    return document
+
+def encode_frame(record, framing='length'):
+    """Bytes of one record in the given framing"""
+    payload = json.dumps(record, ensure_ascii=False).encode('utf-8')
+    if framing == 'ndjson':
+        return payload + b'\n'
+    return str(len(payload)).encode('ascii') + b'\n' + payload + b'\n'
+
+def iter_frames(stream):
+    """Records of a length-prefixed binary stream, for callers and tests of the protocol"""
+    while True:
+        header = stream.readline()
+        if not header:
+            return
+        if not header.strip():
+            continue
+        size = int(header)
+        payload = read_exact(stream, size)
+        if len(payload) < size:
+            raise ValueError(f"Truncated frame: expected {size} bytes, got {len(payload)}")
+        stream.readline()
+        yield json.loads(payload.decode('utf-8'))
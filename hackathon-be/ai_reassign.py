@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Incremental Re-assignment
+Re-plans a project from its previous userTaskMapping instead of from scratch. Rows
+of removed tasks and of members who left are dropped, completed tasks stop counting
+toward anyone's workload, and every other row stays where it is unless it takes its
+member over the 40% cap. Only new tasks and teams left below their minimum head
+count go to the local solver, so a small change costs milliseconds and moves few
+assignments.
+"""
+
+import json
+from pathlib import Path
+
+from ai_assigner import TASK_TYPE_HEADCOUNT, LocalAssigner
+from ai_names import MemberIndex
+from ai_pipeline import WorkloadBalance
+from ai_scoring import normalize_task
+
+def _task_key(task_id):
+    return str(task_id or '').strip().upper()
+
+def _group(user_task_mapping):
+    teams = {}
+    for row in user_task_mapping:
+        teams.setdefault(_task_key(row.get('taskId')), []).append(row)
+    return teams
+
+def reassign(task_analysis, user_data, previous_mapping, completed=(), pinned=(), history=None):
+    """Re-assign a project after a change; returns (user_task_mapping, task_assignment, stats).
+
+    `previous_mapping` is the userTaskMapping of the last run and `task_analysis`
+    the current tasks (new ones included, removed ones gone). `completed` and
+    `pinned` are Task IDs: completed tasks keep their rows as they were, pinned
+    tasks keep theirs even over the cap. `stats` counts the rows kept, dropped
+    (removed tasks, departed members, over the cap) and added. `history` goes to the
+    solver that tops teams up (see LocalAssigner).
+    """
+    done = {_task_key(t) for t in completed or ()}
+    locked = {_task_key(t) for t in pinned or ()}
+    tasks = {}
+    for row in task_analysis:
+        tasks.setdefault(_task_key(row.get('taskId')), row)
+    balance = WorkloadBalance(user_data)
+    balance.add_tasks([row for key, row in tasks.items() if key not in done])
+
+    stats = {"kept": 0, "removedTask": 0, "departed": 0, "overCap": 0, "added": 0}
+    finished = {}
+    hard = []
+    soft = []
+    for key, rows in _group(previous_mapping).items():
+        if key not in tasks:
+            stats['removedTask'] += len(rows)
+            continue
+        if key in done:
+            finished[key] = rows
+            continue
+        present = [row for row in rows if balance.member_index(row.get('MemberName')) is not None]
+        stats['departed'] += len(rows) - len(present)
+        (hard if key in locked else soft).extend(present)
+
+    # Pinned rows are booked first, so the cap squeezes the movable ones
+    kept = balance.admit(hard, capped=False)
+    admitted = balance.admit(soft, fallback=False)
+    stats['overCap'] = len(soft) - len(admitted)
+    teams = _group(kept + admitted)
+    stats['kept'] = len(kept) + len(admitted)
+
+    # New tasks and teams that lost members are topped up to their minimum head count
+    short = []
+    for key, row in tasks.items():
+        task_type = normalize_task(row, 0)['type']
+        need = min(TASK_TYPE_HEADCOUNT[task_type][0], len(balance.members))
+        if key not in done and len(teams.get(key, [])) < need:
+            short.append(key)
+    if short:
+        solver = LocalAssigner([tasks[key] for key in short], user_data, balance,
+                               [[balance.member_index(row['MemberName']) for row in teams.get(key, [])]
+                                for key in short], history)
+        before = [len(team) for team in solver.assigned]
+        for key, task, team in zip(short, solver.tasks, solver.solve()):
+            for m in team[before[task['index']]:]:
+                teams.setdefault(key, []).append({"taskId": task['taskId'],
+                                                  "MemberName": solver.members[m]['name']})
+                stats['added'] += 1
+
+    members = MemberIndex(user_data)
+    user_task_mapping = []
+    task_assignment = []
+    for key in tasks:
+        for mapping in finished.get(key) or teams.get(key, []):
+            user_info = members.resolve(mapping['MemberName'])
+            user_task_mapping.append(mapping)
+            task_assignment.append({
+                "taskId": mapping['taskId'],
+                "userId": user_info.get('Id', '') if user_info else '',
+                "userName": mapping['MemberName'],
+                "assigned": True
+            })
+    return user_task_mapping, task_assignment, stats
+
+def previous_plan(previous, completed=None, pinned=None):
+    """Normalize a previous plan to {"userTaskMapping", "completed", "pinned"}.
+
+    `previous` is an earlier result (dict or path to its JSON file) or its bare
+    userTaskMapping list; `completed` / `pinned` Task IDs (lists or comma-separated
+    strings) are added to any the plan already carries.
+    """
+    if isinstance(previous, (str, Path)):
+        with open(previous, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    if isinstance(previous, list):
+        previous = {"userTaskMapping": previous}
+
+    def ids(value):
+        if isinstance(value, str):
+            value = value.split(',')
+        return [str(v).strip() for v in value or () if str(v).strip()]
+
+    return {
+        "userTaskMapping": previous.get('userTaskMapping') or [],
+        "completed": ids(previous.get('completed')) + ids(completed),
+        "pinned": ids(previous.get('pinned')) + ids(pinned),
+    }
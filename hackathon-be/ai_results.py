@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Result History Store
+Keeps every analysis/assignment result in the shared local store (ai_store.py)
+instead of throwaway JSON files: one row per run, plus its task analysis rows and
+mapping rows indexed by project, Task ID, task fingerprint (the same one as
+ai_incremental.py: step + name + description) and member. Answers "tasks of
+member X across projects", "earlier analyses of this task" and "the last result
+of this project" (the starting point of --previous latest).
+
+Usage: python ai_results.py runs|member|task|export|prune ... [--project KEY]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from ai_incremental import QUERY_CHUNK, task_fingerprint
+from ai_names import name_key
+from ai_store import connect, store_path
+
+# Runs kept per project (AI_RESULT_KEEP, 0 keeps all); each project's last successful
+# run is always kept for --previous latest
+DEFAULT_KEEP_RUNS = int(os.getenv('AI_RESULT_KEEP', 50))
+
+def result_store_enabled():
+    """Results are recorded unless AI_RESULT_STORE is set to off/false/0"""
+    return os.getenv('AI_RESULT_STORE', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+def _task_name(row):
+    return str(row.get('taskName') or row.get('Tên task') or row.get('name') or '').strip()
+
+def _task_id(row):
+    return str(row.get('taskId') or row.get('Task ID') or '').strip()
+
+def _status(result):
+    """'error', 'mock' (demo data without an API key) or 'ok'; only 'ok' runs are re-used"""
+    if result.get('error'):
+        return 'error'
+    return 'mock' if result.get('mock') else 'ok'
+
+class ResultStore:
+    """Run history in SQLite (WAL): runs, run_tasks and run_assignments"""
+
+    def __init__(self, path=None, keep=None):
+        self.path = store_path(path)
+        self.keep = DEFAULT_KEEP_RUNS if keep is None else keep
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project TEXT,
+                source TEXT,
+                status TEXT NOT NULL,
+                tasks INTEGER NOT NULL,
+                mappings INTEGER NOT NULL,
+                metrics TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_project ON runs (project, id);
+            CREATE TABLE IF NOT EXISTS run_tasks (
+                run_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                project TEXT,
+                task_id TEXT NOT NULL,
+                fingerprint TEXT,
+                name TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                PRIMARY KEY (run_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS run_tasks_task ON run_tasks (project, task_id);
+            CREATE INDEX IF NOT EXISTS run_tasks_run_task ON run_tasks (run_id, task_id);
+            CREATE INDEX IF NOT EXISTS run_tasks_fingerprint ON run_tasks (fingerprint);
+            CREATE INDEX IF NOT EXISTS run_tasks_name ON run_tasks (name);
+            CREATE TABLE IF NOT EXISTS run_assignments (
+                run_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                project TEXT,
+                task_id TEXT NOT NULL,
+                member_key TEXT NOT NULL,
+                member_name TEXT NOT NULL,
+                user_id TEXT,
+                PRIMARY KEY (run_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS run_assignments_member ON run_assignments (member_key, run_id);
+            CREATE INDEX IF NOT EXISTS run_assignments_task ON run_assignments (project, task_id);
+        """)
+        self._conn.commit()
+
+    def save_run(self, result, project=None, source=None, fingerprints=None):
+        """Record a result dict and return its run id.
+
+        `fingerprints` maps Task IDs to their task fingerprints (analyze_tasks fills it);
+        rows without one are stored without a fingerprint.
+        """
+        fingerprints = fingerprints or {}
+        task_analysis = result.get('taskAnalysis') or []
+        user_task_mapping = result.get('userTaskMapping') or []
+        user_ids = {}
+        for assignment in result.get('taskAssignment') or []:
+            key = (str(assignment.get('taskId', '')).upper(), name_key(assignment.get('userName') or ''))
+            user_ids.setdefault(key, assignment.get('userId'))
+        metrics = result.get('metrics')
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO runs (project, source, status, tasks, mappings, metrics, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (project, source, _status(result), len(task_analysis),
+                 len(user_task_mapping), json.dumps(metrics) if metrics else None, time.time())
+            )
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                'INSERT INTO run_tasks (run_id, position, project, task_id, fingerprint, name, analysis) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, i, project, _task_id(row), fingerprints.get(_task_id(row)), _task_name(row),
+                  json.dumps(row, ensure_ascii=False))
+                 for i, row in enumerate(task_analysis)]
+            )
+            rows = []
+            for i, mapping in enumerate(user_task_mapping):
+                task_id = _task_id(mapping)
+                name = str(mapping.get('MemberName') or '')
+                rows.append((run_id, i, project, task_id, name_key(name), name,
+                             user_ids.get((task_id.upper(), name_key(name)))))
+            self._conn.executemany(
+                'INSERT INTO run_assignments (run_id, position, project, task_id, member_key, member_name, user_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+        if self.keep:
+            self.prune(self.keep)
+        return run_id
+
+    def prune(self, keep):
+        """Delete all but the `keep` newest runs of each project (and its last successful
+        run); returns the number of runs deleted"""
+        with self._lock:
+            stale = [run_id for run_id, in self._conn.execute(
+                "SELECT id FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY COALESCE(project, '') "
+                "ORDER BY id DESC) AS rank FROM runs) WHERE rank > ? AND id NOT IN "
+                "(SELECT MAX(id) FROM runs WHERE status = 'ok' GROUP BY COALESCE(project, ''))", (keep,)
+            ).fetchall()]
+            for start in range(0, len(stale), QUERY_CHUNK):
+                chunk = stale[start:start + QUERY_CHUNK]
+                marks = ', '.join('?' * len(chunk))
+                for table in ('run_tasks', 'run_assignments'):
+                    self._conn.execute(f'DELETE FROM {table} WHERE run_id IN ({marks})', chunk)
+                self._conn.execute(f'DELETE FROM runs WHERE id IN ({marks})', chunk)
+            self._conn.commit()
+        return len(stale)
+
+    def runs(self, project=None, limit=20):
+        """Latest runs, newest first, optionally of one project"""
+        query = 'SELECT id, project, source, status, tasks, mappings, created_at FROM runs'
+        params = []
+        if project is not None:
+            query += ' WHERE project = ?'
+            params.append(project)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{"runId": r[0], "project": r[1], "source": r[2], "status": r[3], "tasks": r[4],
+                 "mappings": r[5], "createdAt": r[6]} for r in rows]
+
+    def latest_run_id(self, project):
+        with self._lock:
+            row = self._conn.execute('SELECT MAX(id) FROM runs WHERE project IS ? AND status = ?',
+                                     (project, 'ok')).fetchone()
+        return row[0]
+
+    def load_run(self, run_id):
+        """The result dict of a run (taskAnalysis, taskAssignment, userTaskMapping), or None"""
+        with self._lock:
+            if not self._conn.execute('SELECT 1 FROM runs WHERE id = ?', (run_id,)).fetchone():
+                return None
+            tasks = self._conn.execute(
+                'SELECT analysis FROM run_tasks WHERE run_id = ? ORDER BY position', (run_id,)).fetchall()
+            mappings = self._conn.execute(
+                'SELECT task_id, member_name, user_id FROM run_assignments WHERE run_id = ? ORDER BY position',
+                (run_id,)).fetchall()
+        return {
+            "taskAnalysis": [json.loads(analysis) for analysis, in tasks],
+            "taskAssignment": [{"taskId": task_id, "userId": user_id or '', "userName": name, "assigned": True}
+                               for task_id, name, user_id in mappings],
+            "userTaskMapping": [{"taskId": task_id, "MemberName": name} for task_id, name, _ in mappings],
+        }
+
+    def latest_result(self, project):
+        """The last successful result of a project, or None"""
+        run_id = self.latest_run_id(project)
+        return self.load_run(run_id) if run_id is not None else None
+
+    def member_tasks(self, member_name, project=None, latest_only=True):
+        """Tasks assigned to a member, newest run first, across projects unless `project` is given.
+
+        With latest_only only each project's last successful run counts, so
+        superseded plans don't show up; runs without a project count as one project.
+        """
+        query = ('SELECT a.project, a.run_id, a.task_id, t.name, t.analysis, r.created_at '
+                 'FROM run_assignments a JOIN runs r ON r.id = a.run_id '
+                 'LEFT JOIN run_tasks t ON t.run_id = a.run_id AND t.task_id = a.task_id '
+                 'WHERE a.member_key = ?')
+        params = [name_key(member_name)]
+        if project is not None:
+            query += ' AND a.project = ?'
+            params.append(project)
+        if latest_only:
+            query += (" AND a.run_id IN (SELECT MAX(id) FROM runs WHERE status = 'ok' "
+                      "GROUP BY COALESCE(project, ''))")
+        query += ' ORDER BY a.run_id DESC, a.position'
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{"project": p, "runId": run_id, "taskId": task_id, "taskName": name or '',
+                 "analysis": json.loads(analysis) if analysis else None, "createdAt": created}
+                for p, run_id, task_id, name, analysis, created in rows]
+
+    def task_history(self, task_id=None, project=None, name=None, limit=20, description=None, step=None):
+        """Earlier analyses of a task, newest first: by Task ID (within `project`), or across
+        projects by name, or by its fingerprint when the description or step is given too"""
+        if name and (description or step):
+            where, params = 't.fingerprint = ?', [task_fingerprint(name, description or '', step or '')]
+        elif name:
+            where, params = 't.name = ?', [name.strip()]
+        else:
+            where, params = 't.project IS ? AND t.task_id = ?', [project, task_id]
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT t.project, t.run_id, t.task_id, t.analysis, r.created_at FROM run_tasks t '
+                f'JOIN runs r ON r.id = t.run_id WHERE {where} ORDER BY t.run_id DESC LIMIT ?',
+                params + [limit]
+            ).fetchall()
+        return [{"project": p, "runId": run_id, "taskId": tid, "analysis": json.loads(analysis),
+                 "createdAt": created} for p, run_id, tid, analysis, created in rows]
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the result history")
+    parser.add_argument('command', choices=['runs', 'member', 'task', 'export', 'prune'])
+    parser.add_argument('value', nargs='?',
+                        help="member name (member), Task ID or --name (task), run id or 'latest' (export), "
+                             "runs to keep per project (prune)")
+    parser.add_argument('--project')
+    parser.add_argument('--name', help="task: look the task up by name across projects")
+    parser.add_argument('--description', help="task: with --name, match the task's fingerprint")
+    parser.add_argument('--step', help="task: with --name, match the task's fingerprint")
+    parser.add_argument('--all-runs', action='store_true', help="member: include superseded runs")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--path', help="store path (AI_STORE_PATH)")
+    args = parser.parse_args()
+
+    store = ResultStore(args.path)
+    if args.command == 'prune':
+        output = {"deleted": store.prune(int(args.value or store.keep or 0))}
+    elif args.command == 'runs':
+        output = store.runs(args.project, args.limit)
+    elif args.command == 'member':
+        output = store.member_tasks(args.value, args.project, not args.all_runs)
+    elif args.command == 'task':
+        output = store.task_history(args.value, args.project, args.name, args.limit, args.description, args.step)
+    else:
+        output = (store.latest_result(args.project) if args.value in (None, 'latest')
+                  else store.load_run(int(args.value)))
+        if output is None:
+            print("No such run", file=sys.stderr)
+            sys.exit(1)
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
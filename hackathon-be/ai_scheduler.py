@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+LLM Call Scheduler
+Client-side admission control around generate_content: token buckets for the
+request and input-token budgets that back off when the API throttles, exponential
+backoff with jitter for 429/5xx errors within a per-call deadline, and coalescing
+of identical prompts already in flight. Exposes queue depth and wait-time metrics.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# HTTP statuses and google.api_core exception names worth another attempt
+RETRYABLE_CODES = frozenset({429, 500, 502, 503, 504})
+RETRYABLE_ERRORS = frozenset({'ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable',
+                              'InternalServerError', 'BadGateway', 'GatewayTimeout', 'DeadlineExceeded',
+                              'EmptyFirstChunk'})
+THROTTLE_ERRORS = frozenset({'ResourceExhausted', 'TooManyRequests'})
+
+# A throttled call halves the request rate; every success wins back this share of the target
+RATE_DECREASE = 0.5
+RATE_RECOVERY = 0.05
+MIN_RATE_SHARE = 0.05
+# Without a configured request budget, the first 429 starts one from the rate seen over this window
+OBSERVED_WINDOW = 1.0
+
+class DeadlineExceeded(TimeoutError):
+    """The call could not be admitted or retried before its deadline"""
+
+class EmptyFirstChunk(ValueError):
+    """A stream's first chunk carried no text (empty or blocked candidate)"""
+
+def estimate_tokens(text):
+    """Rough input-token count (~4 characters per token for Gemini)"""
+    return max(1, len(text) // 4)
+
+def _status(error):
+    code = getattr(error, 'code', None)
+    return code if isinstance(code, int) else None
+
+def is_retryable(error):
+    """Quota, overload and transient server errors"""
+    return _status(error) in RETRYABLE_CODES or type(error).__name__ in RETRYABLE_ERRORS
+
+def is_throttle(error):
+    """429 / quota exhausted: the server asks us to slow down"""
+    return _status(error) == 429 or type(error).__name__ in THROTTLE_ERRORS
+
+def _env_number(name, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+def budget_share(workers, requests_per_minute=None, tokens_per_minute=None, max_in_flight=None):
+    """Scheduler options giving each of `workers` processes its share of the configured budgets"""
+    requests_per_minute = requests_per_minute or _env_number('AI_RATE_LIMIT')
+    tokens_per_minute = tokens_per_minute or _env_number('AI_TOKEN_LIMIT')
+    max_in_flight = max_in_flight or _env_number('AI_MAX_IN_FLIGHT', int)
+    share = {}
+    if requests_per_minute:
+        share['requests_per_minute'] = requests_per_minute / workers
+    if tokens_per_minute:
+        share['tokens_per_minute'] = tokens_per_minute / workers
+    if max_in_flight:
+        share['max_in_flight'] = max(1, max_in_flight // workers)
+    return share
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`. Reservations may go into
+    debt, so callers are served in arrival order and each sleeps for its own share.
+
+    The rate adapts (AIMD): slow_down() halves it, once per 429 from a call whose
+    budget was reserved after the previous slow-down (earlier calls were paced at the
+    old rate), recover() wins back a share of target_rate, or grows by that share when there
+    is no configured target. Not thread-safe on its own; the Scheduler calls it
+    under its lock.
+    """
+
+    def __init__(self, rate, capacity=None, target_rate=None):
+        self.target_rate = target_rate
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._slowed = float('-inf')
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """Take amount (capped at capacity) and return the seconds until it is available"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount, now):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+    def slow_down(self, now, admitted):
+        if admitted < self._slowed:
+            return
+        self._refill(now)
+        floor = (self.target_rate or self.rate) * MIN_RATE_SHARE
+        self.rate = max(floor, self.rate * RATE_DECREASE)
+        self._slowed = now
+
+    def recover(self):
+        if self.target_rate:
+            self.rate = min(self.target_rate, self.rate + self.target_rate * RATE_RECOVERY)
+        else:
+            self.rate += self.rate * RATE_RECOVERY
+
+class Scheduler:
+    """Shared admission control for every LLM call of the process.
+
+    requests_per_minute / tokens_per_minute / max_in_flight are optional budgets
+    (AI_RATE_LIMIT, AI_TOKEN_LIMIT, AI_MAX_IN_FLIGHT). Retryable errors are retried
+    up to max_retries times (AI_LLM_RETRIES) with full-jitter exponential backoff
+    starting at base_delay, honouring a `retry_after` hint, as long as the call's
+    deadline (AI_LLM_DEADLINE seconds) allows it.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, max_in_flight=None,
+                 max_retries=None, base_delay=None, max_delay=None, deadline=None, seed=None):
+        requests_per_minute = requests_per_minute or _env_number('AI_RATE_LIMIT')
+        tokens_per_minute = tokens_per_minute or _env_number('AI_TOKEN_LIMIT')
+        max_in_flight = max_in_flight or _env_number('AI_MAX_IN_FLIGHT', int)
+        self.requests = (TokenBucket(requests_per_minute / 60.0, target_rate=requests_per_minute / 60.0)
+                         if requests_per_minute else None)
+        self.tokens = (TokenBucket(tokens_per_minute / 60.0, tokens_per_minute, tokens_per_minute / 60.0)
+                       if tokens_per_minute else None)
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('AI_LLM_RETRIES', 5))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv('AI_LLM_BACKOFF', 1.0))
+        self.max_delay = max_delay if max_delay is not None else 30.0
+        self.deadline = deadline if deadline is not None else float(os.getenv('AI_LLM_DEADLINE', 120))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._starts = deque()
+        self._pending = {}
+        self._metrics = {
+            "requests": 0, "succeeded": 0, "failed": 0, "retries": 0, "throttled": 0,
+            "coalesced": 0, "deadlineExceeded": 0, "queued": 0, "maxQueueDepth": 0,
+            "waitSeconds": 0.0, "maxWaitSeconds": 0.0, "backoffSeconds": 0.0,
+        }
+
+    def _admit(self, tokens, deadline):
+        """Wait for an in-flight slot and the request/token budgets; returns when its budget was reserved"""
+        started = time.monotonic()
+        with self._lock:
+            self._metrics['queued'] += 1
+            self._metrics['maxQueueDepth'] = max(self._metrics['maxQueueDepth'], self._metrics['queued'])
+            try:
+                while self.max_in_flight and self._in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._slot_free.wait(remaining):
+                        self._metrics['deadlineExceeded'] += 1
+                        raise DeadlineExceeded("timed out waiting for a free LLM slot")
+                now = time.monotonic()
+                delay = self.requests.reserve(1, now) if self.requests else 0.0
+                if self.tokens:
+                    delay = max(delay, self.tokens.reserve(tokens, now))
+                if now + delay > deadline:
+                    if self.requests:
+                        self.requests.refund(1, now)
+                    if self.tokens:
+                        self.tokens.refund(tokens, now)
+                    self._metrics['deadlineExceeded'] += 1
+                    raise DeadlineExceeded(f"rate limit wait of {delay:.1f}s exceeds the call deadline")
+                self._in_flight += 1
+                self._starts.append(now)
+                while self._starts and self._starts[0] < now - OBSERVED_WINDOW:
+                    self._starts.popleft()
+            except DeadlineExceeded:
+                self._metrics['queued'] -= 1
+                raise
+
+        # Still queued while sleeping off the budget; the in-flight slot is already held
+        if delay > 0:
+            time.sleep(delay)
+        waited = time.monotonic() - started
+        with self._lock:
+            self._metrics['queued'] -= 1
+            self._metrics['requests'] += 1
+            self._metrics['waitSeconds'] += waited
+            self._metrics['maxWaitSeconds'] = max(self._metrics['maxWaitSeconds'], waited)
+        return now
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._slot_free.notify()
+
+    def _backoff(self, attempt, error):
+        with self._lock:
+            delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = getattr(error, 'retry_after', None)
+        return max(delay, retry_after) if isinstance(retry_after, (int, float)) else delay
+
+    def _on_error(self, error, attempt, deadline, admitted):
+        """Seconds to wait before the next attempt, or re-raise when out of retries/time"""
+        throttled = is_throttle(error)
+        with self._lock:
+            if throttled:
+                self._metrics['throttled'] += 1
+                now = time.monotonic()
+                if self.requests is None:
+                    observed = max(1, len(self._starts)) / OBSERVED_WINDOW
+                    self.requests = TokenBucket(observed, capacity=1.0)
+                for bucket in (self.requests, self.tokens):
+                    if bucket:
+                        bucket.slow_down(now, admitted)
+        if not is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        delay = self._backoff(attempt, error)
+        if time.monotonic() + delay > deadline:
+            with self._lock:
+                self._metrics['deadlineExceeded'] += 1
+            raise error
+        with self._lock:
+            self._metrics['retries'] += 1
+            self._metrics['backoffSeconds'] += delay
+        return delay
+
+    def _on_success(self):
+        with self._lock:
+            self._metrics['succeeded'] += 1
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.recover()
+
+    def _failed(self):
+        with self._lock:
+            self._metrics['failed'] += 1
+
+    def call(self, fn, prompt='', deadline=None, hold=False):
+        """Run fn() under the budgets, retrying transient errors until the deadline.
+
+        With hold=True a successful call keeps its in-flight slot; the caller frees
+        it with _release() once it is done with the result (a stream).
+        """
+        deadline = time.monotonic() + (deadline or self.deadline)
+        tokens = estimate_tokens(prompt)
+        attempt = 0
+        try:
+            while True:
+                admitted = self._admit(tokens, deadline)
+                try:
+                    result = fn()
+                except Exception as e:
+                    self._release()
+                    delay = self._on_error(e, attempt, deadline, admitted)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                if not hold:
+                    self._release()
+                self._on_success()
+                return result
+        except Exception:
+            self._failed()
+            raise
+
+    def coalesced(self, key, fn):
+        """Run fn() once for concurrent callers with the same key; the others share its result"""
+        with self._lock:
+            future = self._pending.get(key)
+            leader = future is None
+            if leader:
+                future = self._pending[key] = Future()
+            else:
+                self._metrics['coalesced'] += 1
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def stats(self):
+        """Counters plus current queue depth, in-flight calls and request rate"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['inFlight'] = self._in_flight
+            if self.requests:
+                metrics['requestsPerMinute'] = round(self.requests.rate * 60, 2)
+        admitted = metrics['requests']
+        metrics['avgWaitSeconds'] = round(metrics['waitSeconds'] / admitted, 4) if admitted else 0.0
+        for key in ('waitSeconds', 'maxWaitSeconds', 'backoffSeconds'):
+            metrics[key] = round(metrics[key], 4)
+        return metrics
+
+def merge_stats(stats):
+    """One stats() dict for several schedulers (one per batch worker process)"""
+    merged = {}
+    for metrics in stats:
+        for key, value in metrics.items():
+            if key in ('maxQueueDepth', 'maxWaitSeconds'):
+                merged[key] = max(merged.get(key, 0), value)
+            elif key != 'avgWaitSeconds':
+                merged[key] = merged.get(key, 0) + value
+    admitted = merged.get('requests', 0)
+    merged['avgWaitSeconds'] = round(merged.get('waitSeconds', 0.0) / admitted, 4) if admitted else 0.0
+    for key in ('waitSeconds', 'backoffSeconds', 'requestsPerMinute'):
+        if key in merged:
+            merged[key] = round(merged[key], 4 if key != 'requestsPerMinute' else 2)
+    return merged
+
+class ScheduledModel:
+    """Routes a model's generate_content calls through a Scheduler.
+
+    Identical non-streaming prompts (with the same generation options) sent to this
+    model while one is in flight share one call.
+    Streamed calls are retried only until their first chunk arrives; after that an
+    error reaches the caller, which keeps the objects parsed so far.
+    """
+
+    def __init__(self, model, scheduler):
+        self.model = model
+        self.scheduler = scheduler
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        if stream:
+            return self._stream(prompt, kwargs)
+        call = lambda: self.scheduler.call(lambda: self.model.generate_content(prompt, **kwargs), prompt)
+        try:
+            options = json.dumps(kwargs, sort_keys=True) if kwargs else ''
+        except TypeError:
+            return call()
+        # The scheduler is shared by every backend and API key; only calls to this model coalesce
+        key = (id(self), hashlib.sha256(f"{prompt}\0{options}".encode('utf-8')).hexdigest())
+        return self.scheduler.coalesced(key, call)
+
+    def _first_chunk(self, prompt, kwargs):
+        chunks = iter(self.model.generate_content(prompt, stream=True, **kwargs))
+        for chunk in chunks:
+            # Read the text itself (chunk_text would swallow the ValueError of an empty or
+            # blocked candidate) so an error carried by the first chunk is retried too
+            try:
+                chunk.text
+            except ValueError as e:
+                raise EmptyFirstChunk(str(e)) from e
+            return chunk, chunks
+        return None, chunks
+
+    def _stream(self, prompt, kwargs):
+        # The slot stays taken until the stream is exhausted or closed
+        first, rest = self.scheduler.call(lambda: self._first_chunk(prompt, kwargs), prompt, hold=True)
+        try:
+            if first is not None:
+                yield first
+                yield from rest
+        finally:
+            self.scheduler._release()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Response Schemas
+Typed schemas for the task-analysis and mapping responses, sent to Gemini as
+`response_schema` so it answers with a bare JSON array, and a plain-Python
+validator that coerces near-misses ("high", "5", "React, Node") and reports the
+items that are still invalid so only those get repaired or re-asked.
+"""
+
+import os
+import re
+
+TASK_TYPES = ('Low', 'Medium', 'High', 'Urgent')
+WORKLOADS = ('Small', 'Medium', 'Large')
+
+TASK_ANALYSIS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "taskId": {"type": "string"},
+            "type": {"type": "string", "enum": list(TASK_TYPES)},
+            "difficulty": {"type": "string", "enum": list(TASK_TYPES)},
+            "skills": {"type": "array", "items": {"type": "string"}},
+            "workload": {"type": "string", "enum": list(WORKLOADS)},
+            "priority": {"type": "integer"},
+        },
+        "required": ["taskId", "type", "difficulty", "skills", "workload", "priority"],
+    },
+}
+
+MAPPING_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "taskId": {"type": "string"},
+            "MemberName": {"type": "string"},
+        },
+        "required": ["taskId", "MemberName"],
+    },
+}
+
+# Lowercase spellings the model uses instead of the enum values
+_TYPE_VALUES = {**{t.lower(): t for t in TASK_TYPES},
+                'easy': 'Low', 'normal': 'Medium', 'hard': 'High', 'critical': 'Urgent'}
+_WORKLOAD_VALUES = {**{w.lower(): w for w in WORKLOADS},
+                    'low': 'Small', 'light': 'Small', 'high': 'Large', 'heavy': 'Large'}
+_skill_split_re = re.compile(r'\s*[,;/]\s*')
+_int_re = re.compile(r'-?\d+')
+
+def structured_output_enabled():
+    """Request schema-constrained JSON unless AI_STRUCTURED_OUTPUT=off"""
+    return os.getenv('AI_STRUCTURED_OUTPUT', 'on').lower() not in ('0', 'off', 'false', 'no')
+
+def json_generation_config(schema):
+    """generation_config asking for a JSON response that follows schema"""
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+def _enum(value, values):
+    return values.get(str(value).strip().lower()) if isinstance(value, str) else None
+
+def _priority(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = round(value)
+    else:
+        match = _int_re.search(str(value))
+        if match is None:
+            return None
+        number = int(match.group())
+    return min(5, max(1, number))
+
+def validate_task_row(item):
+    """(row, errors): a coerced analysis row, or None and what is wrong with the item"""
+    if not isinstance(item, dict):
+        return None, ["not an object"]
+    errors = []
+    task_id = str(item.get('taskId') or item.get('Task ID') or '').strip()
+    if not task_id:
+        errors.append("taskId is missing")
+    task_type = _enum(item.get('type'), _TYPE_VALUES)
+    if task_type is None:
+        errors.append(f"type must be one of {', '.join(TASK_TYPES)}")
+    workload = _enum(item.get('workload'), _WORKLOAD_VALUES)
+    if workload is None:
+        errors.append(f"workload must be one of {', '.join(WORKLOADS)}")
+    skills = item.get('skills')
+    if isinstance(skills, str):
+        skills = _skill_split_re.split(skills)
+    skills = [str(s).strip() for s in skills if str(s).strip()] if isinstance(skills, list) else []
+    if not skills:
+        errors.append("skills must be a non-empty array of strings")
+    priority = _priority(item.get('priority'))
+    if priority is None:
+        errors.append("priority must be an integer from 1 to 5")
+    if errors:
+        return None, errors
+    # Difficulty only describes the task; the type stands in when it is unusable
+    difficulty = _enum(item.get('difficulty'), _TYPE_VALUES) or task_type
+    return {**item, "taskId": task_id, "type": task_type, "difficulty": difficulty,
+            "skills": skills, "workload": workload, "priority": priority}, []
+
+def validate_mapping_row(item, task_ids=None, members=None):
+    """(row, errors) for a mapping item; task_ids / members (a MemberIndex) check that both ends exist"""
+    if not isinstance(item, dict):
+        return None, ["not an object"]
+    errors = []
+    task_id = str(item.get('taskId') or item.get('Task ID') or '').strip()
+    name = str(item.get('MemberName') or item.get('Thành viên (tên)') or '').strip()
+    if not task_id:
+        errors.append("taskId is missing")
+    elif task_ids is not None and task_id.upper() not in task_ids:
+        errors.append(f"unknown taskId {task_id}")
+    if not name:
+        errors.append("MemberName is missing")
+    elif members is not None:
+        member = members.resolve(name)
+        if member is None:
+            errors.append(f"unknown member {name}")
+        else:
+            name = member.get('Name')
+    if errors:
+        return None, errors
+    return {"taskId": task_id, "MemberName": name}, []
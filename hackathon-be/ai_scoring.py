@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Vectorized Task/Member Scoring
+Encodes analyzed tasks and members as feature matrices and computes the full
+task x member suitability matrix in batched NumPy operations. NumPy is imported
+by SuitabilityMatrix itself, so the field parsers stay cheap for ai_prompts.py.
+"""
+
+import re
+from functools import lru_cache
+
+# Member levels by years of experience (rule 3 of PROMPT_ASSIGN)
+LEVELS = ['Fresher', 'Junior', 'Medium', 'Senior']
+LEVEL_BANDS = {'Fresher': (0, 1), 'Junior': (1, 4), 'Medium': (4, 8), 'Senior': (8, 15)}
+
+# Preferred member levels per task type (rule 1/2 of PROMPT_ASSIGN)
+TASK_TYPES = ['Low', 'Medium', 'High', 'Urgent']
+TASK_TYPE_LEVELS = {
+    'Low': ('Fresher', 'Junior'),
+    'Medium': ('Junior', 'Medium'),
+    'High': ('Medium', 'Senior'),
+    'Urgent': ('Senior', 'Medium'),
+}
+
+# Workload sizes in relative units (Small < 4h, Medium 4-16h, Large > 16h)
+WORKLOAD_UNITS = {'Small': 1.0, 'Medium': 2.0, 'Large': 4.0}
+
+# Within a level, more experience means 15-20% more work (rule 4 of PROMPT_ASSIGN)
+SAME_LEVEL_EXTRA_CAPACITY = 0.175
+
+WEIGHT_SKILL = 3.0
+WEIGHT_LEVEL = 2.0
+# Embedding cosine similarity (ai_embeddings.py), when it is blended in
+WEIGHT_SEMANTIC = 2.0
+
+# Member tokens shorter than this only match exactly, never as a substring
+MIN_SUBSTRING_TOKEN = 3
+
+_number_re = re.compile(r'\d+(?:[.,]\d+)?')
+_token_re = re.compile(r'\w+', re.UNICODE)
+_skill_split_re = re.compile(r'[,;/]')
+
+def parse_years(experience):
+    """Parse '5 years', '1.5 năm' or a number into years of experience"""
+    if isinstance(experience, (int, float)):
+        return float(experience)
+    match = _number_re.search(str(experience or ''))
+    return float(match.group().replace(',', '.')) if match else 0.0
+
+def member_level(years):
+    """Map years of experience to Fresher/Junior/Medium/Senior"""
+    if years < 1:
+        return 'Fresher'
+    if years < 4:
+        return 'Junior'
+    if years <= 8:
+        return 'Medium'
+    return 'Senior'
+
+def tokenize(text):
+    """Lowercase word tokens of a free-text string"""
+    return set(_token_re.findall(str(text).lower()))
+
+def task_skills(task):
+    """Return the skill strings of an analyzed task, whatever stage produced it"""
+    skills = task.get('skills') or task.get('mainSkill') or task.get('Kỹ năng chính') or []
+    if isinstance(skills, str):
+        skills = _skill_split_re.split(skills)
+    return [s.strip() for s in skills if s and str(s).strip()]
+
+def normalize_task(task, index):
+    """Normalize the field names used by the LLM JSON, tasks.json and markdown tables"""
+    task_type = task.get('type') or task.get('taskType') or task.get('Loại task') or 'Medium'
+    task_type = str(task_type).strip().capitalize()
+    if task_type not in TASK_TYPE_LEVELS:
+        task_type = 'Medium'
+    workload = str(task.get('workload') or task.get('Khối lượng') or 'Medium').strip().capitalize()
+    return {
+        'index': index,
+        'taskId': task.get('taskId') or task.get('Task ID') or f"TASK{index + 1:02d}",
+        'type': task_type,
+        'skills': task_skills(task),
+        'units': WORKLOAD_UNITS.get(workload, WORKLOAD_UNITS['Medium']),
+    }
+
+def normalize_member(member, index):
+    """Normalize an output_user.json style member record"""
+    years = parse_years(member.get('Experience'))
+    level = member_level(years)
+    low, high = LEVEL_BANDS[level]
+    position_in_band = min(max((years - low) / (high - low), 0.0), 1.0)
+    try:
+        deadline_misses = int(member.get('DeadlineMisses') or 0)
+    except (TypeError, ValueError):
+        deadline_misses = 0
+    return {
+        'index': index,
+        'id': str(member.get('Id', '')),
+        'name': member.get('Name', ''),
+        'years': years,
+        'level': level,
+        'capacity': 1.0 + SAME_LEVEL_EXTRA_CAPACITY * position_in_band,
+        'profile': tokenize(f"{member.get('Department', '')} {member.get('Position', '')}"),
+        'deadline_misses': deadline_misses,
+    }
+
+def level_mismatch(task_type, level):
+    """0 for the first preferred level, 0.25 for the second, distance-based otherwise"""
+    preferred = TASK_TYPE_LEVELS[task_type]
+    if level == preferred[0]:
+        return 0.0
+    if level == preferred[1]:
+        return 0.25
+    rank = LEVELS.index(level)
+    return 0.5 + 0.25 * min(abs(rank - LEVELS.index(p)) for p in preferred)
+
+@lru_cache(maxsize=None)
+def level_mismatch_table():
+    """(task type x member level) lookup table of level_mismatch"""
+    import numpy as np
+    return np.array([[level_mismatch(t, l) for l in LEVELS] for t in TASK_TYPES], dtype=np.float32)
+
+class SuitabilityMatrix:
+    """Task x member suitability for normalized tasks and members.
+
+    A skill matches a member when one of its tokens equals a Department/Position
+    token, or contains one of at least MIN_SUBSTRING_TOKEN characters ("frontend"
+    matches "Frontend/React"). `skill[t, m]` is the fraction of task t's skills
+    matched by member m, `level_mismatch[t, m]` the seniority penalty, and
+    `scores` combines both (higher is better). An optional `similarity` matrix
+    (embedding cosine similarity, tasks x members) is added with weight_semantic.
+    """
+
+    def __init__(self, tasks, members, weight_skill=WEIGHT_SKILL, weight_level=WEIGHT_LEVEL,
+                 similarity=None, weight_semantic=WEIGHT_SEMANTIC):
+        import numpy as np
+        self.tasks = tasks
+        self.members = members
+
+        # Member side: token incidence (members x vocab)
+        vocab = {}
+        for member in members:
+            for token in member['profile']:
+                vocab.setdefault(token, len(vocab))
+        member_features = np.zeros((len(members), len(vocab)), dtype=np.float32)
+        for member in members:
+            member_features[member['index'], [vocab[t] for t in member['profile']]] = 1.0
+
+        # Task side: each distinct skill phrase is encoded once over the member vocabulary
+        phrases = {}
+        task_rows, phrase_cols, weights = [], [], []
+        for task in tasks:
+            skills = task['skills']
+            for skill in skills:
+                phrase = phrases.setdefault(skill.lower(), len(phrases))
+                task_rows.append(task['index'])
+                phrase_cols.append(phrase)
+                weights.append(1.0 / len(skills))
+        phrase_features = np.zeros((len(phrases), len(vocab)), dtype=np.float32)
+        for phrase, row in phrases.items():
+            tokens = tokenize(phrase)
+            for token, col in vocab.items():
+                if token in tokens or (len(token) >= MIN_SUBSTRING_TOKEN and token in phrase):
+                    phrase_features[row, col] = 1.0
+        task_phrases = np.zeros((len(tasks), len(phrases)), dtype=np.float32)
+        np.add.at(task_phrases, (task_rows, phrase_cols), weights)
+
+        phrase_matches = (phrase_features @ member_features.T) > 0
+        self.skill = task_phrases @ phrase_matches.astype(np.float32)
+
+        task_types = np.array([TASK_TYPES.index(t['type']) for t in tasks], dtype=np.intp)
+        member_levels = np.array([LEVELS.index(m['level']) for m in members], dtype=np.intp)
+        self.level_mismatch = level_mismatch_table()[task_types[:, None], member_levels[None, :]]
+
+        self.scores = weight_skill * self.skill - weight_level * self.level_mismatch
+        if similarity is not None:
+            self.scores = self.scores + weight_semantic * np.asarray(similarity, dtype=np.float32)
+
+    def top_k(self, k):
+        """Return (member indexes, scores) of the k best members per task, best first"""
+        import numpy as np
+        k = min(k, self.scores.shape[1])
+        if k == 0:
+            empty = np.zeros((self.scores.shape[0], 0))
+            return empty.astype(np.intp), empty
+        # argpartition is O(members) per task; only the k survivors get sorted,
+        # with ties broken by member index
+        candidates = np.argpartition(-self.scores, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(self.scores, candidates, axis=1)
+        order = np.lexsort((candidates, -candidate_scores), axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        return candidates, np.take_along_axis(self.scores, candidates, axis=1)
+
+def build_matrix(task_analysis, user_data):
+    """Normalize raw analyzed tasks and member records and score them"""
+    tasks = [normalize_task(t, i) for i, t in enumerate(task_analysis)]
+    members = [normalize_member(m, i) for i, m in enumerate(user_data)]
+    return SuitabilityMatrix(tasks, members)
+
+def top_candidates(task_analysis, user_data, k=5):
+    """Top-k member shortlist per task as {taskId: [{"userId", "userName", "score"}]}"""
+    matrix = build_matrix(task_analysis, user_data)
+    indexes, scores = matrix.top_k(k)
+    shortlist = {}
+    for task, row, row_scores in zip(matrix.tasks, indexes, scores):
+        shortlist[task['taskId']] = [
+            {"userId": matrix.members[m]['id'], "userName": matrix.members[m]['name'], "score": round(float(s), 4)}
+            for m, s in zip(row, row_scores)
+        ]
+    return shortlist
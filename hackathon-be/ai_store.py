@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Shared Local Store
+One SQLite database in WAL mode (.cache/ai_store.sqlite3, AI_STORE_PATH) holds the
+Gemini response cache, the incremental task analysis rows and the result history,
+so readers in worker threads and other processes never block the writer.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).parent / '.cache'
+DEFAULT_STORE_PATH = CACHE_DIR / 'ai_store.sqlite3'
+
+def store_path(path=None):
+    """The shared store path: `path`, then AI_STORE_PATH, then the default"""
+    return Path(path or os.getenv('AI_STORE_PATH') or DEFAULT_STORE_PATH)
+
+def connect(path):
+    """A WAL-mode connection that can be shared by threads (callers serialize with a lock)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL keeps the database consistent on a crash; NORMAL only risks the last commits
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
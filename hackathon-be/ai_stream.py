@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Streaming JSON Array Parser
+Incrementally extracts the objects of a JSON array from LLM output as the text
+arrives, so each task-analysis or mapping row can be used as soon as it is complete.
+"""
+
+import json
+import re
+
+# Characters that can change the parser state; everything else is skipped in bulk
+_special_re = re.compile(r'["\\{}\[\]]')
+
+class JsonArrayParser:
+    """Feed text chunks, get back the complete top-level objects of the first JSON array.
+
+    Prose or code fences around the array are ignored. An array starts at a '['
+    whose next non-blank character is '{' or ']', which skips bracketed prose such
+    as "[TASK01]". Objects that fail to decode are dropped; a truncated response
+    still yields every object that was closed before the cut.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self._candidate = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._partial = []
+
+    def feed(self, text):
+        """Consume a chunk of text and return the objects it completed"""
+        objects = []
+        if self.finished or not text:
+            return objects
+
+        pos = 0
+        if self._escape:
+            self._escape = False
+            pos = 1
+        # Index in `text` where the object being collected starts, if it started here
+        object_start = 0 if self._depth > 0 else None
+
+        if self._candidate:
+            pos = self._confirm_start(text, pos)
+
+        matches = _special_re.finditer(text, pos)
+        for match in matches:
+            i = match.start()
+            if i < pos:
+                continue
+            ch = match.group()
+
+            if self._in_string:
+                if ch == '\\':
+                    if i + 1 >= len(text):
+                        self._escape = True
+                    pos = i + 2
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if not self.started:
+                if ch == '[':
+                    self._candidate = True
+                    pos = self._confirm_start(text, i + 1)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 0:
+                    if ch == '[':
+                        # Nested arrays directly in the top-level array are not rows
+                        self._depth += 1
+                        object_start = None
+                        continue
+                    object_start = i
+                    self._partial = []
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 0:
+                    if ch == ']':
+                        self.finished = True
+                        return objects
+                    continue
+                self._depth -= 1
+                if self._depth == 0 and object_start is not None:
+                    raw = ''.join(self._partial) + text[object_start:i + 1]
+                    self._partial = []
+                    object_start = None
+                    try:
+                        value = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if isinstance(value, dict):
+                        objects.append(value)
+
+        if self._depth > 0 and object_start is not None:
+            self._partial.append(text[object_start:])
+        return objects
+
+    @property
+    def balanced(self):
+        """True between top-level objects: no object or string is open"""
+        return self._depth == 0 and not self._in_string and not self._candidate
+
+    def _confirm_start(self, text, pos):
+        """Look past a candidate '[' for the first non-blank character"""
+        rest = text[pos:].lstrip()
+        if not rest:
+            # Undecided until more text arrives
+            return len(text)
+        self._candidate = False
+        if rest[0] in '{]':
+            self.started = True
+            return len(text) - len(rest)
+        return pos
+
+def chunk_text(chunk):
+    """Text of a streamed response chunk; chunks without text parts (e.g. the final
+    finish-reason chunk) raise ValueError on `.text` in the SDK"""
+    try:
+        return chunk.text or ''
+    except ValueError:
+        return ''
+
+def iter_json_objects(chunks):
+    """Yield the objects of the first JSON array found across an iterable of text chunks"""
+    parser = JsonArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.finished:
+            break
+
+def parse_json_objects(text):
+    """All complete objects of the first JSON array in a full response text"""
+    return list(iter_json_objects([text]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: embedding index and nearest-member queries
+Embeds a synthetic project's tasks and members into a fresh index (cold), again
+from the memory-mapped store (warm, as a later run would), and times the batched
+top-k query against one matrix-vector product per task.
+
+Usage: python benchmarks/bench_embeddings.py [--tasks 5000] [--members 200] [--k 5] [--model NAME]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from workload import Workload
+
+def timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return (time.perf_counter() - start) * 1000, value
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--model', help="sentence-transformers model (default: hashing embedder)")
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    import numpy as np
+    from ai_embeddings import EmbeddingIndex, get_embedder, member_text, task_text, top_k
+
+    workload = Workload(42, skew=1.0)
+    tasks = [{"taskName": t['name'], "description": t['description']} for t in workload.tasks(args.tasks)]
+    members = workload.members(args.members)
+    texts = [task_text(t) for t in tasks] + [member_text(m) for m in members]
+    embedder = get_embedder(args.model)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_ms, _ = timed(lambda: EmbeddingIndex(embedder, tmp).embed(texts))
+        warm_ms, vectors = timed(lambda: EmbeddingIndex(embedder, tmp).embed(texts))
+        size = sum(f.stat().st_size for f in Path(tmp).rglob('*') if f.is_file())
+    task_vectors, member_vectors = vectors[:args.tasks], vectors[args.tasks:]
+    batched_ms, (_, scores) = timed(lambda: top_k(task_vectors, member_vectors, args.k))
+
+    def per_task():
+        return [np.sort(member_vectors @ row)[::-1][:args.k] for row in task_vectors]
+    loop_ms, loop_scores = timed(per_task)
+    # Members with identical profiles tie, so the shortlists are compared by score
+    agree = float(np.mean([np.allclose(a, b, atol=1e-5) for a, b in zip(scores, loop_scores)]))
+
+    result = {"embedder": embedder.name, "texts": len(texts), "coldEmbedMs": round(cold_ms, 1),
+              "warmEmbedMs": round(warm_ms, 1), "indexMb": round(size / 2**20, 2),
+              "topkBatchedMs": round(batched_ms, 1), "topkLoopMs": round(loop_ms, 1), "agreement": agree}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for name, value in result.items():
+        print(f"{name:<14} {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming task file loader
+Writes a synthetic backlog export (CSV, NDJSON and a JSON {"tasks": [...]} document)
+and compares reading it record by record through ai_loader.py with loading it
+whole (f.read() + json.loads, or pandas.read_csv + a list comprehension over
+df.values as model.py did): wall time and tracemalloc peak. This measures the
+reader alone; a full run still keeps one compact entry per task.
+
+Usage: python benchmarks/bench_loader.py [--rows 100000] [--dir /tmp]
+"""
+
+import argparse
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai_incremental import task_entries
+from ai_loader import iter_task_items
+
+WORDS = ['Thiết kế', 'API', 'giao diện', 'cơ sở dữ liệu', 'kiểm thử', 'triển khai', 'tối ưu', 'bảo mật',
+         'React', 'Docker', 'thanh toán', 'đăng nhập', 'báo cáo', 'thông báo', 'tìm kiếm']
+
+def write_exports(directory, rows, rng):
+    """tasks.csv, tasks.ndjson and tasks.json holding the same rows"""
+    records = [{
+        "Issue key": f"PRJ-{i + 1}",
+        "Summary": f"{' '.join(rng.sample(WORDS, 3))} #{i + 1}",
+        "Description": ' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 25))),
+        "Status": rng.choice(['To Do', 'In Progress', 'Done']),
+    } for i in range(rows)]
+    paths = {}
+    paths['csv'] = directory / 'tasks.csv'
+    with open(paths['csv'], 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(records[0]))
+        writer.writeheader()
+        writer.writerows(records)
+    paths['ndjson'] = directory / 'tasks.ndjson'
+    with open(paths['ndjson'], 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    paths['json'] = directory / 'tasks.json'
+    with open(paths['json'], 'w', encoding='utf-8') as f:
+        json.dump({"project": "PRJ", "tasks": records}, f, ensure_ascii=False, indent=2)
+    return paths
+
+def stream_count(path):
+    return sum(1 for task in task_entries(iter_task_items(path)) if task['name'])
+
+def whole_count(path):
+    """The previous approach: everything in memory at once"""
+    if path.suffix == '.csv':
+        import pandas as pd
+        df = pd.read_csv(path, encoding="utf-8-sig")
+        lines = [f"{row[0]}{(' - ' + str(row[1])) if len(row)>1 else ''}" for row in df.values]
+        return len([x for x in lines if x.strip()])
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.suffix == '.ndjson':
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        data = json.loads(text)['tasks']
+    return sum(1 for task in task_entries(data) if task['name'])
+
+def measure(fn, path):
+    """(rows, seconds, peak MB); timed in a separate untraced run since tracemalloc slows allocation"""
+    start = time.perf_counter()
+    count = fn(path)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak / 2**20
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--dir', help="where to write the exports (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        paths = write_exports(Path(tmp), args.rows, random.Random(42))
+        print(f"{'format':<7} {'file MB':>8} {'rows':>8} {'whole s':>8} {'whole MB':>9} "
+              f"{'stream s':>9} {'stream MB':>10}")
+        # Imported up front so its import cost stays out of the CSV measurement
+        import pandas  # noqa: F401
+        for fmt, path in paths.items():
+            whole = measure(whole_count, path)
+            streamed = measure(stream_count, path)
+            assert whole[0] == streamed[0] == args.rows, f"{fmt}: {whole[0]} / {streamed[0]} rows"
+            print(f"{fmt:<7} {path.stat().st_size / 2**20:>8.1f} {streamed[0]:>8} {whole[1]:>8.2f} "
+                  f"{whole[2]:>9.1f} {streamed[1]:>9.2f} {streamed[2]:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: markdown table parsing
+Times the shared single-pass parser (ai_markdown.py) on synthetic LLM responses
+with growing tables (per-line cost should stay flat) and checks its mapping
+extraction (memoized name clean-up) against the previous regex-per-line
+implementation.
+
+Usage: python benchmarks/bench_markdown.py [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai_markdown import extract_mapping_rows, parse_tables
+
+MEMBERS = ['A', 'B', 'C', 'D (Senior 8 năm KN)', 'E - Junior Developer', 'F (Fresher)', 'G', 'H (Medium 5 năm)']
+TYPES = ['Low', 'Medium', 'High', 'Urgent']
+
+def make_response(rows, rng):
+    """An assignment answer: prose, a detail table and the mapping table"""
+    lines = ["Dưới đây là kết quả phân chia task:", "",
+             "| Task ID | Tên task | Loại task | Thành viên thực hiện (tên, vai trò, số năm KN) | Lý do phân chia |",
+             "|---|---|---|---|---|"]
+    for i in range(rows):
+        members = ', '.join(rng.sample(MEMBERS, rng.randint(1, 3)))
+        lines.append(f"| TASK{i + 1:02d} | Task {i + 1} | {rng.choice(TYPES)} | {members} | Phù hợp kỹ năng |")
+    lines += ["", "Bảng mapping:", "", "| Task ID | Thành viên (tên) |", "|---|---|"]
+    for i in range(rows):
+        for member in rng.sample(MEMBERS, rng.randint(1, 2)):
+            lines.append(f"| TASK{i + 1:02d} | {member} |")
+    return "\n".join(lines) + "\n"
+
+def legacy_clean_member_name(name_str):
+    """Reference implementation of the name clean-up that used to live inside extract_mapping_user_task"""
+    if not name_str or name_str.strip() == "":
+        return ""
+    cleaned = re.sub(r'[\(\[\{][^\)\]\}]*[\)\]\}]', '', name_str).strip()
+    cleaned = re.sub(r'\s*(KN|năm|years?)\s*\)?\s*$', '', cleaned, flags=re.IGNORECASE).strip()
+    first_part = re.split(r'[\-,|]', cleaned)[0].strip()
+    if not first_part:
+        return ""
+    if len(first_part) == 1 and first_part.isalpha():
+        return first_part
+    if first_part.lower() in ['kn', 'năm', 'years', 'kinh nghiệm'] or first_part.isdigit():
+        return ""
+    role_keywords = ['fresher', 'junior', 'senior', 'medium', 'developer', 'engineer', 'tester', 'qa']
+    words = first_part.split()
+    if len(words) == 1 and not any(keyword in words[0].lower() for keyword in role_keywords):
+        return words[0]
+    filtered_words = [w for w in words
+                      if not any(keyword in w.lower() for keyword in role_keywords) and not w.isdigit()]
+    return ' '.join(filtered_words).strip()
+
+def legacy_mapping_rows(markdown_text):
+    """Reference implementation: findall over the text, then uncompiled regexes per line"""
+    tables = re.findall(r"((?:\|[^\n]*\|\n)+)", markdown_text)
+    for tbl in tables:
+        lines = [line for line in tbl.split('\n') if line.strip().startswith('|')]
+        if len(lines) < 2:
+            continue
+        header_idx = 0
+        separator_idx = -1
+        for i, line in enumerate(lines):
+            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", line):
+                separator_idx = i
+                if i > 0:
+                    header_idx = i - 1
+                break
+        data_start_idx = 1 if separator_idx == -1 else separator_idx + 1
+        header = [h.strip().lower() for h in lines[header_idx].strip("|").split("|")]
+        idx_task = idx_user = None
+        for i, h in enumerate(header):
+            if 'task' in h and 'id' in h:
+                idx_task = i
+            elif 'tên' in h:
+                idx_user = i
+        if idx_task is None or idx_user is None:
+            continue
+        mapping = []
+        for row in lines[data_start_idx:]:
+            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", row):
+                continue
+            cells = [c.strip() for c in row.strip("|").split("|")]
+            if len(cells) <= max(idx_task, idx_user) or not cells[idx_task] or not cells[idx_user]:
+                continue
+            for u in re.split(r'[;,/]', cells[idx_user]):
+                name_only = legacy_clean_member_name(u.strip())
+                if name_only and name_only.isalpha():
+                    mapping.append((cells[idx_task], name_only))
+        if mapping:
+            return mapping
+    return []
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,5000,10000,50000,100000')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'rows':>7} {'lines':>7} {'tables ms':>10} {'us/line':>8} {'mapping ms':>11} {'legacy ms':>10}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        text = make_response(size, rng)
+        line_count = text.count('\n')
+        tables_time, tables = timed(lambda: parse_tables(text))
+        mapping_time, rows = timed(lambda: extract_mapping_rows(text))
+        legacy_time, reference = timed(lambda: legacy_mapping_rows(text))
+        assert len(tables) == 2
+        assert [tuple(r) for r in rows] == reference
+        print(f"{size:>7} {line_count:>7} {tables_time * 1000:10.1f} {tables_time * 1e6 / line_count:8.2f} "
+              f"{mapping_time * 1000:11.1f} {legacy_time * 1000:10.1f}")
+
+if __name__ == "__main__":
+    main()
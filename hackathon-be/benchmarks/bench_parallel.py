@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: post-processing in 1..N worker processes
+Times the CPU-bound stages with a growing process pool (ai_parallel.py): parsing
+and validating one large mapping response, and a batch of synthetic projects run
+offline (stub backend, local solver). Reports the speedup over one process and
+checks that every worker count produces the same rows and output files. Pool
+start-up is paid by an untimed first round.
+
+Usage: python benchmarks/bench_parallel.py [--workers 1,2,4] [--items 60000] [--projects 8] [--tasks 300]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from workload import Workload
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def mapping_response(items, members, workload):
+    """A pretty-printed JSON mapping response with prose around it, as the model writes it"""
+    rng = workload.rng
+    rows = [{"taskId": f"TASK{i + 1:05d}",
+             "MemberName": f"{rng.choice(members)['Name']} ({rng.choice(['Junior', 'Senior'])}, {rng.randint(1, 9)} năm)"}
+            for i in range(items)]
+    text = "Kết quả phân công:\n```json\n" + json.dumps(rows, ensure_ascii=False, indent=2) + "\n```\n"
+    return text, {"taskIds": [row['taskId'] for row in rows], "members": members}
+
+def bench_response(worker_counts, items, member_count, repeat, workload):
+    import ai_parallel
+    from ai_integration import mapping_row_validator
+    from ai_stream import parse_json_objects
+
+    ai_parallel.PARALLEL_MIN_BYTES = 0
+    members = workload.members(member_count)
+    text, context = mapping_response(items, members, workload)
+
+    def in_process():
+        validate = mapping_row_validator(context)
+        return [(item, *validate(item)) for item in parse_json_objects(text)]
+
+    results = []
+    reference = None
+    for workers in worker_counts:
+        run = in_process if workers == 1 else lambda: ai_parallel.parse_and_validate(text, mapping_row_validator,
+                                                                                      context, workers)
+        run()
+        seconds, rows = best_of(repeat, run)
+        rows = [row for _, row, _ in rows or []]
+        reference = reference if reference is not None else rows
+        results.append({"workers": workers, "seconds": round(seconds, 3), "items": len(rows),
+                        "sameRows": rows == reference})
+    for r in results:
+        r['speedup'] = round(results[0]['seconds'] / r['seconds'], 2) if r['seconds'] else 0.0
+    return {"bytes": len(text.encode('utf-8')), "runs": results}
+
+def read_outputs(directory):
+    outputs = {}
+    for path in sorted(Path(directory).glob('*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        result.pop('timestamp', None)
+        result.pop('metrics', None)
+        outputs[path.name] = result
+    return outputs
+
+def bench_batch(worker_counts, projects, tasks, member_count, jobs, workload, directory):
+    from ai_integration import run_batch
+
+    for i in range(projects):
+        project = directory / 'projects' / f"p{i + 1:02d}"
+        project.mkdir(parents=True)
+        with open(project / 'tasks.json', 'w', encoding='utf-8') as f:
+            json.dump(workload.tasks(tasks), f, ensure_ascii=False)
+        with open(project / 'users.json', 'w', encoding='utf-8') as f:
+            json.dump(workload.members(member_count), f, ensure_ascii=False)
+
+    results = []
+    reference = None
+    for workers in worker_counts:
+        out = directory / f"out-{workers}"
+        summary = directory / f"summary-{workers}.json"
+        run = lambda: run_batch(directory / 'projects', out, assigner='local', backend='stub', jobs=jobs,
+                                summary_path=summary, processes=workers)
+        run()
+        seconds, report = best_of(1, run)
+        outputs = read_outputs(out)
+        reference = reference if reference is not None else outputs
+        results.append({"workers": workers, "seconds": round(seconds, 3), "succeeded": report['succeeded'],
+                        "sameOutputs": outputs == reference})
+    for r in results:
+        r['speedup'] = round(results[0]['seconds'] / r['seconds'], 2) if r['seconds'] else 0.0
+    return {"projects": projects, "tasksPerProject": tasks, "runs": results}
+
+def print_table(title, runs):
+    print(title)
+    print(f"  {'workers':>7} {'seconds':>9} {'speedup':>8} {'same':>5}")
+    for r in runs:
+        same = r.get('sameRows', r.get('sameOutputs'))
+        print(f"  {r['workers']:>7} {r['seconds']:>9.3f} {r['speedup']:>7.2f}x {'yes' if same else 'NO':>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', default=f"1,2,{max(2, os.cpu_count() or 1)}",
+                        help="comma-separated worker process counts (default 1,2,<cores>)")
+    parser.add_argument('--items', type=int, default=60000, help="mapping rows in the large response")
+    parser.add_argument('--members', type=int, default=200)
+    parser.add_argument('--projects', type=int, default=8)
+    parser.add_argument('--tasks', type=int, default=300, help="tasks per batch project")
+    parser.add_argument('--jobs', type=int, default=2, help="jobs run concurrently per process")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sections', default='response,batch')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    worker_counts = sorted({int(w) for w in args.workers.split(',')} | {1})
+    sections = args.sections.split(',')
+    results = {"cores": os.cpu_count()}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Results go to a throwaway store; the pipelined assigner is timing-dependent,
+        # so it is turned off to compare outputs across worker counts
+        os.environ.update({"AI_STORE_PATH": str(Path(tmp) / 'ai_store.sqlite3'), "AI_PIPELINE": 'off'})
+        if 'response' in sections:
+            print("response...", file=sys.stderr)
+            results['response'] = bench_response(worker_counts, args.items, args.members, args.repeat,
+                                                 Workload(args.seed))
+        if 'batch' in sections:
+            print("batch...", file=sys.stderr)
+            results['batch'] = bench_batch(worker_counts, args.projects, args.tasks, args.members // 4 or 1,
+                                           args.jobs, Workload(args.seed, skew=1.0), Path(tmp))
+        from ai_parallel import shutdown_pool
+        shutdown_pool()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{results['cores']} cores")
+    if 'response' in results:
+        print_table(f"large response ({results['response']['bytes'] / 1e6:.1f} MB)", results['response']['runs'])
+    if 'batch' in results:
+        print_table(f"batch ({args.projects} projects x {args.tasks} tasks)", results['batch']['runs'])
+
+if __name__ == "__main__":
+    main()
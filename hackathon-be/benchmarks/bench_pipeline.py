@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: pipelined analysis -> assignment
+Runs analyze_tasks on a synthetic project with the stub backend, once waiting for
+the whole analysis before assigning (AI_PIPELINE=off) and once assigning each
+analyzed chunk right away, and reports wall time plus the largest and smallest
+member share of the total workload (the 40% cap must hold either way). The stub
+sleeps a fixed latency per call plus a per-output-token delay, so long answers
+take longer as they do with Gemini.
+
+Usage: python benchmarks/bench_pipeline.py [--tasks 200] [--latency 0.3] [--token-latency 0.001] [--assigner llm]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+WORDS = ['Thiết kế', 'API', 'giao diện', 'cơ sở dữ liệu', 'kiểm thử', 'triển khai', 'tối ưu', 'bảo mật',
+         'React', 'Docker', 'thanh toán', 'đăng nhập', 'báo cáo', 'thông báo', 'tìm kiếm']
+
+def make_tasks(count, rng):
+    return [{"name": f"{' '.join(rng.sample(WORDS, 2))} #{i + 1}",
+             "description": ' '.join(rng.sample(WORDS, 5))} for i in range(count)]
+
+def shares(result):
+    """(max, min) share of the total workload units held by one member"""
+    from ai_scoring import normalize_task
+    units = {t['taskId']: normalize_task(t, 0)['units'] for t in result['taskAnalysis']}
+    teams = {}
+    for mapping in result['userTaskMapping']:
+        teams.setdefault(mapping['taskId'], []).append(mapping['MemberName'])
+    load = {}
+    for task_id, team in teams.items():
+        for name in team:
+            load[name] = load.get(name, 0.0) + units[task_id] / len(team)
+    total = sum(units.values()) or 1.0
+    return max(load.values()) / total, min(load.values()) / total
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--users', default=str(ROOT / 'output_user.json'))
+    parser.add_argument('--latency', type=float, default=0.3, help="stub seconds per call")
+    parser.add_argument('--token-latency', type=float, default=0.001, help="stub seconds per output token")
+    parser.add_argument('--assigner', choices=('llm', 'local'), default='llm')
+    parser.add_argument('--chunk-size', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    # Read when the stub model is created
+    os.environ['AI_BACKEND_LATENCY'] = str(args.latency)
+    os.environ['AI_BACKEND_TOKEN_LATENCY'] = str(args.token_latency)
+    from ai_integration import analyze_tasks
+
+    with open(args.users, 'r', encoding='utf-8') as f:
+        user_data = json.load(f)
+    tasks = make_tasks(args.tasks, random.Random(42))
+
+    results = []
+    for pipeline in ('off', 'on'):
+        os.environ['AI_PIPELINE'] = pipeline
+        start = time.perf_counter()
+        result = analyze_tasks(iter(tasks), user_data, assigner=args.assigner, chunk_size=args.chunk_size,
+                               concurrency=args.concurrency, backend='stub')
+        elapsed = time.perf_counter() - start
+        high, low = shares(result)
+        results.append({"pipeline": pipeline, "wallS": round(elapsed, 2), "tasks": len(result['taskAnalysis']),
+                        "mappings": len(result['userTaskMapping']),
+                        "maxShare": round(high, 3), "minShare": round(low, 3)})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'pipeline':<9} {'wall s':>7} {'tasks':>6} {'mappings':>9} {'max share':>10} {'min share':>10}")
+    for r in results:
+        print(f"{r['pipeline']:<9} {r['wallS']:>7.2f} {r['tasks']:>6} {r['mappings']:>9} "
+              f"{r['maxShare']:>10.3f} {r['minShare']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
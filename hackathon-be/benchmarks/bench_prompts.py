@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark: assignment prompt compaction
+Compares the indented-JSON assignment prompt (and model.py's raw markdown task
+table) with the compact coded rows of ai_prompts.py for growing teams: estimated
+input tokens, build time, and assignment quality of the offline stub answering
+each prompt (mean suitability of assigned pairs, largest workload share).
+
+Usage: python benchmarks/bench_prompts.py [--sizes 10x40,50x200,200x1000]   (members x tasks)
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai_backends import StubBackend
+from ai_integration import build_user_assignment_prompt
+from ai_prompts import compact_markdown_tasks
+from ai_scheduler import estimate_tokens
+from ai_scoring import WORKLOAD_UNITS, build_matrix
+from ai_stream import parse_json_objects
+
+SKILLS = ['Frontend', 'React', 'Backend', 'API', 'SQL', 'DevOps', 'AWS', 'Docker', 'Testing', 'QA',
+          'Mobile', 'Flutter', 'AI', 'Machine Learning', 'UX/UI Design', 'Figma', 'Security', 'Data']
+DEPARTMENTS = ['Frontend', 'Backend', 'Mobile', 'AI', 'DevOps', 'QA', 'Design', 'Data', 'Security']
+POSITIONS = ['Junior {} Developer', 'Mid-level {} Developer', 'Senior {} Engineer', '{} Specialist']
+FAMILY = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Vũ', 'Đặng', 'Bùi']
+MIDDLE = ['Văn', 'Thị', 'Minh', 'Thanh', 'Quốc', 'Ngọc']
+GIVEN = ['An', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Khoa', 'Lan', 'Nam', 'Phúc', 'Quân', 'Tú']
+TYPES = ['Low', 'Medium', 'High', 'Urgent']
+WORKLOADS = ['Small', 'Medium', 'Large']
+
+def make_members(n, rng):
+    names = [f"{f} {m} {g}" for f in FAMILY for m in MIDDLE for g in GIVEN]
+    rng.shuffle(names)
+    members = []
+    for i in range(n):
+        department = rng.choice(DEPARTMENTS)
+        members.append({
+            "Id": str(i + 1),
+            "Name": names[i],
+            "Department": department,
+            "Position": rng.choice(POSITIONS).format(department),
+            "Experience": f"{rng.randint(0, 12)} years",
+            "ProjectsDone": str(rng.randint(0, 30)),
+            "AvgTaskCompletion": f"{rng.choice([1, 1.5, 2, 3])} ngày ({rng.choice(['Easy', 'Medium', 'Hard'])})",
+            "DeadlineMisses": str(rng.randint(0, 4)),
+        })
+    return members
+
+def make_tasks(n, rng):
+    return [{
+        "taskId": f"TASK{i + 1:02d}",
+        "type": rng.choice(TYPES),
+        "difficulty": rng.choice(TYPES[:3]),
+        "skills": rng.sample(SKILLS, rng.randint(1, 3)),
+        "workload": rng.choice(WORKLOADS),
+        "priority": rng.randint(1, 5),
+    } for i in range(n)]
+
+def markdown_table(tasks):
+    """model.py-style analysis table, explanations included"""
+    lines = ["| Task ID | Tên task | Loại task | Độ khó (giải thích) | Kỹ năng chính | Khối lượng | Ưu tiên (1-5, lý do) |",
+             "|---|---|---|---|---|---|---|"]
+    for t in tasks:
+        lines.append(f"| {t['taskId']} | Xây dựng chức năng {t['taskId'].lower()} | {t['type']} "
+                     f"| Cần hiểu rõ nghiệp vụ và phối hợp với các thành viên khác trong nhóm "
+                     f"| {', '.join(t['skills'])} | {t['workload']} "
+                     f"| {t['priority']} - ảnh hưởng trực tiếp tới tiến độ của cả dự án |")
+    return "\n".join(lines)
+
+def markdown_prompt(members, tasks_block):
+    members_info = "\n".join(f"{m['Name']} - {m['Position']} - {m['Experience'].split()[0]} năm" for m in members)
+    return (f"--- DỮ LIỆU THÀNH VIÊN ---\n{members_info}\n\n--- DỮ LIỆU TASK ---\n{tasks_block}\n\n"
+            f"--- QUY TẮC PHÂN CHIA TASK ---\n")
+
+def quality(mapping, tasks, members):
+    """(mean suitability of assigned pairs, largest member share of workload units)"""
+    matrix = build_matrix(tasks, members)
+    task_index = {t['taskId']: t['index'] for t in matrix.tasks}
+    member_index = {m['name']: m['index'] for m in matrix.members}
+    headcount = defaultdict(int)
+    for row in mapping:
+        headcount[row['taskId']] += 1
+    scores = []
+    load = defaultdict(float)
+    total = sum(WORKLOAD_UNITS[t['workload']] for t in tasks)
+    for row in mapping:
+        t, m = task_index[row['taskId']], member_index[row['MemberName']]
+        scores.append(float(matrix.scores[t, m]))
+        load[m] += WORKLOAD_UNITS[tasks[t]['workload']] / headcount[row['taskId']]
+    return sum(scores) / len(scores), max(load.values()) / total
+
+def markdown_mapping(text):
+    rows = []
+    for line in text.splitlines()[2:]:
+        cells = [c.strip() for c in line.strip('|').split('|')]
+        if len(cells) == 2:
+            rows.append({"taskId": cells[0], "MemberName": cells[1]})
+    return rows
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10x40,50x200,200x1000')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    stub = StubBackend()
+    print(f"{'prompt':<9} {'team':>9} {'tokens':>8} {'compact':>8} {'saved':>6} {'build ms':>9} "
+          f"{'score':>7} {'compact':>8} {'share':>6} {'compact':>8} {'same':>5}")
+    for size in args.sizes.split(','):
+        n_members, n_tasks = (int(x) for x in size.split('x'))
+        members = make_members(n_members, rng)
+        tasks = make_tasks(n_tasks, rng)
+
+        # ai_integration.py: JSON analysis + member records
+        _, json_prompt = timed(lambda: build_user_assignment_prompt(tasks, members, compact=False))
+        build_time, compact_prompt = timed(lambda: build_user_assignment_prompt(tasks, members, compact=True))
+        json_mapping = parse_json_objects(stub.answer(json_prompt))
+        compact_mapping = parse_json_objects(stub.answer(compact_prompt))
+        results = [('json', json_prompt, compact_prompt, build_time, json_mapping, compact_mapping)]
+
+        # model.py: raw markdown analysis table vs compact rows
+        table = markdown_table(tasks)
+        build_time, compact_table = timed(lambda: compact_markdown_tasks(table))
+        md_members = [dict(m, Department=f"{m['Name']} - {m['Position']} - {m['Experience'].split()[0]} năm")
+                      for m in members]
+        results.append(('markdown', markdown_prompt(members, table), markdown_prompt(members, compact_table),
+                        build_time, markdown_mapping(stub.answer(markdown_prompt(members, table))),
+                        markdown_mapping(stub.answer(markdown_prompt(members, compact_table)))))
+
+        for name, before, after, build_time, base_mapping, new_mapping in results:
+            quality_members = md_members if name == 'markdown' else members
+            base_score, base_share = quality(base_mapping, tasks, quality_members)
+            new_score, new_share = quality(new_mapping, tasks, quality_members)
+            assert new_score >= base_score - 1e-6, f"{name}: suitability dropped {base_score} -> {new_score}"
+            assert new_share <= base_share + 1e-6, f"{name}: workload share grew {base_share} -> {new_share}"
+            tokens_before, tokens_after = estimate_tokens(before), estimate_tokens(after)
+            print(f"{name:<9} {size:>9} {tokens_before:>8} {tokens_after:>8} {1 - tokens_after / tokens_before:>6.0%} "
+                  f"{build_time * 1000:>9.2f} {base_score:>7.3f} {new_score:>8.3f} {base_share:>6.1%} "
+                  f"{new_share:>8.1%} {'yes' if base_mapping == new_mapping else 'no':>5}")
+
+if __name__ == "__main__":
+    main()
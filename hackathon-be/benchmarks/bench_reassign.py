@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: incremental re-assignment vs. solving from scratch
+Assigns a synthetic project with the local solver, applies a small change (tasks
+added, removed and completed, members leaving and joining), then re-plans it both
+from scratch and with ai_reassign, and reports solve time, the mapping rows that
+moved relative to the previous plan and the largest member share of the workload.
+
+Usage: python benchmarks/bench_reassign.py [--tasks 1000] [--members 50] [--change 0.02]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from workload import Workload
+
+TYPES = ['Low', 'Medium', 'High', 'Urgent']
+SIZES = ['Small', 'Medium', 'Large']
+
+def analyzed(tasks, start, rng):
+    """Task analysis rows for raw workload tasks, with Task IDs from `start`"""
+    return [{"taskId": f"TASK{start + i:04d}", "taskName": t['name'], "type": rng.choice(TYPES),
+             "workload": rng.choice(SIZES), "skills": t['description'].split(',')[:2]}
+            for i, t in enumerate(tasks)]
+
+def churn(before, after):
+    """Mapping rows of tasks present in both plans that were added or removed"""
+    common = {r['taskId'] for r in before} & {r['taskId'] for r in after}
+    a = {(r['taskId'], r['MemberName']) for r in before if r['taskId'] in common}
+    b = {(r['taskId'], r['MemberName']) for r in after if r['taskId'] in common}
+    return len(a ^ b)
+
+def max_share(task_analysis, mapping, completed=()):
+    from ai_scoring import normalize_task
+    units = {t['taskId']: normalize_task(t, 0)['units'] for t in task_analysis if t['taskId'] not in completed}
+    teams = {}
+    for row in mapping:
+        teams.setdefault(row['taskId'], []).append(row['MemberName'])
+    load = {}
+    for task_id, team in teams.items():
+        for name in team if task_id in units else ():
+            load[name] = load.get(name, 0.0) + units[task_id] / len(team)
+    return max(load.values()) / (sum(units.values()) or 1.0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--members', type=int, default=50)
+    parser.add_argument('--change', type=float, default=0.02,
+                        help="share of tasks added, removed and completed, and of members replaced")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    from ai_assigner import assign_tasks
+    from ai_reassign import reassign
+
+    workload = Workload(args.seed, skew=1.0)
+    rng = workload.rng
+    task_analysis = analyzed(workload.tasks(args.tasks), 1, rng)
+    users = workload.members(args.members + max(1, int(args.members * args.change)))
+    user_data = users[:args.members]
+    assign_tasks(task_analysis, user_data)  # warm-up (NumPy import)
+    previous, _ = assign_tasks(task_analysis, user_data)
+
+    changed = max(1, int(args.tasks * args.change))
+    leaving = max(1, int(args.members * args.change))
+    removed = {t['taskId'] for t in rng.sample(task_analysis, changed)}
+    current = [t for t in task_analysis if t['taskId'] not in removed]
+    completed = [t['taskId'] for t in rng.sample(current, changed)]
+    current += analyzed(workload.tasks(changed), args.tasks + 1, rng)
+    new_users = user_data[leaving:] + users[args.members:]
+
+    results = []
+    start = time.perf_counter()
+    scratch, _ = assign_tasks([t for t in current if t['taskId'] not in completed], new_users)
+    results.append({"mode": 'scratch', "ms": round((time.perf_counter() - start) * 1000, 1),
+                    "rows": len(scratch), "moved": churn(previous, scratch),
+                    "maxShare": round(max_share(current, scratch, completed), 3)})
+    start = time.perf_counter()
+    mapping, _, stats = reassign(current, new_users, previous, completed)
+    results.append({"mode": 'incremental', "ms": round((time.perf_counter() - start) * 1000, 1),
+                    "rows": len(mapping), "moved": churn(previous, mapping),
+                    "maxShare": round(max_share(current, mapping, completed), 3), **stats})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<12} {'ms':>9} {'rows':>6} {'moved':>6} {'max share':>10}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['ms']:>9.1f} {r['rows']:>6} {r['moved']:>6} {r['maxShare']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
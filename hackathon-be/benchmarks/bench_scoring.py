@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: task x member suitability matrix
+Times the batched NumPy scoring against a per-pair Python loop for growing
+synthetic teams and task lists.
+
+Usage: python benchmarks/bench_scoring.py [--sizes 100,1000,5000] [--k 5]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from ai_scoring import SuitabilityMatrix, normalize_member, normalize_task, tokenize, level_mismatch
+
+SKILLS = ['Frontend', 'React', 'Backend', 'API', 'SQL', 'DevOps', 'AWS', 'Docker', 'Testing', 'QA',
+          'Mobile', 'Flutter', 'AI', 'Machine Learning', 'UX/UI Design', 'Figma', 'Security', 'Data']
+DEPARTMENTS = ['Frontend', 'Backend', 'Mobile', 'AI', 'DevOps', 'QA', 'Design', 'Data', 'Security']
+POSITIONS = ['Junior {} Developer', 'Mid-level {} Developer', 'Senior {} Engineer', '{} Specialist']
+TYPES = ['Low', 'Medium', 'High', 'Urgent']
+WORKLOADS = ['Small', 'Medium', 'Large']
+
+def make_tasks(n, rng):
+    return [normalize_task({
+        "taskId": f"TASK{i + 1:02d}",
+        "type": rng.choice(TYPES),
+        "skills": rng.sample(SKILLS, rng.randint(1, 3)),
+        "workload": rng.choice(WORKLOADS),
+    }, i) for i in range(n)]
+
+def make_members(n, rng):
+    members = []
+    for i in range(n):
+        department = rng.choice(DEPARTMENTS)
+        members.append(normalize_member({
+            "Id": str(i + 1),
+            "Name": f"Member {i + 1}",
+            "Department": department,
+            "Position": rng.choice(POSITIONS).format(department),
+            "Experience": f"{rng.uniform(0, 12):.1f} years",
+            "DeadlineMisses": str(rng.randint(0, 4)),
+        }, i))
+    return members
+
+def loop_scores(tasks, members):
+    """Reference implementation: one Python evaluation per (task, member) pair"""
+    scores = []
+    for task in tasks:
+        row = []
+        for member in members:
+            matched = 0
+            for skill in task['skills']:
+                lowered = skill.lower()
+                if tokenize(skill) & member['profile'] or any(
+                        len(p) >= 3 and p in lowered for p in member['profile']):
+                    matched += 1
+            skill_score = matched / len(task['skills']) if task['skills'] else 0.0
+            row.append(3.0 * skill_score - 2.0 * level_mismatch(task['type'], member['level']))
+        scores.append(row)
+    return scores
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,500,1000,2000,5000')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--loop-limit', type=int, default=1000,
+                        help="skip the per-pair loop above this size (it grows quadratically)")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'tasks x members':>16} {'matrix ms':>10} {'top-k ms':>9} {'loop ms':>10} {'speedup':>8}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        tasks = make_tasks(size, rng)
+        members = make_members(size, rng)
+        build_time, matrix = timed(lambda: SuitabilityMatrix(tasks, members))
+        topk_time, _ = timed(lambda: matrix.top_k(args.k))
+        if size <= args.loop_limit:
+            loop_time, reference = timed(lambda: loop_scores(tasks, members), repeat=1)
+            assert abs(matrix.scores - reference).max() < 1e-5
+            loop_cell = f"{loop_time * 1000:10.1f} {loop_time / build_time:7.1f}x"
+        else:
+            loop_cell = f"{'-':>10} {'-':>8}"
+        print(f"{size:>7} x {size:<6} {build_time * 1000:10.1f} {topk_time * 1000:9.2f} {loop_cell}")
+
+if __name__ == "__main__":
+    main()
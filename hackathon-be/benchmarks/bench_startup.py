@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI startup time and peak memory
+Spawns fresh interpreters the way the NestJS service spawns ai_integration.py and
+measures process wall time, module import time and peak RSS. "before" preloads
+what the script used to import at top level (pandas, google.generativeai, and
+NumPy through the solver); "after" is the current import graph, where pandas is
+only loaded by model.py for display and NumPy only by the local solver.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5] [--tasks lam_phim.json] [--users output_user.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PRELOAD = {
+    'before': ['pandas', 'numpy', 'google.generativeai'],
+    'after': [],
+}
+
+# Runs in the child: preload, import, optionally run the CLI, then report on the last line
+CHILD = """
+import json, resource, sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+for name in {preload!r}:
+    __import__(name)
+import ai_integration
+imported = time.perf_counter()
+if {argv!r}:
+    sys.argv = {argv!r}
+    try:
+        ai_integration.main()
+    except SystemExit:
+        pass
+print(json.dumps({{"importMs": (imported - start) * 1000,
+                   "heavy": sorted(m for m in ('pandas', 'numpy', 'google.generativeai') if m in sys.modules),
+                   "peakRssMb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+def run_child(preload, argv):
+    code = CHILD.format(preload=preload, argv=argv)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'child failed')
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    stats['wallMs'] = wall * 1000
+    return stats
+
+def measure(preload, argv, repeat):
+    runs = [run_child(preload, argv) for _ in range(repeat)]
+    return {
+        "wallMs": round(statistics.median(r['wallMs'] for r in runs), 1),
+        "importMs": round(statistics.median(r['importMs'] for r in runs), 1),
+        "peakRssMb": round(max(r['peakRssMb'] for r in runs), 1),
+        "heavyModules": runs[-1]['heavy'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tasks', default='lam_phim.json')
+    parser.add_argument('--users', default='output_user.json')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    output = str(Path('/tmp' if Path('/tmp').is_dir() else ROOT) / 'bench_startup_output.json')
+    scenarios = {
+        'import': [],
+        'stub run': ['ai_integration.py', args.tasks, args.users, output, '--backend', 'stub'],
+    }
+    results = []
+    for scenario, argv in scenarios.items():
+        for variant, preload in PRELOAD.items():
+            try:
+                stats = measure(preload, argv, args.repeat)
+            except (RuntimeError, ValueError) as e:
+                print(f"{scenario}/{variant}: skipped ({e})", file=sys.stderr)
+                continue
+            results.append({"scenario": scenario, "variant": variant, **stats})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'scenario':<9} {'variant':<7} {'wall ms':>8} {'import ms':>10} {'peak RSS MB':>12}  heavy modules")
+    for r in results:
+        print(f"{r['scenario']:<9} {r['variant']:<7} {r['wallMs']:>8.1f} {r['importMs']:>10.1f} "
+              f"{r['peakRssMb']:>12.1f}  {', '.join(r['heavyModules']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: end-to-end assignment pipeline
+Runs offline against the stub backend (or a replay of recorded responses) on a
+synthetic workload (benchmarks/workload.py) and measures:
+
+- startup: wall / import time and peak RSS of a fresh `import ai_integration`
+- parse: rows per second of the task file loader (text, JSON, CSV, NDJSON), the
+  markdown table parser used by model.py and the streaming JSON array parser
+- solver: seconds of the local assignment solver per members x tasks size
+- e2e: job latency percentiles and throughput of a `--serve` worker at several
+  concurrency levels, plus the worker's peak RSS
+
+Results go to a JSON file (benchmarks/results/<commit>-<time>.json by default)
+with a flat "metrics" map; --compare BASELINE.json prints the change of every
+metric and exits 1 when one regressed by more than --threshold.
+
+Usage: python benchmarks/bench_suite.py [--quick] [--concurrency 1,4,8] [--compare results/base.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from workload import FORMATS, EXTENSIONS, Workload, task_text, write_tasks
+
+PROFILES = {
+    'quick': {"startupRepeat": 3, "parseRows": 5000, "solverSizes": "10x40,50x200", "jobs": 12,
+              "jobTasks": 60, "jobMembers": 10},
+    'full': {"startupRepeat": 5, "parseRows": 50000, "solverSizes": "10x40,50x200,200x1000", "jobs": 40,
+             "jobTasks": 120, "jobMembers": 20},
+}
+
+def percentile(values, p):
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def git_revision():
+    """(short commit, dirty) of the working tree, or ('unknown', False) outside git"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+def bench_startup(repeat):
+    from bench_startup import measure
+    stats = measure([], [], repeat)
+    return {"wallMs": stats['wallMs'], "importMs": stats['importMs'], "peakRssMb": stats['peakRssMb']}
+
+def rate(count, fn, repeat=3):
+    """Best rows/s of fn() over a few runs; fn returns the number of rows it handled"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        handled = fn()
+        best = min(best, time.perf_counter() - start)
+    assert handled == count, f"handled {handled} of {count} rows"
+    return round(count / best) if best else 0
+
+def bench_parse(rows, workload, directory):
+    from ai_backends import classify_task
+    from ai_incremental import split_tasks, task_entries
+    from ai_loader import iter_task_items
+    from ai_markdown import extract_mapping_rows
+    from ai_stream import parse_json_objects
+    from bench_markdown import make_response
+    import random
+
+    tasks = workload.tasks(rows)
+    results = {}
+    for fmt in FORMATS:
+        path = write_tasks(tasks, directory / f"parse{EXTENSIONS[fmt]}", fmt)
+        if fmt == 'text':
+            results['taskText'] = rate(rows, lambda: len(split_tasks(path.read_text(encoding='utf-8'))))
+        else:
+            results[f"task{fmt.upper() if fmt == 'csv' else fmt.capitalize()}"] = rate(
+                rows, lambda: sum(1 for _ in task_entries(iter_task_items(path))))
+    response = make_response(rows, random.Random(7))
+    mapping_rows = len(extract_mapping_rows(response))
+    results['markdownMapping'] = rate(mapping_rows, lambda: len(extract_mapping_rows(response)))
+    analysis = json.dumps([{"taskId": f"TASK{i + 1:02d}", **classify_task(t['name'])}
+                           for i, t in enumerate(tasks)], ensure_ascii=False)
+    results['jsonStream'] = rate(rows, lambda: len(parse_json_objects(analysis)))
+    return {name: {"rowsPerSec": value} for name, value in results.items()}
+
+def bench_solver(sizes, workload):
+    from ai_assigner import assign_tasks
+    from ai_backends import classify_task
+
+    results = {}
+    for size in sizes.split(','):
+        members_count, tasks_count = (int(x) for x in size.split('x'))
+        members = workload.members(members_count)
+        analysis = [{"taskId": f"TASK{i + 1:02d}", **classify_task(f"{t['name']} - {t['description']}")}
+                    for i, t in enumerate(workload.tasks(tasks_count))]
+        best = float('inf')
+        for _ in range(3):
+            start = time.perf_counter()
+            mapping, _ = assign_tasks(analysis, members)
+            best = min(best, time.perf_counter() - start)
+        results[size] = {"seconds": round(best, 4), "mappings": len(mapping)}
+    return results
+
+def peak_rss_mb(pid):
+    """VmHWM of a live process in MB (Linux), or None"""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def bench_e2e(concurrency, jobs, job_tasks, job_members, workload, env):
+    """Latency of jobs sent to a `--serve` worker, keeping `concurrency` of them in flight"""
+    members = workload.members(job_members)
+    payloads = [{"id": i, "tasks": task_text(workload.tasks(job_tasks)), "users": members} for i in range(jobs)]
+    proc = subprocess.Popen([sys.executable, 'ai_integration.py', '--serve', '--workers', str(concurrency)],
+                            cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, encoding='utf-8')
+    slots = threading.Semaphore(concurrency)
+    sent = {}
+    latencies = []
+    errors = []
+
+    def read_results():
+        for line in proc.stdout:
+            response = json.loads(line)
+            latencies.append(time.perf_counter() - sent[response['id']])
+            if response['result'].get('error'):
+                errors.append(response['result']['error'])
+            slots.release()
+            if len(latencies) == jobs:
+                return
+        # The worker exited early; unblock the sender
+        slots.release(jobs)
+
+    reader = threading.Thread(target=read_results, daemon=True)
+    reader.start()
+    started = time.perf_counter()
+    try:
+        for payload in payloads:
+            slots.acquire()
+            sent[payload['id']] = time.perf_counter()
+            proc.stdin.write(json.dumps(payload, ensure_ascii=False) + '\n')
+            proc.stdin.flush()
+    except BrokenPipeError:
+        pass
+    reader.join()
+    wall = time.perf_counter() - started
+    rss = peak_rss_mb(proc.pid)
+    try:
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    proc.wait()
+    if len(latencies) < jobs:
+        raise RuntimeError(f"worker exited after {len(latencies)} of {jobs} jobs")
+    if errors:
+        raise RuntimeError(f"{len(errors)} jobs failed: {errors[0]}")
+    return {
+        "p50Ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90Ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99Ms": round(percentile(latencies, 99) * 1000, 1),
+        "meanMs": round(statistics.mean(latencies) * 1000, 1),
+        "jobsPerSec": round(jobs / wall, 2),
+        "peakRssMb": rss,
+    }
+
+def flatten(results):
+    """{"section.case.metric": value} for every numeric result"""
+    metrics = {}
+    for section in ('startup', 'parse', 'solver', 'e2e'):
+        data = results.get(section) or {}
+        for key, value in data.items():
+            if isinstance(value, dict):
+                for metric, number in value.items():
+                    if isinstance(number, (int, float)):
+                        metrics[f"{section}.{key}.{metric}"] = number
+            elif isinstance(value, (int, float)):
+                metrics[f"{section}.{key}"] = value
+    return metrics
+
+def compare(metrics, baseline, threshold):
+    """Print the change of every shared metric; returns the names that regressed"""
+    regressed = []
+    print(f"{'metric':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(set(metrics) & set(baseline)):
+        before, after = baseline[name], metrics[name]
+        if name.endswith('.mappings'):
+            continue
+        change = (after - before) / before if before else 0.0
+        # Throughput metrics are better when higher, everything else when lower
+        worse = -change if name.endswith('PerSec') else change
+        flag = ''
+        if worse > threshold:
+            flag = '  REGRESSION'
+            regressed.append(name)
+        print(f"{name:<36} {before:>12g} {after:>12g} {change:>+8.1%}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="small sizes for a fast smoke run")
+    parser.add_argument('--only', help="comma-separated sections: startup,parse,solver,e2e")
+    parser.add_argument('--concurrency', default='1,4,8', help="e2e concurrency levels")
+    parser.add_argument('--skew', type=float, default=1.0, help="skill area skew of the workload (0 = uniform)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency', type=float, default=0.05, help="stub seconds per LLM call")
+    parser.add_argument('--token-latency', type=float, default=0.0, help="stub seconds per output token")
+    parser.add_argument('--replay', help="replay responses recorded in this JSONL file (stub for the rest)")
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    profile = PROFILES['quick' if args.quick else 'full']
+    sections = set(args.only.split(',')) if args.only else {'startup', 'parse', 'solver', 'e2e'}
+    commit, dirty = git_revision()
+    results = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "backend": 'replay' if args.replay else 'stub',
+            "profile": 'quick' if args.quick else 'full',
+            "settings": {**profile, "skew": args.skew, "seed": args.seed, "latency": args.latency,
+                         "tokenLatency": args.token_latency, "concurrency": args.concurrency},
+        }
+    }
+
+    env = {**os.environ, "AI_BACKEND": 'replay' if args.replay else 'stub',
+           "AI_BACKEND_LATENCY": str(args.latency), "AI_BACKEND_TOKEN_LATENCY": str(args.token_latency),
+           "AI_BACKEND_SEED": str(args.seed)}
+    if args.replay:
+        env.update({"AI_REPLAY_PATH": str(Path(args.replay).resolve()), "AI_REPLAY_FALLBACK": 'stub'})
+
+    if 'startup' in sections:
+        print("startup...", file=sys.stderr)
+        results['startup'] = bench_startup(profile['startupRepeat'])
+    if 'parse' in sections:
+        print("parse...", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as tmp:
+            results['parse'] = bench_parse(profile['parseRows'], Workload(args.seed, args.skew), Path(tmp))
+    if 'solver' in sections:
+        print("solver...", file=sys.stderr)
+        results['solver'] = bench_solver(profile['solverSizes'], Workload(args.seed, args.skew))
+    if 'e2e' in sections:
+        results['e2e'] = {}
+        # Benchmark jobs are recorded like real ones, but into a throwaway result history
+        with tempfile.TemporaryDirectory() as tmp:
+            store_env = {**env, "AI_STORE_PATH": str(Path(tmp) / 'ai_store.sqlite3')}
+            for level in (int(c) for c in args.concurrency.split(',')):
+                print(f"e2e concurrency {level}...", file=sys.stderr)
+                results['e2e'][f"c{level}"] = bench_e2e(level, profile['jobs'], profile['jobTasks'],
+                                                        profile['jobMembers'], Workload(args.seed, args.skew),
+                                                        store_env)
+    results['metrics'] = flatten(results)
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).resolve().parent / 'results' / f"{commit}{'-dirty' if dirty else ''}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"Results saved to: {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['metrics']
+        regressed = compare(results['metrics'], baseline, args.threshold)
+        if regressed:
+            print(f"{len(regressed)} metrics regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+        return
+    for name, value in results['metrics'].items():
+        print(f"{name:<36} {value:>12g}")
+
+if __name__ == "__main__":
+    main()
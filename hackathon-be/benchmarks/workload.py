@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Synthetic Workload Generator
+Task lists and teams of any size for the benchmarks. Skill areas are drawn from
+a Zipf-like distribution (skew 0 = uniform, higher = a few areas dominate), and
+task texts use the keywords the stub backend classifies, so offline runs produce
+the same skill mix. Tasks can be written as text, JSON, CSV or NDJSON.
+
+Usage: python benchmarks/workload.py --tasks 1000 --members 50 --skew 1.0 --out /tmp/workload
+"""
+
+import argparse
+import csv
+import json
+import random
+from pathlib import Path
+
+# (task phrases, department, role) per skill area
+AREAS = [
+    (['Thiết kế giao diện', 'Vẽ wireframe', 'Làm mockup Figma'], 'Design', 'UI/UX Designer'),
+    (['Trang chủ React', 'Hiển thị danh sách', 'Giao diện responsive'], 'Frontend', 'Frontend Developer'),
+    (['Xây dựng API', 'Tích hợp thanh toán', 'Xử lý đơn hàng'], 'Backend', 'Backend Developer'),
+    (['Thiết kế cơ sở dữ liệu', 'Tối ưu truy vấn SQL', 'Chuẩn hoá dữ liệu'], 'Data', 'Database Engineer'),
+    (['Viết kiểm thử', 'Kiểm thử hồi quy', 'Sửa lỗi giao dịch'], 'QA', 'QA Engineer'),
+    (['Triển khai Docker', 'Cấu hình CI/CD', 'Backup cloud'], 'DevOps', 'DevOps Engineer'),
+    (['Ứng dụng di động Android', 'Bản iOS', 'Thông báo mobile'], 'Mobile', 'Mobile Developer'),
+    (['Đăng nhập OAuth', 'Bảo mật phiên', 'Xác thực hai lớp'], 'Security', 'Security Engineer'),
+    (['Phân tích yêu cầu', 'Viết tài liệu use case', 'Báo cáo tiến độ'], 'Business', 'Business Analyst'),
+    (['Phát video', 'Stream phim', 'Chuyển mã video'], 'Media', 'Media Engineer'),
+]
+DETAILS = ['cho trang quản trị', 'cho khách hàng', 'theo yêu cầu mới', 'trước khi phát hành',
+           'cho phiên bản 2', 'với dữ liệu lớn', 'gấp trong tuần này', 'theo góp ý review']
+LEVELS = ['Junior', 'Mid-level', 'Senior']
+FAMILY = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Vũ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ']
+MIDDLE = ['Văn', 'Thị', 'Minh', 'Thanh', 'Quốc', 'Ngọc', 'Hữu', 'Gia']
+GIVEN = ['An', 'Bình', 'Châu', 'Dũng', 'Giang', 'Hà', 'Khoa', 'Lan', 'Nam', 'Phúc', 'Quân', 'Tú',
+         'Vy', 'Yến', 'Long', 'Hải']
+FORMATS = ('text', 'json', 'csv', 'ndjson')
+EXTENSIONS = {'text': '.txt', 'json': '.json', 'csv': '.csv', 'ndjson': '.ndjson'}
+
+class Workload:
+    """Deterministic task/member generator for a seed, size and skill skew"""
+
+    def __init__(self, seed=42, skew=0.0, max_areas=2):
+        self.rng = random.Random(seed)
+        self.max_areas = max(1, max_areas)
+        self.weights = [1.0 / (rank + 1) ** skew for rank in range(len(AREAS))]
+
+    def _areas(self, count):
+        picked = []
+        while len(picked) < count:
+            area = self.rng.choices(AREAS, self.weights)[0]
+            if area not in picked:
+                picked.append(area)
+        return picked
+
+    def tasks(self, count):
+        """Raw task items ({"name", "description"}) as a task file would hold them"""
+        tasks = []
+        for i in range(count):
+            areas = self._areas(self.rng.randint(1, self.max_areas))
+            phrases = [self.rng.choice(area[0]) for area in areas]
+            tasks.append({
+                "name": f"{phrases[0]} #{i + 1}",
+                "description": f"{', '.join(phrases)} {self.rng.choice(DETAILS)}",
+            })
+        return tasks
+
+    def members(self, count):
+        """output_user.json style member records with unique Vietnamese names"""
+        names = [f"{f} {m} {g}" for f in FAMILY for m in MIDDLE for g in GIVEN]
+        self.rng.shuffle(names)
+        members = []
+        for i in range(count):
+            _, department, role = self._areas(1)[0]
+            years = self.rng.randint(0, 12)
+            level = LEVELS[min(years // 4, 2)]
+            name = names[i] if i < len(names) else f"{names[i % len(names)]} {i // len(names) + 1}"
+            members.append({
+                "Id": str(i + 1),
+                "Name": name,
+                "Department": department,
+                "Position": f"{level} {role}",
+                "Experience": f"{years} years",
+                "ProjectsDone": str(self.rng.randint(0, 30)),
+                "AvgTaskCompletion": f"{self.rng.choice([1, 1.5, 2, 3])} ngày",
+                "DeadlineMisses": str(self.rng.randint(0, 4)),
+            })
+        return members
+
+def task_text(tasks):
+    """The free-text layout of làm phim.txt: one "name: description" line per task"""
+    return '\n'.join(f"{t['name']}: {t['description']}" for t in tasks) + '\n'
+
+def write_tasks(tasks, path, fmt):
+    """Write tasks in one of FORMATS and return the path"""
+    path = Path(path)
+    if fmt == 'text':
+        path.write_text(task_text(tasks), encoding='utf-8')
+    elif fmt == 'json':
+        path.write_text(json.dumps({"tasks": tasks}, ensure_ascii=False, indent=2), encoding='utf-8')
+    elif fmt == 'ndjson':
+        with open(path, 'w', encoding='utf-8') as f:
+            for task in tasks:
+                f.write(json.dumps(task, ensure_ascii=False) + '\n')
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['name', 'description'])
+            writer.writeheader()
+            writer.writerows(tasks)
+    return path
+
+def write_members(members, path):
+    Path(path).write_text(json.dumps(members, ensure_ascii=False, indent=2), encoding='utf-8')
+    return Path(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--members', type=int, default=50)
+    parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of the skill areas (0 = uniform)")
+    parser.add_argument('--max-areas', type=int, default=2, help="skill areas per task, at most")
+    parser.add_argument('--format', choices=FORMATS, default='json')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='.', help="directory for tasks.<ext> and users.json")
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    workload = Workload(args.seed, args.skew, args.max_areas)
+    tasks_path = write_tasks(workload.tasks(args.tasks), out / f"tasks{EXTENSIONS[args.format]}", args.format)
+    users_path = write_members(workload.members(args.members), out / 'users.json')
+    print(f"{tasks_path}\n{users_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,103 @@
 import streamlit as st
-import pandas as pd
-import google.generativeai as genai
-import re
-import json
+import hashlib
+import io
+from ai_backends import BACKENDS, create_backend, resolve_backend
+from ai_cache import CachedModel, ResponseCache, cache_enabled, cache_key
+from ai_loader import file_format, iter_items, text_stream
+from ai_markdown import extract_mapping_rows, find_table, first_data_table
+from ai_prompts import compact_markdown_tasks, token_report
+from ai_scheduler import ScheduledModel, Scheduler
 
 st.set_page_config(page_title="Tự động phân loại & chia task", layout="centered")
 
 st.sidebar.title("🔑 Cấu hình Gemini API")
+# stub / replay chạy offline (AI_REPLAY_PATH cho replay), không cần API key
+backend = st.sidebar.selectbox("LLM backend:", BACKENDS, index=BACKENDS.index(resolve_backend()))
 api_key = st.sidebar.text_input("Nhập API Key Gemini:", type="password")
 
-if not api_key:
+if backend == 'gemini' and not api_key:
     st.warning("Vui lòng nhập API key Gemini để bắt đầu!")
     st.stop()
 
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-1.5-flash')
+MODEL_NAME = 'gemini-1.5-flash'
+
+@st.cache_resource(show_spinner=False)
+def load_model(backend, api_key):
+    """One wrapped model per backend / API key, kept across reruns and sessions"""
+    model = create_backend(backend, api_key, MODEL_NAME)
+    # 429/503 from Gemini are retried with backoff instead of failing the run
+    model = ScheduledModel(model, Scheduler())
+    if backend == 'gemini' and cache_enabled():
+        # Re-running the same analysis is answered from the local cache instead of Gemini
+        model = CachedModel(model, MODEL_NAME, ResponseCache())
+    return model
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def llm_text(prompt_key, _model, _prompt):
+    """Response text of a prompt, cached by prompt_key (backend + prompt hash) for reruns"""
+    return _model.generate_content(_prompt).text
+
+try:
+    model = load_model(backend, api_key)
+except (ValueError, OSError) as e:
+    st.error(f"Không khởi tạo được backend {backend}: {e}")
+    st.stop()
 
 st.title("🤖 Phân tích & chia task tự động bằng Gemini AI (Có Task ID & Mapping User ↔ Task)")
 st.info("B1: Nhập danh sách task. | B2: Nhập danh sách nhân viên. | B3: Kết quả phân loại, chia task, mapping và tải từng bảng ra JSON.")
 
+def table_frame(header, rows):
+    """DataFrame for st.dataframe / JSON download; pandas is only loaded for display"""
+    import pandas as pd
+    return pd.DataFrame(list(rows), columns=header)
+
+# Rows kept for the preview table; the prompt text is built from every row
+PREVIEW_ROWS = 200
+
+def record_line(record):
+    """First two fields of a record as "value - value" """
+    if isinstance(record, dict):
+        values = list(record.values())
+    elif isinstance(record, list):
+        values = record
+    else:
+        values = [record]
+    if not values:
+        return ""
+    return f"{values[0]}{(' - ' + str(values[1])) if len(values)>1 else ''}"
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def parse_upload(fmt, digest, keys, _data):
+    """(preview rows, prompt text) of an upload, cached by its content hash; raises ValueError"""
+    preview = []
+    lines = []
+    for record in iter_items(text_stream(io.BytesIO(_data)), fmt, keys):
+        if len(preview) < PREVIEW_ROWS:
+            preview.append(record)
+        line = record_line(record)
+        if line.strip():
+            lines.append(line)
+    return preview, "\n".join(lines)
+
 def read_file_uploaded(uploaded_file, key_tasks=None, key_members=None):
+    """(preview rows, prompt text) of an uploaded TXT / CSV / JSON / NDJSON file, read record by record"""
     if uploaded_file is None:
         return None, None
-    filename = uploaded_file.name.lower()
-    if filename.endswith('.csv'):
-        df = pd.read_csv(uploaded_file, encoding="utf-8-sig")
-        lines = [f"{row[0]}{(' - ' + str(row[1])) if len(row)>1 else ''}" for row in df.values]
-        return df, "\n".join([x for x in lines if x.strip()])
-    elif filename.endswith('.json'):
-        try:
-            data = json.load(uploaded_file)
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-                lines = [f"{row[0]}{(' - ' + str(row[1])) if len(row)>1 else ''}" for row in df.values]
-                return df, "\n".join([x for x in lines if x.strip()])
-            elif isinstance(data, dict):
-                if key_tasks and key_tasks in data:
-                    df = pd.DataFrame(data[key_tasks])
-                elif key_members and key_members in data:
-                    df = pd.DataFrame(data[key_members])
-                else:
-                    df = pd.DataFrame([data])
-                lines = [f"{row[0]}{(' - ' + str(row[1])) if len(row)>1 else ''}" for row in df.values]
-                return df, "\n".join([x for x in lines if x.strip()])
-        except Exception as e:
-            st.error(f"Lỗi đọc file JSON: {e}")
-            return None, None
-    else:
-        st.error("Chỉ hỗ trợ file CSV hoặc JSON")
+    fmt = file_format(uploaded_file.name)
+    data = uploaded_file.getvalue()
+    keys = tuple(k for k in (key_tasks, key_members) if k)
+    try:
+        # Reruns with the same file skip parsing
+        return parse_upload(fmt, hashlib.sha256(data).hexdigest(), keys, data)
+    except ValueError as e:
+        st.error(f"Lỗi đọc file {fmt.upper()}: {e}")
         return None, None
 
 # Nhập task với Task ID
 st.subheader("1️⃣ Danh sách task")
 col1, col2 = st.columns(2)
 with col1:
-    tasks_file = st.file_uploader("Tải file task (.txt, .csv, .json)", type=["txt", "csv", "json"])
+    tasks_file = st.file_uploader("Tải file task (.txt, .csv, .json, .ndjson)", type=["txt", "csv", "json", "ndjson", "jsonl"])
 with col2:
     tasks_text = st.text_area(
         "Hoặc nhập/dán danh sách task (mỗi dòng 1 task, có thể kèm mô tả)",
@@ -62,24 +105,18 @@ with col2:
         placeholder="Ví dụ:\nTạo giao diện đăng nhập\nTối ưu hóa truy vấn đơn hàng\nThiết lập backup lên cloud, deadline 3 ngày"
     )
 
-df_task = None
 if tasks_file:
-    if tasks_file.name.endswith(".txt"):
-        task_lines = tasks_file.read().decode("utf-8").splitlines()
-        task_input = "\n".join([x for x in task_lines if x.strip()])
-    else:
-        df_task, task_input = read_file_uploaded(tasks_file, key_tasks="tasks")
+    _, task_input = read_file_uploaded(tasks_file, key_tasks="tasks")
 elif tasks_text.strip():
     task_input = tasks_text.strip()
 else:
     task_input = ""
-    df_task = None
 
 # Nhập thành viên
 st.subheader("2️⃣ Danh sách thành viên")
 col3, col4 = st.columns(2)
 with col3:
-    uploaded_members = st.file_uploader("Tải file CSV/JSON thành viên", type=["csv", "json"])
+    uploaded_members = st.file_uploader("Tải file CSV/JSON thành viên", type=["csv", "json", "ndjson", "jsonl"])
 with col4:
     members_text = st.text_area(
         "Hoặc dán trực tiếp danh sách thành viên (mỗi dòng 1 người, phân tách bằng |):",
@@ -87,20 +124,21 @@ with col4:
         placeholder="Ví dụ:\nNguyễn Văn A | Junior | 8 năm | React, NodeJS, 5 dự án lớn\nLê Thị B | Junior | 10 năm | Fullstack..."
     )
 
-df_members = None
+members_preview = None
 members_info = ""
 if uploaded_members:
     try:
-        df_members, members_info = read_file_uploaded(uploaded_members, key_members="members")
+        members_preview, members_info = read_file_uploaded(uploaded_members, key_members="members")
         st.success("Đã đọc xong dữ liệu thành viên từ file!")
-        st.write(df_members)
+        if members_preview:
+            st.write(table_frame(None, members_preview))
     except Exception as e:
         st.error(f"Lỗi đọc file thành viên: {e}")
-        df_members = None
+        members_preview = None
 elif members_text.strip():
     members_info = members_text.strip()
     st.success("Đã nhận dữ liệu thành viên từ text.")
-    df_members = None
+    members_preview = None
 
 if not task_input or not members_info:
     st.warning("Vui lòng nhập đầy đủ danh sách task và danh sách thành viên!")
@@ -137,177 +175,18 @@ Task ID là chuỗi không trùng nhau (TASK01, TASK02, ...).
 Nếu task thiếu thông tin, hãy phán đoán dựa trên tên/mô tả và ghi rõ giả định.
 """
 
-def parse_markdown_table(markdown_text):
-    tables = re.findall(r"((?:\|[^\n]*\|\n)+)", markdown_text)
-    for tbl in tables:
-        lines = [line for line in tbl[0].split('\n') if line.strip().startswith('|')]
-        if len(lines) < 2:
-            continue
-        divider_idx = None
-        for idx, l in enumerate(lines):
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", l):
-                divider_idx = idx
-                break
-        if divider_idx is not None and divider_idx > 0:
-            header = [h.strip() for h in lines[divider_idx-1].strip("|").split("|")]
-            data_lines = lines[divider_idx+1:]
-        else:
-            header = [h.strip() for h in lines[0].strip("|").split("|")]
-            data_lines = lines[1:]
-        data = []
-        for row in data_lines:
-            cells = [c.strip() for c in row.strip("|").split("|")]
-            if len(cells) == len(header):
-                data.append(cells)
-        if data:
-            try:
-                df = pd.DataFrame(data, columns=header)
-                if df.columns.duplicated().any():
-                    continue
-                return df
-            except Exception:
-                continue
-    return None
-
-def extract_mapping_user_task(markdown_text):
-    def clean_member_name(name_str):
-        """Extract only the member name, removing role/experience info"""
-        if not name_str or name_str.strip() == "":
-            return ""
-        
-        # Remove content in parentheses and brackets
-        cleaned = re.sub(r'[\(\[\{][^\)\]\}]*[\)\]\}]', '', name_str).strip()
-        
-        # Remove common suffixes like "KN)", "năm)", etc.
-        cleaned = re.sub(r'\s*(KN|năm|years?)\s*\)?\s*$', '', cleaned, flags=re.IGNORECASE).strip()
-        
-        # Split by common separators and take the first meaningful part
-        parts = re.split(r'[\-,|]', cleaned)
-        if parts:
-            first_part = parts[0].strip()
-            
-            # Skip if empty after cleaning
-            if not first_part:
-                return ""
-            
-            # If first part is just a single letter, it's likely the name
-            if len(first_part) == 1 and first_part.isalpha():
-                return first_part
-            
-            # Skip obvious non-names
-            if first_part.lower() in ['kn', 'năm', 'years', 'kinh nghiệm'] or first_part.isdigit():
-                return ""
-            
-            # Remove common role keywords but keep actual names
-            role_keywords = ['fresher', 'junior', 'senior', 'medium', 'developer', 'engineer', 'tester', 'qa']
-            words = first_part.split()
-            
-            # If only one word and it's not a role keyword, keep it
-            if len(words) == 1 and not any(keyword in words[0].lower() for keyword in role_keywords):
-                return words[0]
-            
-            # Filter out role keywords but keep meaningful words
-            filtered_words = []
-            for w in words:
-                if not any(keyword in w.lower() for keyword in role_keywords) and not w.isdigit():
-                    filtered_words.append(w)
-            
-            result = ' '.join(filtered_words).strip()
-            return result if result else ""
-        
-        return ""
-    
-    tables = re.findall(r"((?:\|[^\n]*\|\n)+)", markdown_text)
-    for tbl in tables:
-        lines = [line for line in tbl.split('\n') if line.strip().startswith('|')]
-        if len(lines) < 2:
-            continue
-        
-        # Find header row (skip separator rows)
-        header_idx = 0
-        separator_idx = -1
-        
-        for i, line in enumerate(lines):
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", line):
-                separator_idx = i
-                if i > 0:
-                    header_idx = i - 1
-                break
-        
-        if separator_idx == -1:
-            # No separator found, assume first line is header
-            header_idx = 0
-            data_start_idx = 1
-        else:
-            data_start_idx = separator_idx + 1
-        
-        header = [h.strip().lower() for h in lines[header_idx].strip("|").split("|")]
-        
-        # Find Task ID and User columns
-        idx_task = None
-        idx_user = None
-        
-        for i, h in enumerate(header):
-            if 'task' in h and 'id' in h:
-                idx_task = i
-            elif any(kw in h for kw in ['thành viên', 'user', 'người phụ trách', 'tên']) and 'tên' in h:
-                idx_user = i
-        
-        if idx_task is None or idx_user is None:
-            continue
-        
-        # Extract data rows
-        mapping = []
-        for i in range(data_start_idx, len(lines)):
-            row = lines[i]
-            if re.match(r"^\|\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$", row):
-                continue  # Skip any additional separator rows
-                
-            cells = [c.strip() for c in row.strip("|").split("|")]
-            if len(cells) <= max(idx_task, idx_user):
-                continue
-            
-            task_id = cells[idx_task].strip()
-            user_cell = cells[idx_user].strip()
-            
-            if not task_id or not user_cell:  # Skip empty cells
-                continue
-                
-            # Split multiple users
-            users = re.split(r'[;,/]', user_cell)
-            for u in users:
-                u = u.strip()
-                if u:
-                    # Clean the member name
-                    name_only = clean_member_name(u)
-                    if name_only and len(name_only) >= 1 and name_only.isalpha():  # Only accept alphabetic names
-                        mapping.append([task_id, name_only])
-        
-        if mapping:
-            df_map = pd.DataFrame(mapping, columns=["Task ID", "Thành viên (tên)"])
-            return df_map
-    
-    return None
+# Results of the last analysis, kept across reruns for the inputs they were made from
+inputs_key = hashlib.sha256(f"{backend}\n{task_input}\n{members_info}".encode('utf-8')).hexdigest()
+
 if st.button("🚀 Phân tích & chia task tự động"):
     with st.spinner("Gemini AI đang phân tích & chia task..."):
         try:
             # PHÂN TÍCH TASK
-            resp_task = model.generate_content(PROMPT_TASK)
-            tasks_analysis = resp_task.text
-            st.markdown("### 🎯 Bảng phân loại task (có Task ID):")
-            st.markdown(tasks_analysis)
-            df_task_analysis = parse_markdown_table(tasks_analysis)
-            if df_task_analysis is not None:
-                st.dataframe(df_task_analysis, hide_index=True)
-                json_task_analysis = df_task_analysis.to_json(orient="records", force_ascii=False, indent=2)
-                st.download_button(
-                    label="Tải bảng Phân tích Task (JSON)",
-                    data=json_task_analysis,
-                    file_name="Task_Analysis.json",
-                    mime="application/json"
-                )
+            tasks_analysis = llm_text(cache_key(f"{backend}/{MODEL_NAME}", PROMPT_TASK), model, PROMPT_TASK)
 
             # CHIA TASK
+            # Only the columns the assignment needs, with skills coded once (ai_prompts.py)
+            tasks_compact = compact_markdown_tasks(tasks_analysis)
             PROMPT_ASSIGN = f"""
 Bạn là AI trợ lý quản lý dự án, nhiệm vụ của bạn là phân chia công việc cho các thành viên trong nhóm một cách thông minh, công bằng và tối ưu hóa hiệu quả.
 Hãy thực hiện phân chia task theo các hướng dẫn và quy tắc sau đây.
@@ -316,7 +195,8 @@ Hãy thực hiện phân chia task theo các hướng dẫn và quy tắc sau đ
 {members_info}
 
 --- DỮ LIỆU TASK ---
-{tasks_analysis}
+(Bảng phân cách bằng "|", dòng đầu là tên cột; mã kỹ năng S1, S2... giải nghĩa ở dòng "Mã:")
+{tasks_compact}
 
 --- QUY TẮC PHÂN CHIA TASK ---
 1. Phân loại task:
@@ -350,54 +230,69 @@ Hãy thực hiện phân chia task theo các hướng dẫn và quy tắc sau đ
 - Không cần bảng workload tổng hợp.
 - Chỉ trả về đúng định dạng bảng mapping thứ hai (Task ID, Thành viên) là đủ.
 """
-            resp_assign = model.generate_content(PROMPT_ASSIGN)
-            st.markdown("### 💡 Kết quả chia task thông minh (có Task ID):")
-            st.markdown(resp_assign.text)
-
-            # BẢNG CHIA TASK CHI TIẾT
-            df_assign = None
-            all_tables = re.findall(r"((?:\|[^\n]*\|\n)+)", resp_assign.text)
-            if all_tables:
-                for tbl in all_tables:
-                    lines = [line for line in tbl[0].split('\n') if line.strip().startswith('|')]
-                    if len(lines) < 2:
-                        continue
-                    header = [h.strip() for h in lines[0].strip("|").split("|")]
-                    if "Task ID" in header and any("Thành viên" in h or "user" in h.lower() for h in header):
-                        try:
-                            data = []
-                            for row in lines[1:]:
-                                cells = [c.strip() for c in row.strip("|").split("|")]
-                                if len(cells) == len(header):
-                                    data.append(cells)
-                            df_assign = pd.DataFrame(data, columns=header)
-                            break
-                        except: pass
-            if df_assign is not None:
-                st.markdown("### 📝 Bảng chia task chi tiết:")
-                st.dataframe(df_assign, hide_index=True)
-                json_assign = df_assign.to_json(orient="records", force_ascii=False, indent=2)
-                st.download_button(
-                    label="Tải bảng Chia Task (JSON)",
-                    data=json_assign,
-                    file_name="Task_Assignment.json",
-                    mime="application/json"
-                )
-
-            # BẢNG MAPPING AI
-            df_mapping = extract_mapping_user_task(resp_assign.text)
-            if df_mapping is not None:
-                st.markdown("### 🔗 Bảng mapping User ↔ Task (tự động sinh):")
-                st.dataframe(df_mapping, hide_index=True)
-                json_mapping = df_mapping.to_json(orient="records", force_ascii=False, indent=2)
-                st.download_button(
-                    label="Tải bảng Mapping (JSON)",
-                    data=json_mapping,
-                    file_name="User_Task_Mapping.json",
-                    mime="application/json"
-                )
-            else:
-                st.info("Không tự động tìm được bảng mapping User ↔ Task từ kết quả AI.")
-
+            assign_text = llm_text(cache_key(f"{backend}/{MODEL_NAME}", PROMPT_ASSIGN), model, PROMPT_ASSIGN)
+            st.session_state["analysis"] = {
+                "inputs": inputs_key,
+                "tasks_analysis": tasks_analysis,
+                "tokens": token_report(tasks_analysis, tasks_compact),
+                "assign": assign_text,
+            }
         except Exception as e:
             st.error(f"Lỗi: {e}")
+
+analysis = st.session_state.get("analysis")
+if analysis is not None and analysis["inputs"] != inputs_key:
+    st.info("Dữ liệu task/thành viên đã thay đổi, bấm phân tích lại để cập nhật kết quả.")
+elif analysis is not None:
+    tasks_analysis = analysis["tasks_analysis"]
+    st.markdown("### 🎯 Bảng phân loại task (có Task ID):")
+    st.markdown(tasks_analysis)
+    analysis_table = first_data_table(tasks_analysis)
+    if analysis_table is not None:
+        df_task_analysis = table_frame(analysis_table.header, analysis_table.iter_complete_rows())
+        st.dataframe(df_task_analysis, hide_index=True)
+        json_task_analysis = df_task_analysis.to_json(orient="records", force_ascii=False, indent=2)
+        st.download_button(
+            label="Tải bảng Phân tích Task (JSON)",
+            data=json_task_analysis,
+            file_name="Task_Analysis.json",
+            mime="application/json"
+        )
+
+    tokens = analysis["tokens"]
+    st.caption(f"Dữ liệu task trong prompt chia task: {tokens['tokensBefore']} → {tokens['tokensAfter']} token (ước lượng)")
+    st.markdown("### 💡 Kết quả chia task thông minh (có Task ID):")
+    st.markdown(analysis["assign"])
+
+    # BẢNG CHIA TASK CHI TIẾT
+    assign_table = find_table(
+        analysis["assign"],
+        lambda header: "Task ID" in header and any("Thành viên" in h or "user" in h.lower() for h in header)
+    )
+    if assign_table is not None:
+        df_assign = table_frame(assign_table.header, assign_table.iter_complete_rows())
+        st.markdown("### 📝 Bảng chia task chi tiết:")
+        st.dataframe(df_assign, hide_index=True)
+        json_assign = df_assign.to_json(orient="records", force_ascii=False, indent=2)
+        st.download_button(
+            label="Tải bảng Chia Task (JSON)",
+            data=json_assign,
+            file_name="Task_Assignment.json",
+            mime="application/json"
+        )
+
+    # BẢNG MAPPING AI
+    mapping_rows = extract_mapping_rows(analysis["assign"])
+    if mapping_rows:
+        df_mapping = table_frame(["Task ID", "Thành viên (tên)"], mapping_rows)
+        st.markdown("### 🔗 Bảng mapping User ↔ Task (tự động sinh):")
+        st.dataframe(df_mapping, hide_index=True)
+        json_mapping = df_mapping.to_json(orient="records", force_ascii=False, indent=2)
+        st.download_button(
+            label="Tải bảng Mapping (JSON)",
+            data=json_mapping,
+            file_name="User_Task_Mapping.json",
+            mime="application/json"
+        )
+    else:
+        st.info("Không tự động tìm được bảng mapping User ↔ Task từ kết quả AI.")
@@ -0,0 +1,233 @@
+import { Injectable, Logger, OnModuleDestroy } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+import { existsSync } from 'fs';
+import { join } from 'path';
+import { createInterface } from 'readline';
+import type { AIAnalysisResult } from './ai-task-assignment.service';
+
+export interface AIWorkerJob {
+  tasks: string;
+  users: string;
+  project?: string;
+}
+
+export type AIWorkerResult = AIAnalysisResult & { error?: string };
+
+export interface AIWorkerProgress {
+  stage: 'taskAnalysis' | 'userTaskMapping';
+  item: Record<string, any>;
+}
+
+interface AIWorkerResponse {
+  id: number;
+  result?: AIWorkerResult;
+  progress?: AIWorkerProgress;
+}
+
+interface PendingJob {
+  worker: ChildProcessWithoutNullStreams;
+  resolve: (result: AIWorkerResult) => void;
+  reject: (error: Error) => void;
+  onProgress?: (progress: AIWorkerProgress) => void;
+  timer?: NodeJS.Timeout;
+}
+
+/**
+ * A job ran past AI_PYTHON_JOB_TIMEOUT_MS
+ */
+export class AIWorkerTimeoutError extends Error {}
+
+// A job still running after this long (AI_PYTHON_JOB_TIMEOUT_MS, 0 to disable)
+// fails and the worker is restarted
+const DEFAULT_JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
+/**
+ * Keeps one `ai_integration.py --serve` process alive and multiplexes jobs over
+ * its stdin/stdout, so requests don't pay for interpreter boot and imports.
+ */
+@Injectable()
+export class AiPythonWorkerService implements OnModuleDestroy {
+  private readonly logger = new Logger(AiPythonWorkerService.name);
+  private worker: ChildProcessWithoutNullStreams | null = null;
+  private readonly pending = new Map<number, PendingJob>();
+  private nextJobId = 1;
+
+  constructor(private readonly configService: ConfigService) {}
+
+  /**
+   * Whether jobs should go through the persistent worker
+   */
+  isEnabled(): boolean {
+    return this.configService.get<string>('AI_PYTHON_WORKER') !== 'false';
+  }
+
+  /**
+   * Send one job to the worker and wait for its result. Rejects only when the
+   * worker itself fails or the job times out; analysis errors come back in
+   * `result.error`. With `onProgress`, the worker streams every analysis and
+   * mapping row as soon as the model has produced it.
+   */
+  run(
+    job: AIWorkerJob,
+    onProgress?: (progress: AIWorkerProgress) => void,
+  ): Promise<AIWorkerResult> {
+    return new Promise((resolve, reject) => {
+      let worker: ChildProcessWithoutNullStreams;
+      try {
+        worker = this.ensureWorker();
+      } catch (error) {
+        reject(error as Error);
+        return;
+      }
+
+      const id = this.nextJobId++;
+      const timeoutMs = this.jobTimeoutMs();
+      const timer =
+        timeoutMs > 0
+          ? setTimeout(() => this.handleTimeout(id, timeoutMs), timeoutMs)
+          : undefined;
+      this.pending.set(id, { worker, resolve, reject, onProgress, timer });
+
+      const apiKey = this.configService.get<string>('GEMINI_API_KEY');
+      const assigner = this.configService.get<string>('AI_ASSIGNER');
+      const line = JSON.stringify({
+        id,
+        ...job,
+        ...(apiKey ? { apiKey } : {}),
+        ...(assigner ? { assigner } : {}),
+        ...(onProgress ? { stream: true } : {}),
+      });
+      worker.stdin.write(line + '\n', 'utf8');
+    });
+  }
+
+  onModuleDestroy() {
+    if (this.worker) {
+      this.worker.stdin.end();
+      this.worker = null;
+    }
+  }
+
+  private jobTimeoutMs(): number {
+    const value = Number(
+      this.configService.get<string>('AI_PYTHON_JOB_TIMEOUT_MS') ??
+        DEFAULT_JOB_TIMEOUT_MS,
+    );
+    return Number.isFinite(value) ? value : DEFAULT_JOB_TIMEOUT_MS;
+  }
+
+  /**
+   * Start the worker process if it is not already running
+   */
+  private ensureWorker(): ChildProcessWithoutNullStreams {
+    if (this.worker) {
+      return this.worker;
+    }
+
+    const pythonScript = join(process.cwd(), 'ai_integration.py');
+    if (!existsSync(pythonScript)) {
+      throw new Error(
+        'AI integration script not found. Please ensure ai_integration.py exists in the project root.',
+      );
+    }
+
+    const workers = this.configService.get<string>('AI_PYTHON_WORKERS') ?? '4';
+    const worker = spawn('python', [
+      pythonScript,
+      '--serve',
+      '--workers',
+      workers,
+    ]);
+    this.worker = worker;
+    this.logger.log(`Started AI worker process (pid ${worker.pid})`);
+
+    createInterface({ input: worker.stdout }).on('line', (line) =>
+      this.handleResponse(line),
+    );
+
+    worker.stderr.on('data', (data: Buffer) => {
+      this.logger.warn(data.toString().trimEnd());
+    });
+
+    // A write to a worker that just exited fails with EPIPE; without a handler
+    // that error would crash the Nest process
+    worker.stdin.on('error', (error) => this.recycle(worker, error));
+    worker.on('error', (error) => this.handleExit(worker, error));
+    worker.on('close', (code) =>
+      this.handleExit(
+        worker,
+        new Error(`AI worker process exited with code ${code}`),
+      ),
+    );
+
+    return worker;
+  }
+
+  private handleResponse(line: string) {
+    let response: AIWorkerResponse;
+    try {
+      response = JSON.parse(line) as AIWorkerResponse;
+    } catch {
+      this.logger.warn(`Ignoring malformed AI worker output: ${line}`);
+      return;
+    }
+
+    const job = this.pending.get(response.id);
+    if (!job) {
+      return;
+    }
+    if (response.progress) {
+      job.onProgress?.(response.progress);
+      return;
+    }
+    this.pending.delete(response.id);
+    clearTimeout(job.timer);
+    job.resolve(response.result as AIWorkerResult);
+  }
+
+  /**
+   * Fail a job that ran past its timeout and restart its (presumably hung) worker
+   */
+  private handleTimeout(id: number, timeoutMs: number) {
+    const job = this.pending.get(id);
+    if (!job) {
+      return;
+    }
+    this.pending.delete(id);
+    job.reject(
+      new AIWorkerTimeoutError(`AI worker job timed out after ${timeoutMs} ms`),
+    );
+    this.logger.warn(
+      `AI worker job ${id} timed out after ${timeoutMs} ms; restarting the worker`,
+    );
+    this.recycle(
+      job.worker,
+      new Error('AI worker restarted after a job timed out'),
+    );
+  }
+
+  /**
+   * Fail the worker's jobs and stop it; the next job starts a new one
+   */
+  private recycle(worker: ChildProcessWithoutNullStreams, error: Error) {
+    this.handleExit(worker, error);
+    worker.kill();
+  }
+
+  /**
+   * Fail in-flight jobs when the worker dies; the next job starts a new one
+   */
+  private handleExit(worker: ChildProcessWithoutNullStreams, error: Error) {
+    if (this.worker === worker) {
+      this.worker = null;
+    }
+    for (const [id, job] of this.pending) {
+      if (job.worker === worker) {
+        this.pending.delete(id);
+        clearTimeout(job.timer);
+        job.reject(error);
+      }
+    }
+  }
+}
@@ -1,4 +1,13 @@
-import { Controller, Post, Body, Param, Get } from '@nestjs/common';
+import {
+  Controller,
+  Post,
+  Body,
+  Param,
+  Get,
+  Sse,
+  MessageEvent,
+} from '@nestjs/common';
+import { Observable, from, switchMap } from 'rxjs';
 import { IsOptional, IsString, IsArray } from 'class-validator';
 import {
   ApiProperty,
@@ -106,6 +115,36 @@ export class AiTaskAssignmentController {
     );
   }
 
+  @Sse(':projectId/run/stream')
+  @ApiOperation({
+    summary: 'Stream AI task assignment analysis',
+    description:
+      'Server-sent events: a `progress` event for every analyzed task and mapping row as soon as it is ready, then a `result` event with the full analysis (or an `error` event)',
+  })
+  @ApiParam({
+    name: 'projectId',
+    description: 'Project ID to analyze',
+    type: 'string',
+  })
+  streamAIAssignment(
+    @Param('projectId') projectId: string,
+  ): Observable<MessageEvent> {
+    return from(
+      Promise.all([
+        this.aiTaskAssignmentService.getTaskFileContent(projectId),
+        this.aiTaskAssignmentService.getUserFileContent(projectId),
+      ]),
+    ).pipe(
+      switchMap(([taskContent, userContent]) =>
+        this.aiTaskAssignmentService.streamAITaskAssignment(
+          projectId,
+          taskContent,
+          userContent,
+        ),
+      ),
+    );
+  }
+
   @Post(':projectId/apply')
   @ApiOperation({
     summary: 'Apply AI task assignments',
@@ -1,6 +1,7 @@
 import { Module } from '@nestjs/common';
 import { AiTaskAssignmentService } from './ai-task-assignment.service';
 import { AiTaskAssignmentController } from './ai-task-assignment.controller';
+import { AiPythonWorkerService } from './ai-python-worker.service';
 import { TasksModule } from '../tasks/tasks.module';
 import { UsersModule } from '../users/users.module';
 import { ProjectsModule } from '../projects/projects.module';
@@ -9,7 +10,7 @@ import { ConfigModule } from '@nestjs/config';
 @Module({
   imports: [TasksModule, UsersModule, ProjectsModule, ConfigModule],
   controllers: [AiTaskAssignmentController],
-  providers: [AiTaskAssignmentService],
+  providers: [AiTaskAssignmentService, AiPythonWorkerService],
   exports: [AiTaskAssignmentService],
 })
 export class AiTaskAssignmentModule {}
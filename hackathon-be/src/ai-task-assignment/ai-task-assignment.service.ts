@@ -1,11 +1,19 @@
-import { Injectable, Logger } from '@nestjs/common';
+import { Injectable, Logger, MessageEvent } from '@nestjs/common';
 import { ConfigService } from '@nestjs/config';
 import { spawn } from 'child_process';
-import { promises as fs, existsSync } from 'fs';
+import { existsSync } from 'fs';
 import { join } from 'path';
+import { Observable } from 'rxjs';
 import { TasksService } from '../tasks/tasks.service';
 import { UsersService } from '../users/users.service';
 import { ProjectsService } from '../projects/projects.service';
+import {
+  AiPythonWorkerService,
+  AIWorkerJob,
+  AIWorkerProgress,
+  AIWorkerResult,
+  AIWorkerTimeoutError,
+} from './ai-python-worker.service';
 
 export interface TaskAssignmentResult {
   taskId: string;
@@ -21,6 +29,13 @@ export interface AIAnalysisResult {
   userTaskMapping: any[];
 }
 
+/**
+ * One frame written by `ai_integration.py --stdin`
+ */
+type AIStdinRecord =
+  | ({ type: 'progress' } & AIWorkerProgress)
+  | { type: 'result'; result: AIWorkerResult };
+
 export interface TaskStep {
   step: string;
   tasks: { taskId: string; name: string }[];
@@ -66,6 +81,7 @@ export class AiTaskAssignmentService {
     private readonly userService: UsersService,
     private readonly projectService: ProjectsService,
     private readonly configService: ConfigService,
+    private readonly pythonWorker: AiPythonWorkerService,
   ) {}
 
   /**
@@ -79,27 +95,43 @@ export class AiTaskAssignmentService {
     try {
       this.logger.log(`Starting AI task assignment for project ${projectId}`);
 
-      // Create temporary files for the Python model
-      const tempDir = join(process.cwd(), 'temp');
-      await fs.mkdir(tempDir, { recursive: true });
-
-      const taskFilePath = join(tempDir, 'tasks.json');
-      const userFilePath = join(tempDir, 'users.json');
-      const outputPath = join(tempDir, 'ai_output.json');
+      const incrementalProject = this.getIncrementalProject(projectId);
 
-      // Write input files
-      await fs.writeFile(taskFilePath, taskFileContent, 'utf8');
-      await fs.writeFile(userFilePath, userFileContent, 'utf8');
-
-      // Run the Python model
-      const result = await this.runPythonModel(
-        taskFilePath,
-        userFilePath,
-        outputPath,
-      );
+      if (this.pythonWorker.isEnabled()) {
+        let workerResult: AIWorkerResult | null = null;
+        try {
+          workerResult = await this.pythonWorker.run({
+            tasks: taskFileContent,
+            users: userFileContent,
+            ...(incrementalProject ? { project: incrementalProject } : {}),
+          });
+        } catch (error) {
+          // A job that timed out would most likely time out again
+          if (error instanceof AIWorkerTimeoutError) {
+            throw error;
+          }
+          this.logger.warn(
+            `AI worker failed, falling back to one-shot process: ${(error as Error).message}`,
+          );
+        }
+        if (workerResult) {
+          if (workerResult.error) {
+            throw new Error(workerResult.error);
+          }
+          return workerResult;
+        }
+      }
 
-      // Clean up temporary files
-      await this.cleanupTempFiles([taskFilePath, userFilePath, outputPath]);
+      // One-shot process: the payload goes in on stdin and the result comes
+      // back on stdout, so concurrent requests never share files
+      const result = await this.runPythonModel({
+        tasks: taskFileContent,
+        users: userFileContent,
+        ...(incrementalProject ? { project: incrementalProject } : {}),
+      });
+      if (result.error) {
+        throw new Error(result.error);
+      }
 
       return result;
     } catch (error) {
@@ -111,13 +143,72 @@ export class AiTaskAssignmentService {
   }
 
   /**
-   * Execute the Python model and get results
+   * Stream AI analysis as server-sent events: one `progress` event per analyzed
+   * task or mapping row as soon as the model has produced it, then a `result`
+   * event with the full analysis, from the worker or a one-shot process.
+   */
+  streamAITaskAssignment(
+    projectId: string,
+    taskFileContent: string,
+    userFileContent: string,
+  ): Observable<MessageEvent> {
+    return new Observable<MessageEvent>((subscriber) => {
+      const incrementalProject = this.getIncrementalProject(projectId);
+      const job: AIWorkerJob = {
+        tasks: taskFileContent,
+        users: userFileContent,
+        ...(incrementalProject ? { project: incrementalProject } : {}),
+      };
+      const onProgress = (progress: AIWorkerProgress) =>
+        subscriber.next({ type: 'progress', data: progress });
+      const run = (
+        this.pythonWorker.isEnabled()
+          ? this.pythonWorker.run(job, onProgress)
+          : this.runPythonModel(job, onProgress)
+      ).then((result) => {
+        if (result.error) {
+          throw new Error(result.error);
+        }
+        return result;
+      });
+
+      run
+        .then((result) => {
+          subscriber.next({ type: 'result', data: result });
+          subscriber.complete();
+        })
+        .catch((error) => {
+          this.logger.error(
+            `Error in AI task assignment stream: ${(error as Error).message}`,
+          );
+          subscriber.next({
+            type: 'error',
+            data: { message: (error as Error).message },
+          });
+          subscriber.complete();
+        });
+    });
+  }
+
+  /**
+   * Incremental mode reuses stored per-task analysis keyed by project
+   */
+  private getIncrementalProject(projectId: string): string | undefined {
+    return this.configService.get<string>('AI_INCREMENTAL') === 'true'
+      ? projectId
+      : undefined;
+  }
+
+  /**
+   * Run `ai_integration.py --stdin` for one job: the job is written to stdin as
+   * a single JSON document and the process answers with length-prefixed frames
+   * ("<bytes>\n<json>\n") on stdout, progress records first when `onProgress`
+   * is given, then the result.
    */
   private async runPythonModel(
-    taskFilePath: string,
-    userFilePath: string,
-    outputPath: string,
-  ): Promise<AIAnalysisResult> {
+    job: AIWorkerJob,
+    onProgress?: (progress: AIWorkerProgress) => void,
+  ): Promise<AIWorkerResult> {
     return new Promise((resolve, reject) => {
       // Use the new AI integration script
       const pythonScript = join(process.cwd(), 'ai_integration.py');
@@ -132,54 +223,83 @@ export class AiTaskAssignmentService {
         return;
       }
 
-      // Get API key from config service
-      const apiKey = this.configService.get<string>('GEMINI_API_KEY');
-      const args = apiKey
-        ? [pythonScript, taskFilePath, userFilePath, outputPath, apiKey]
-        : [pythonScript, taskFilePath, userFilePath, outputPath];
+      const args = [pythonScript, '--stdin'];
+      // 'local' replaces the second LLM call with the deterministic solver
+      const assigner = this.configService.get<string>('AI_ASSIGNER');
+      if (assigner) {
+        args.push('--assigner', assigner);
+      }
 
       const pythonProcess = spawn('python', args);
 
       let stderr = '';
+      let pending = Buffer.alloc(0);
+      let result: AIWorkerResult | null = null;
 
       pythonProcess.stderr.on('data', (data: Buffer) => {
         stderr += data.toString();
       });
 
-      pythonProcess.on('close', (code) => {
-        if (code !== 0) {
-          reject(
-            new Error(`Python process failed with code ${code}: ${stderr}`),
+      pythonProcess.stdout.on('data', (data: Buffer) => {
+        pending = Buffer.concat([pending, data]);
+        for (;;) {
+          const newline = pending.indexOf(0x0a);
+          if (newline < 0) {
+            return;
+          }
+          const length = Number(
+            pending.subarray(0, newline).toString('ascii'),
           );
-          return;
-        }
-
-        // Handle the async operation separately
-        fs.readFile(outputPath, 'utf8')
-          .then((outputContent) => {
-            try {
-              const result = JSON.parse(outputContent) as AIAnalysisResult;
-              resolve(result);
-            } catch (error) {
-              reject(
-                new Error(
-                  `Failed to parse AI output: ${(error as Error).message}`,
-                ),
-              );
-            }
-          })
-          .catch((error) => {
+          const end = newline + 1 + length;
+          if (pending.length < end + 1) {
+            return;
+          }
+          let record: AIStdinRecord;
+          try {
+            record = JSON.parse(
+              pending.subarray(newline + 1, end).toString('utf8'),
+            ) as AIStdinRecord;
+          } catch (error) {
+            pythonProcess.kill();
             reject(
               new Error(
-                `Failed to read AI output: ${(error as Error).message}`,
+                `Failed to parse AI output: ${(error as Error).message}`,
               ),
             );
-          });
+            return;
+          }
+          pending = pending.subarray(end + 1);
+          if (record.type === 'progress') {
+            onProgress?.({ stage: record.stage, item: record.item });
+          } else {
+            result = record.result;
+          }
+        }
+      });
+
+      pythonProcess.on('close', (code) => {
+        if (result) {
+          resolve(result);
+          return;
+        }
+        reject(
+          new Error(`Python process failed with code ${code}: ${stderr}`),
+        );
       });
 
       pythonProcess.on('error', (error) => {
         reject(new Error(`Failed to start Python process: ${error.message}`));
       });
+
+      const apiKey = this.configService.get<string>('GEMINI_API_KEY');
+      pythonProcess.stdin.end(
+        JSON.stringify({
+          ...job,
+          ...(apiKey ? { apiKey } : {}),
+          ...(onProgress ? { stream: true } : {}),
+        }),
+        'utf8',
+      );
     });
   }
 
@@ -281,21 +401,6 @@ export class AiTaskAssignmentService {
     }
   }
 
-  /**
-   * Clean up temporary files
-   */
-  private async cleanupTempFiles(filePaths: string[]): Promise<void> {
-    for (const filePath of filePaths) {
-      try {
-        await fs.unlink(filePath);
-      } catch (error) {
-        this.logger.warn(
-          `Failed to delete temporary file ${filePath}: ${(error as Error).message}`,
-        );
-      }
-    }
-  }
-
   /**
    * Get task file content from project - convert tasks to JSON format like lam_phim.json, kèm mapping taskId
    */
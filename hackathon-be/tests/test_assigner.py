@@ -0,0 +1,62 @@
+import random
+from itertools import permutations
+
+from ai_assigner import MAX_WORKLOAD_SHARE, LocalAssigner, assign_tasks, hungarian
+from ai_integration import load_member_history
+from ai_results import ResultStore
+
+MEMBERS = [
+    {"Id": "1", "Name": "An", "Department": "Backend", "Position": "Mid-level Developer", "Experience": "3 years"},
+    {"Id": "2", "Name": "Bình", "Department": "Backend", "Position": "Mid-level Developer", "Experience": "3 years"},
+]
+TASK = {"taskId": "TASK01", "taskName": "Tích hợp cổng thanh toán VNPay", "type": "Low", "difficulty": "Medium",
+        "skills": ["Backend"], "workload": "Small"}
+# A larger task beside it keeps the 40% cap from deciding the assignment
+OTHER = {"taskId": "TASK02", "taskName": "Viết tài liệu hướng dẫn sử dụng", "type": "Low", "difficulty": "Medium",
+         "skills": ["Backend"], "workload": "Large"}
+
+def test_hungarian_finds_the_cheapest_assignment():
+    rng = random.Random(7)
+    for rows, columns in ((3, 3), (3, 5), (4, 4)):
+        cost = [[rng.randint(0, 20) for _ in range(columns)] for _ in range(rows)]
+        chosen = hungarian(cost)
+        assert len(set(chosen)) == rows
+        best = min(sum(cost[r][c] for r, c in enumerate(cols)) for cols in permutations(range(columns), rows))
+        assert sum(cost[r][c] for r, c in enumerate(chosen)) == best
+
+def test_hungarian_avoids_infeasible_cells():
+    cost = [[1e9, 1.0], [2.0, 1e9]]
+    assert hungarian(cost) == [1, 0]
+
+def test_local_assigner_respects_the_workload_cap():
+    members = [{"Id": str(i), "Name": f"Dev {i}", "Department": "Backend", "Position": "Developer",
+                "Experience": "4 years"} for i in range(1, 5)]
+    tasks = [{"taskId": f"TASK{i:02d}", "type": "Medium", "skills": ["Backend"], "workload": workload}
+             for i, workload in enumerate(["Large", "Medium", "Small", "Medium", "Large", "Small"], 1)]
+    mapping, assignment = assign_tasks(tasks, members)
+
+    assert {row['taskId'] for row in mapping} == {t['taskId'] for t in tasks}
+    assert len(assignment) == len(mapping)
+    solver = LocalAssigner(tasks, members)
+    solver.solve()
+    assert max(solver.load) <= MAX_WORKLOAD_SHARE * solver.total_units + 1e-9
+    # Medium tasks need at least two people
+    assert all(len(team) >= 2 for team in solver.assigned)
+
+def _assignee(history=None):
+    solver = LocalAssigner([TASK, OTHER], MEMBERS, history=history)
+    return [solver.members[m]['name'] for m in solver.solve()[0]]
+
+def test_member_history_changes_the_assignment(tmp_path, monkeypatch):
+    monkeypatch.setenv('AI_EMBEDDINGS', 'on')
+    monkeypatch.setenv('AI_EMBEDDING_PATH', str(tmp_path / 'embeddings'))
+    monkeypatch.setenv('AI_STORE_PATH', str(tmp_path / 'store.sqlite3'))
+    monkeypatch.setattr('ai_integration._result_store', None)
+    past = {**TASK, "taskName": "Tích hợp cổng thanh toán MoMo"}
+    ResultStore().save_run({"taskAnalysis": [past], "userTaskMapping": [{"taskId": "TASK01", "MemberName": "An"}]},
+                           project='shop')
+
+    assert _assignee() == ['Bình']
+    history = load_member_history(MEMBERS)
+    assert list(history) == ['an']
+    assert _assignee(history) == ['An']
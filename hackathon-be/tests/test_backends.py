@@ -0,0 +1,40 @@
+import pytest
+
+from ai_backends import GEMINI_MODEL, GeminiBackend, RecordingBackend, ReplayBackend, StubBackend, bind_default_client
+from ai_integration import build_task_analysis_prompt
+from ai_schemas import TASK_ANALYSIS_SCHEMA, json_generation_config
+
+PROMPT = build_task_analysis_prompt("Xây dựng API đăng nhập\nVẽ wireframe trang chủ")
+
+def _api_key(backend):
+    return backend.model._client._transport._credentials.token
+
+def test_gemini_backends_keep_their_own_key():
+    pytest.importorskip('google.generativeai')
+    first = GeminiBackend('key-first')
+    second = GeminiBackend('key-second')
+    assert first.model._client is not second.model._client
+    assert _api_key(first) == 'key-first'
+    assert _api_key(second) == 'key-second'
+
+def test_replay_keys_on_generation_options(tmp_path):
+    path = tmp_path / 'recordings.jsonl'
+    recorder = RecordingBackend(StubBackend(), path)
+    structured = {'generation_config': json_generation_config(TASK_ANALYSIS_SCHEMA)}
+    plain = recorder.generate_content(PROMPT).text
+    bare = recorder.generate_content(PROMPT, **structured).text
+    assert plain != bare
+
+    replay = ReplayBackend(path, latency=0.0)
+    assert len(replay.records) == 2
+    assert replay.generate_content(PROMPT).text == plain
+    assert replay.generate_content(PROMPT, **structured).text == bare
+
+def test_unsupported_sdk_is_refused():
+    genai = pytest.importorskip('google.generativeai')
+
+    class NewerSdk:
+        __version__ = '1.0.0'
+
+    with pytest.raises(RuntimeError):
+        bind_default_client(NewerSdk(), genai.GenerativeModel(GEMINI_MODEL))
@@ -0,0 +1,30 @@
+from ai_cache import CachedModel, ResponseCache
+from ai_integration import generate_json_items
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class StreamingModel:
+    calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        return iter([Chunk('```json\n[{"taskId": "TASK01"},'), Chunk(' {"taskId": "TASK02"}]'), Chunk('\n```')])
+
+def test_streamed_responses_are_cached(tmp_path):
+    inner = StreamingModel()
+    cache = ResponseCache(tmp_path / 'cache.sqlite3')
+    model = CachedModel(inner, 'test-model', cache)
+    first = generate_json_items(model, 'prompt', on_item=lambda item: None)
+    second = generate_json_items(model, 'prompt', on_item=lambda item: None)
+    assert first == second == [{"taskId": "TASK01"}, {"taskId": "TASK02"}]
+    assert inner.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_stream_closed_mid_array_is_not_cached(tmp_path):
+    cache = ResponseCache(tmp_path / 'cache.sqlite3')
+    stream = CachedModel(StreamingModel(), 'test-model', cache).generate_content('prompt', stream=True)
+    next(stream)
+    stream.close()
+    assert cache.stats()['entries'] == 0
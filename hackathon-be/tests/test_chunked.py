@@ -0,0 +1,44 @@
+import threading
+import time
+
+import ai_chunked
+from ai_chunked import analyze_in_chunks, make_chunks
+
+TASKS = [{"taskId": f"TASK{i:02d}", "name": f"Task {i}"} for i in range(1, 11)]
+
+def test_make_chunks():
+    assert [len(chunk) for chunk in make_chunks(TASKS, 4)] == [4, 4, 2]
+    assert make_chunks(TASKS, 0)[0] == [TASKS[0]]
+
+def test_rows_come_back_in_input_order():
+    def analyze(chunk):
+        # The first chunk finishes last
+        time.sleep(0.02 if chunk[0]['taskId'] == 'TASK01' else 0)
+        return [{"taskId": t['taskId'].lower(), "type": "Low"} for t in reversed(chunk)]
+
+    rows = analyze_in_chunks(TASKS, analyze, chunk_size=3, concurrency=4)
+    assert [row['taskId'] for row in rows] == [t['taskId'] for t in TASKS]
+
+def test_only_missing_tasks_are_asked_again(monkeypatch):
+    monkeypatch.setattr(ai_chunked, 'RETRY_DELAY', 0)
+    calls = []
+    lock = threading.Lock()
+
+    def analyze(chunk):
+        with lock:
+            calls.append([t['taskId'] for t in chunk])
+            first = len([c for c in calls if chunk[0]['taskId'] in c]) == 1
+        if first and chunk[0]['taskId'] == 'TASK01':
+            raise RuntimeError('503')
+        # The first answer for each chunk drops its last task
+        return [{"taskId": t['taskId']} for t in (chunk[:-1] if first and len(chunk) > 1 else chunk)]
+
+    rows = analyze_in_chunks(TASKS, analyze, chunk_size=5, concurrency=2, retries=2)
+    assert [row['taskId'] for row in rows] == [t['taskId'] for t in TASKS]
+    assert ['TASK10'] in calls
+    assert ['TASK01', 'TASK02', 'TASK03', 'TASK04', 'TASK05'] in calls
+
+def test_tasks_still_missing_are_left_out(monkeypatch):
+    monkeypatch.setattr(ai_chunked, 'RETRY_DELAY', 0)
+    rows = analyze_in_chunks(TASKS[:3], lambda chunk: [{"taskId": "TASK01"}], retries=1)
+    assert rows == [{"taskId": "TASK01"}]
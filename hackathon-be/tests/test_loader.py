@@ -0,0 +1,66 @@
+import io
+import json
+import types
+
+import pytest
+
+import ai_loader
+from ai_loader import (JsonStreamReader, file_format, iter_items, iter_json_items, iter_members, iter_task_items,
+                       read_task_input)
+
+TASKS = [{"name": "Thiết kế giao diện", "description": "Figma"}, {"name": "Xây dựng API", "estimate": 12.5},
+         "Viết tài liệu"]
+
+def test_file_formats():
+    assert [file_format(name) for name in ('a.CSV', 'a.jsonl', 'a.ndjson', 'a.json', 'a.txt', 'a')] == \
+        ['csv', 'ndjson', 'ndjson', 'json', 'text', 'text']
+
+def test_json_and_ndjson_give_the_same_items(tmp_path):
+    (tmp_path / 'tasks.json').write_text(json.dumps({"project": "X", "tasks": TASKS}, ensure_ascii=False),
+                                         encoding='utf-8')
+    (tmp_path / 'tasks.jsonl').write_text('\n'.join(json.dumps(t, ensure_ascii=False) for t in TASKS) + '\n\n',
+                                          encoding='utf-8')
+    assert list(iter_task_items(tmp_path / 'tasks.json')) == TASKS
+    assert list(iter_task_items(tmp_path / 'tasks.jsonl')) == TASKS
+
+def test_values_cut_by_the_read_buffer():
+    document = json.dumps([{"n": 12345, "x": 1.25, "s": "chuỗi dài " * 20}, 678, [1, 2]], ensure_ascii=False)
+    for read_size in (1, 2, 3, 7):
+        reader = JsonStreamReader(io.StringIO(document), read_size)
+        assert list(reader.iter_array()) == json.loads(document)
+
+def test_object_without_a_list_key_is_one_item():
+    assert list(iter_json_items(io.StringIO('{"Name": "An", "tasks": "x"}'), ('tasks',))) == \
+        [{"Name": "An", "tasks": "x"}]
+
+def test_malformed_input_is_reported():
+    with pytest.raises(ValueError):
+        list(iter_json_items(io.StringIO('[{"a": 1}, {"b": 2}')))
+    with pytest.raises(ValueError, match='Line 2'):
+        list(iter_items(io.StringIO('{"a": 1}\n{oops}\n'), 'ndjson'))
+
+def test_csv_without_a_name_column(tmp_path):
+    (tmp_path / 'tasks.csv').write_text('﻿Task,Details\nLàm API,REST\n', encoding='utf-8')
+    assert list(iter_task_items(tmp_path / 'tasks.csv')) == [{"name": "Làm API", "description": "REST"}]
+
+def test_members_from_csv_and_json(tmp_path):
+    (tmp_path / 'users.csv').write_text('Id,Name\n1,An\n', encoding='utf-8')
+    (tmp_path / 'users.json').write_text('{"members": [{"Id": "1", "Name": "An"}, "skip"]}', encoding='utf-8')
+    assert list(iter_members(tmp_path / 'users.csv')) == list(iter_members(tmp_path / 'users.json')) == \
+        [{"Id": "1", "Name": "An"}]
+
+def test_small_files_are_read_whole_and_large_ones_streamed(tmp_path, monkeypatch):
+    path = tmp_path / 'tasks.json'
+    path.write_text(json.dumps(TASKS, ensure_ascii=False), encoding='utf-8')
+    monkeypatch.setattr(ai_loader, 'STREAM_MIN_BYTES', path.stat().st_size + 1)
+    assert read_task_input(path) == path.read_text(encoding='utf-8')
+
+    monkeypatch.setattr(ai_loader, 'STREAM_MIN_BYTES', path.stat().st_size)
+    streamed = read_task_input(path)
+    assert isinstance(streamed, types.GeneratorType)
+    assert list(streamed) == TASKS
+
+def test_ndjson_is_always_streamed(tmp_path):
+    path = tmp_path / 'tasks.ndjson'
+    path.write_text('"Viết tài liệu"\n', encoding='utf-8')
+    assert list(read_task_input(path)) == ["Viết tài liệu"]
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+import ai_integration
+
+def _backend(model):
+    while not hasattr(model, '_client'):
+        model = model.model
+    return model
+
+def test_models_per_api_key_use_their_own_client(monkeypatch):
+    monkeypatch.setenv('AI_CACHE', 'off')
+    monkeypatch.setattr(ai_integration, '_models', {})
+    monkeypatch.setattr(ai_integration, '_response_cache', None)
+    first = _backend(ai_integration.get_model('job-key-1', 'gemini'))
+    second = _backend(ai_integration.get_model('job-key-2', 'gemini'))
+    # A model built later re-configures genai; earlier models keep their key
+    assert ai_integration.get_model('job-key-1', 'gemini') is not ai_integration.get_model('job-key-2', 'gemini')
+    assert first._client._transport._credentials.token == 'job-key-1'
+    assert second._client._transport._credentials.token == 'job-key-2'
@@ -0,0 +1,47 @@
+import json
+
+from ai_integration import build_user_assignment_prompt
+from ai_pipeline import WorkloadBalance
+
+TASKS = [
+    {"taskId": "TASK01", "taskName": "Thiết kế giao diện", "type": "Medium", "difficulty": "Medium",
+     "skills": ["Figma"], "workload": "Medium", "priority": 3},
+    {"taskId": "TASK02", "taskName": "Xây dựng API", "type": "High", "difficulty": "High",
+     "skills": ["Backend"], "workload": "Large", "priority": 4},
+]
+USERS = [
+    {"Id": "1", "Name": "Nguyễn Văn An", "Department": "Design", "Role": "UI/UX Designer"},
+    {"Id": "2", "Name": "Trần Thị Bình", "Department": "Backend", "Role": "Backend Developer"},
+]
+
+def _members_json(prompt):
+    """The member list of a JSON-format prompt"""
+    start = prompt.index('[', prompt.index('Danh sách thành viên'))
+    return json.JSONDecoder().raw_decode(prompt[start:])[0]
+
+def test_assignment_prompt_compact():
+    prompt = build_user_assignment_prompt(TASKS, USERS, compact=True)
+    assert 'TASK02' in prompt
+    assert 'Nguyễn Văn An' in prompt
+
+def test_assignment_prompt_json():
+    prompt = build_user_assignment_prompt(TASKS, USERS, compact=False)
+    assert 'TASK02' in prompt
+    assert _members_json(prompt) == USERS
+
+def test_assignment_prompt_json_with_balance():
+    balance = WorkloadBalance(USERS, expected_tasks=4)
+    balance.add_tasks(TASKS)
+    balance.admit([{"taskId": "TASK01", "MemberName": "Nguyễn Văn An"}])
+    prompt = build_user_assignment_prompt(TASKS, USERS, compact=False, balance=balance)
+    members = _members_json(prompt)
+    assert [m['load'] for m in members] == [balance.member_load(u['Name']) for u in USERS]
+    assert members[0]['load'] > 0
+    assert f"{balance.cap_units():g} đơn vị" in prompt
+
+def test_assignment_prompt_compact_with_balance():
+    balance = WorkloadBalance(USERS, expected_tasks=4)
+    balance.add_tasks(TASKS)
+    prompt = build_user_assignment_prompt(TASKS, USERS, compact=True, balance=balance)
+    assert 'load' in prompt
+    assert f"{balance.cap_units():g} đơn vị" in prompt
@@ -0,0 +1,56 @@
+import io
+import json
+
+import pytest
+
+from ai_protocol import encode_frame, iter_frames, read_document
+
+JOB = {"tasks": "Thiết kế giao diện\nXây dựng API", "users": [{"Id": "1", "Name": "Nguyễn Văn An"}]}
+
+class TrickleStream(io.RawIOBase):
+    """A raw stream that returns at most `step` bytes per read, like a pipe mid-write"""
+
+    def __init__(self, data, step=3):
+        self.data = data
+        self.pos = 0
+        self.step = step
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data[self.pos:self.pos + min(self.step, len(buffer))]
+        buffer[:len(chunk)] = chunk
+        self.pos += len(chunk)
+        return len(chunk)
+
+def test_length_frame_round_trip():
+    assert read_document(io.BytesIO(encode_frame(JOB))) == JOB
+
+def test_short_reads_are_completed():
+    frame = encode_frame(JOB)
+    assert read_document(TrickleStream(frame)) == JOB
+    assert list(iter_frames(TrickleStream(frame * 2))) == [JOB, JOB]
+
+def test_plain_document_without_a_frame():
+    assert read_document(io.BytesIO(('﻿' + json.dumps(JOB)).encode('utf-8'))) == JOB
+
+def test_frame_longer_than_the_input_is_rejected():
+    payload = json.dumps(JOB).encode('utf-8')
+    with pytest.raises(ValueError, match='Truncated input'):
+        read_document(io.BytesIO(str(len(payload) + 10).encode() + b'\n' + payload))
+    with pytest.raises(ValueError, match='Truncated frame'):
+        list(iter_frames(io.BytesIO(str(len(payload) + 10).encode() + b'\n' + payload)))
+
+def test_bytes_past_the_frame_are_ignored():
+    assert read_document(io.BytesIO(encode_frame(JOB) + b'{"trailing": true}')) == JOB
+
+def test_ndjson_frames_are_single_lines():
+    frames = encode_frame({"id": 1}, 'ndjson') + encode_frame({"id": 2}, 'ndjson')
+    assert [json.loads(line) for line in frames.splitlines()] == [{"id": 1}, {"id": 2}]
+
+def test_non_object_documents_are_rejected():
+    with pytest.raises(ValueError):
+        read_document(io.BytesIO(b'\n'))
+    with pytest.raises(ValueError):
+        read_document(io.BytesIO(encode_frame([1, 2])))
@@ -0,0 +1,63 @@
+from ai_assigner import assign_tasks
+from ai_reassign import previous_plan, reassign
+
+MEMBERS = [{"Id": str(i), "Name": name, "Department": "Backend", "Position": "Developer", "Experience": "4 years"}
+           for i, name in enumerate(["An", "Bình", "Châu", "Dũng", "Giang"], 1)]
+TASKS = [{"taskId": f"TASK{i:02d}", "type": task_type, "skills": ["Backend"], "workload": workload}
+         for i, (task_type, workload) in enumerate([("Medium", "Medium"), ("Low", "Small"), ("High", "Large"),
+                                                    ("Medium", "Medium"), ("Low", "Small")], 1)]
+
+def _pairs(mapping):
+    return {(row['taskId'], row['MemberName']) for row in mapping}
+
+def _previous():
+    mapping, _ = assign_tasks(TASKS, MEMBERS)
+    return mapping
+
+def test_nothing_changed_keeps_every_row():
+    previous = _previous()
+    mapping, assignment, stats = reassign(TASKS, MEMBERS, previous)
+    assert _pairs(mapping) == _pairs(previous)
+    assert len(assignment) == len(mapping)
+    assert stats['added'] == 0 and stats['kept'] == len(previous)
+
+def test_removed_task_drops_only_its_rows():
+    previous = _previous()
+    mapping, _, stats = reassign(TASKS[1:], MEMBERS, previous)
+    assert _pairs(mapping) == {pair for pair in _pairs(previous) if pair[0] != 'TASK01'}
+    assert stats['removedTask'] == len([row for row in previous if row['taskId'] == 'TASK01'])
+
+def test_departed_member_is_replaced():
+    previous = _previous()
+    leaving = previous[0]['MemberName']
+    members = [m for m in MEMBERS if m['Name'] != leaving]
+    mapping, _, stats = reassign(TASKS, members, previous)
+    assert leaving not in {row['MemberName'] for row in mapping}
+    assert stats['departed'] == len([row for row in previous if row['MemberName'] == leaving])
+    assert stats['added'] >= 1
+    assert {row['taskId'] for row in mapping} == {t['taskId'] for t in TASKS}
+    # Everyone else keeps their tasks
+    assert {pair for pair in _pairs(previous) if pair[1] != leaving} <= _pairs(mapping)
+
+def test_new_task_is_staffed_without_moving_others():
+    previous = _previous()
+    new = {"taskId": "TASK06", "type": "Low", "skills": ["Backend"], "workload": "Small"}
+    mapping, _, stats = reassign(TASKS + [new], MEMBERS, previous)
+    assert _pairs(previous) <= _pairs(mapping)
+    assert [row for row in mapping if row['taskId'] == 'TASK06']
+    assert stats['added'] == len(_pairs(mapping) - _pairs(previous))
+
+def test_completed_and_pinned_rows_are_kept():
+    previous = [{"taskId": t['taskId'], "MemberName": "An"} for t in TASKS]
+    mapping, _, stats = reassign(TASKS, MEMBERS, previous, completed=['TASK01'], pinned=['TASK03'])
+    assert ('TASK01', 'An') in _pairs(mapping)
+    # Pinned rows stay even though An now holds more than the cap allows
+    assert ('TASK03', 'An') in _pairs(mapping)
+    assert stats['overCap'] >= 1
+
+def test_previous_plan_merges_ids():
+    plan = previous_plan({"userTaskMapping": [{"taskId": "TASK01", "MemberName": "An"}], "completed": "TASK01, TASK02"},
+                         pinned=['TASK03'])
+    assert plan == {"userTaskMapping": [{"taskId": "TASK01", "MemberName": "An"}],
+                    "completed": ["TASK01", "TASK02"], "pinned": ["TASK03"]}
+    assert previous_plan([])['userTaskMapping'] == []
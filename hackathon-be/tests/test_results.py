@@ -0,0 +1,75 @@
+from ai_incremental import TaskAnalysisStore
+from ai_integration import run_ai_analysis
+from ai_results import ResultStore
+
+TASKS = '[{"step": "Thiết kế", "tasks": ["Vẽ wireframe", "Làm mockup Figma"]}, {"step": "Phát triển", "tasks": ["Xây dựng API"]}]'
+USERS = '[{"Id": "1", "Name": "Nguyễn Văn An"}, {"Id": "2", "Name": "Trần Thị Bình"}, {"Id": "3", "Name": "Lê Minh Châu"}]'
+
+def _run(tmp_path, **options):
+    (tmp_path / 'tasks.json').write_text(TASKS, encoding='utf-8')
+    (tmp_path / 'users.json').write_text(USERS, encoding='utf-8')
+    return run_ai_analysis(tmp_path / 'tasks.json', tmp_path / 'users.json', None, backend='stub', **options)
+
+def test_history_fingerprints_match_incremental_store(tmp_path, monkeypatch):
+    monkeypatch.setenv('AI_STORE_PATH', str(tmp_path / 'store.sqlite3'))
+    monkeypatch.setattr('ai_integration._result_store', None)
+    monkeypatch.setattr('ai_integration._task_store', None)
+    _run(tmp_path)
+    _run(tmp_path, project='film')
+
+    stored = {task_id: fp for fp, (task_id, _) in TaskAnalysisStore().load('film').items()}
+    history = ResultStore()
+    for run in history.runs():
+        rows = history._conn.execute('SELECT task_id, fingerprint FROM run_tasks WHERE run_id = ?',
+                                     (run['runId'],)).fetchall()
+        assert dict(rows) == stored
+
+def test_task_history_by_name(tmp_path, monkeypatch):
+    monkeypatch.setenv('AI_STORE_PATH', str(tmp_path / 'store.sqlite3'))
+    monkeypatch.setattr('ai_integration._result_store', None)
+    result = _run(tmp_path)
+    assert [row['taskName'] for row in result['taskAnalysis']] == ['Vẽ wireframe', 'Làm mockup Figma', 'Xây dựng API']
+    history = ResultStore()
+    assert [h['taskId'] for h in history.task_history(name='Xây dựng API')] == ['TASK03']
+    assert [h['taskId'] for h in history.task_history(name='Xây dựng API', step='Phát triển')] == ['TASK03']
+    assert history.task_history(name='Xây dựng API', step='Thiết kế') == []
+
+def test_mock_runs_are_not_reused(tmp_path, monkeypatch):
+    monkeypatch.setenv('AI_STORE_PATH', str(tmp_path / 'store.sqlite3'))
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    monkeypatch.setattr('ai_integration._result_store', None)
+    _run(tmp_path, project='film')
+    (tmp_path / 'tasks.json').write_text(TASKS, encoding='utf-8')
+    mock = run_ai_analysis(tmp_path / 'tasks.json', tmp_path / 'users.json', None, backend='gemini', project='film')
+    assert mock['mock']
+    history = ResultStore()
+    assert [run['status'] for run in history.runs('film')] == ['mock', 'ok']
+    assert history.latest_run_id('film') == history.runs('film')[1]['runId']
+
+def test_prune_keeps_newest_and_last_ok_run(tmp_path):
+    store = ResultStore(tmp_path / 'store.sqlite3', keep=0)
+    ok = store.save_run({"taskAnalysis": [{"taskId": "TASK01"}], "userTaskMapping": []}, 'film')
+    for _ in range(3):
+        store.save_run({"taskAnalysis": [], "userTaskMapping": [], "error": "boom"}, 'film')
+    other = store.save_run({"taskAnalysis": [], "userTaskMapping": []}, 'other')
+    assert store.prune(2) == 1
+    assert [run['runId'] for run in store.runs()] == [other, ok + 3, ok + 2, ok]
+    assert store.latest_run_id('film') == ok
+    assert store._conn.execute('SELECT COUNT(*) FROM run_tasks').fetchone()[0] == 1
+
+def test_project_balance_knows_the_task_count(tmp_path, monkeypatch):
+    import ai_pipeline
+    monkeypatch.setenv('AI_STORE_PATH', str(tmp_path / 'store.sqlite3'))
+    monkeypatch.setenv('AI_PIPELINE', 'on')
+    monkeypatch.setattr('ai_integration._result_store', None)
+    monkeypatch.setattr('ai_integration._task_store', None)
+    balances = []
+
+    class RecordingBalance(ai_pipeline.WorkloadBalance):
+        def admit(self, *args, **kwargs):
+            balances.append(self.expected_tasks)
+            return super().admit(*args, **kwargs)
+
+    monkeypatch.setattr('ai_integration.WorkloadBalance', RecordingBalance)
+    _run(tmp_path, project='film', chunk_size=1)
+    assert balances and set(balances) == {3}
@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_scheduler import EmptyFirstChunk, ScheduledModel, Scheduler
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class StreamingModel:
+    def generate_content(self, prompt, stream=False, **kwargs):
+        return iter([Chunk('a'), Chunk('b'), Chunk('c')])
+
+def test_stream_holds_its_slot_until_exhausted():
+    scheduler = Scheduler(max_in_flight=1)
+    stream = ScheduledModel(StreamingModel(), scheduler).generate_content('prompt', stream=True)
+    assert next(stream).text == 'a'
+    assert scheduler.stats()['inFlight'] == 1
+    assert [chunk.text for chunk in stream] == ['b', 'c']
+    assert scheduler.stats()['inFlight'] == 0
+
+def test_closed_stream_frees_its_slot():
+    scheduler = Scheduler(max_in_flight=1)
+    stream = ScheduledModel(StreamingModel(), scheduler).generate_content('prompt', stream=True)
+    next(stream)
+    stream.close()
+    assert scheduler.stats()['inFlight'] == 0
+    assert scheduler.call(lambda: 'done', deadline=0.1) == 'done'
+
+class EmptyChunk:
+    @property
+    def text(self):
+        # What the SDK raises for a chunk without text parts
+        raise ValueError('no text parts')
+
+class FlakyStreamingModel:
+    calls = 0
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        return iter([EmptyChunk()] if self.calls == 1 else [Chunk('a')])
+
+def test_first_chunk_errors_are_retried():
+    scheduler = Scheduler(base_delay=0.001)
+    model = FlakyStreamingModel()
+    stream = ScheduledModel(model, scheduler).generate_content('prompt', stream=True)
+    assert [chunk.text for chunk in stream] == ['a']
+    assert model.calls == 2
+    assert scheduler.stats()['retries'] == 1
+
+def test_empty_first_chunk_reaches_the_caller():
+    class EmptyModel:
+        def generate_content(self, prompt, stream=False, **kwargs):
+            return iter([EmptyChunk()])
+
+    stream = ScheduledModel(EmptyModel(), Scheduler(max_retries=1, base_delay=0.001)).generate_content(
+        'prompt', stream=True)
+    with pytest.raises(EmptyFirstChunk):
+        next(stream)
+
+class SlowModel:
+    def __init__(self, name):
+        self.name = name
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(0.05)
+        return Chunk(self.name)
+
+def test_models_sharing_a_scheduler_do_not_coalesce():
+    scheduler = Scheduler()
+    models = [ScheduledModel(SlowModel(name), scheduler) for name in ('key-1', 'key-2')]
+    with ThreadPoolExecutor(2) as pool:
+        texts = list(pool.map(lambda model: model.generate_content('prompt').text, models))
+    assert texts == ['key-1', 'key-2']
+    assert scheduler.stats()['coalesced'] == 0
@@ -0,0 +1,68 @@
+import json
+
+from ai_integration import TASK_ANALYSIS_EXAMPLE, build_repair_prompt, run_task_analysis
+from ai_names import MemberIndex
+from ai_schemas import validate_mapping_row, validate_task_row
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+class ScriptedModel:
+    """Answers each call with the next scripted response and keeps the prompts"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return Response(json.dumps(self.responses.pop(0), ensure_ascii=False))
+
+def test_task_row_coerces_near_misses():
+    row, errors = validate_task_row({"taskId": " TASK01 ", "type": "high", "difficulty": "hard",
+                                     "skills": "React, Node; UI/UX", "workload": "heavy", "priority": "5 - cao"})
+    assert errors == []
+    assert row == {"taskId": "TASK01", "type": "High", "difficulty": "High", "skills": ["React", "Node", "UI", "UX"],
+                   "workload": "Large", "priority": 5}
+
+def test_task_row_reports_every_error():
+    row, errors = validate_task_row({"type": "Very Hard", "workload": "Huge", "skills": [], "priority": None})
+    assert row is None
+    assert len(errors) == 5
+
+def test_task_row_falls_back_to_type_for_difficulty():
+    row, _ = validate_task_row({"taskId": "TASK01", "type": "Low", "difficulty": "?", "skills": ["Docs"],
+                                "workload": "Small", "priority": 9})
+    assert (row['difficulty'], row['priority']) == ('Low', 5)
+
+def test_mapping_row_checks_both_ends():
+    members = MemberIndex([{"Id": "1", "Name": "Nguyễn Văn An"}])
+    row, errors = validate_mapping_row({"Task ID": "task01", "Thành viên (tên)": "nguyen van an"}, {"TASK01"}, members)
+    assert (row, errors) == ({"taskId": "task01", "MemberName": "Nguyễn Văn An"}, [])
+    row, errors = validate_mapping_row({"taskId": "TASK02", "MemberName": "Bình"}, {"TASK01"}, members)
+    assert row is None
+    assert errors == ["unknown taskId TASK02", "unknown member Bình"]
+
+def test_repair_prompt_lists_only_the_invalid_items():
+    invalid = [({"taskId": "TASK02", "type": "Huge"}, ["type must be one of Low, Medium, High, Urgent"])]
+    prompt = build_repair_prompt(invalid, TASK_ANALYSIS_EXAMPLE)
+    assert '"taskId": "TASK02"' in prompt
+    assert "type must be one of" in prompt
+    assert "TASK01" in prompt  # the example row
+    assert prompt.count('"item"') == 1
+
+def test_only_invalid_rows_are_repaired(monkeypatch):
+    monkeypatch.setattr('ai_integration.REPAIR_ROUNDS', 1)
+    valid = {"taskId": "TASK01", "type": "Low", "difficulty": "Low", "skills": ["Docs"], "workload": "Small",
+             "priority": 2}
+    broken = {**valid, "taskId": "TASK02", "workload": "Huge"}
+    anonymous = {**valid, "taskId": ""}
+    model = ScriptedModel([valid, broken, anonymous], [{**broken, "workload": "Large"}])
+
+    rows = run_task_analysis(model, "Viết tài liệu\nTối ưu truy vấn", fixed_ids=True)
+    assert [(row['taskId'], row['workload']) for row in rows] == [("TASK01", "Small"), ("TASK02", "Large")]
+    assert len(model.prompts) == 2
+    repair = model.prompts[1]
+    assert '"taskId": "TASK02"' in repair and '"Huge"' in repair
+    assert repair.count('"item"') == 1 and "Viết tài liệu" not in repair
@@ -0,0 +1,44 @@
+import pytest
+
+from ai_scoring import (MIN_SUBSTRING_TOKEN, WEIGHT_LEVEL, WEIGHT_SKILL, build_matrix, level_mismatch, member_level,
+                        normalize_member, normalize_task, parse_years, tokenize)
+
+TASKS = [
+    {"taskId": "TASK01", "type": "High", "skills": ["Backend", "API design"]},
+    {"taskId": "TASK02", "type": "Low", "skills": "React, UI/UX"},
+    {"taskId": "TASK03", "type": "Urgent", "skills": ["Flutter"]},
+]
+MEMBERS = [
+    {"Id": "1", "Name": "A", "Department": "Backend", "Position": "Senior Backend Developer", "Experience": "9 years"},
+    {"Id": "2", "Name": "B", "Department": "Frontend", "Position": "Junior React Developer", "Experience": "2 năm"},
+    {"Id": "3", "Name": "C", "Department": "Mobile", "Position": "Flutter Developer", "Experience": 5},
+    {"Id": "4", "Name": "D", "Department": "Design", "Position": "UI Designer", "Experience": "0.5 years"},
+]
+
+def _reference_score(task, member):
+    """One task/member pair scored the way the matrix should, without NumPy"""
+    skill = 0.0
+    for phrase in task['skills']:
+        tokens = tokenize(phrase)
+        if any(t in tokens or (len(t) >= MIN_SUBSTRING_TOKEN and t in phrase.lower()) for t in member['profile']):
+            skill += 1.0 / len(task['skills'])
+    return WEIGHT_SKILL * skill - WEIGHT_LEVEL * level_mismatch(task['type'], member['level'])
+
+def test_matrix_matches_pairwise_scores():
+    matrix = build_matrix(TASKS, MEMBERS)
+    tasks = [normalize_task(t, i) for i, t in enumerate(TASKS)]
+    members = [normalize_member(m, i) for i, m in enumerate(MEMBERS)]
+    for task in tasks:
+        for member in members:
+            assert matrix.scores[task['index'], member['index']] == pytest.approx(_reference_score(task, member))
+
+def test_top_k_is_best_first_with_ties_by_index():
+    matrix = build_matrix(TASKS, MEMBERS)
+    indexes, scores = matrix.top_k(3)
+    for row, (chosen, chosen_scores) in enumerate(zip(indexes, scores)):
+        expected = sorted(range(len(MEMBERS)), key=lambda m: (-matrix.scores[row, m], m))[:3]
+        assert list(chosen) == expected
+        assert list(chosen_scores) == pytest.approx([matrix.scores[row, m] for m in expected])
+
+def test_experience_levels():
+    assert [member_level(parse_years(m['Experience'])) for m in MEMBERS] == ['Senior', 'Junior', 'Medium', 'Fresher']
@@ -0,0 +1,60 @@
+from ai_stream import JsonArrayParser, iter_json_objects, parse_json_objects
+
+RESPONSE = ('Kết quả cho [TASK01] và [TASK02]:\n```json\n[\n'
+            '  {"taskId": "TASK01", "note": "dấu } và ] trong chuỗi, \\"trích dẫn\\" \\\\"},\n'
+            '  {"taskId": "TASK02", "skills": ["React", "UI/UX"], "meta": {"depth": [1, {"x": 2}]}}\n'
+            ']\n```\nHết.')
+EXPECTED = [{"taskId": "TASK01", "note": 'dấu } và ] trong chuỗi, "trích dẫn" \\'},
+            {"taskId": "TASK02", "skills": ["React", "UI/UX"], "meta": {"depth": [1, {"x": 2}]}}]
+
+def _feed(chunks):
+    parser = JsonArrayParser()
+    objects = []
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    return parser, objects
+
+def test_whole_response():
+    assert parse_json_objects(RESPONSE) == EXPECTED
+
+def test_every_split_point_gives_the_same_objects():
+    for i in range(len(RESPONSE) + 1):
+        parser, objects = _feed([RESPONSE[:i], RESPONSE[i:]])
+        assert objects == EXPECTED, i
+        assert parser.finished
+
+def test_one_character_chunks():
+    parser, objects = _feed(list(RESPONSE))
+    assert objects == EXPECTED
+    assert parser.finished
+
+def test_objects_arrive_as_soon_as_they_close():
+    parser = JsonArrayParser()
+    cut = RESPONSE.index('},') + 1
+    assert parser.feed(RESPONSE[:cut]) == EXPECTED[:1]
+    assert parser.balanced
+    assert parser.feed(RESPONSE[cut:]) == EXPECTED[1:]
+
+def test_truncated_response_keeps_closed_objects():
+    cut = RESPONSE.index('"meta"')
+    parser, objects = _feed([RESPONSE[:cut]])
+    assert objects == EXPECTED[:1]
+    assert parser.started and not parser.finished and not parser.balanced
+
+def test_text_after_the_array_is_ignored():
+    parser, objects = _feed([RESPONSE, '\n[{"taskId": "TASK99"}]'])
+    assert objects == EXPECTED
+
+def test_iteration_stops_at_the_closed_array():
+    consumed = []
+
+    def chunks():
+        for chunk in (RESPONSE[:60], RESPONSE[60:RESPONSE.index('```\nHết')], 'never read'):
+            consumed.append(chunk)
+            yield chunk
+
+    assert list(iter_json_objects(chunks())) == EXPECTED
+    assert 'never read' not in consumed
+
+def test_no_array():
+    assert parse_json_objects('Không có kết quả [TASK01].') == []